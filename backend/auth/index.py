@@ -1,125 +1,100 @@
-import json
-import os
-import hashlib
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from runtime import Router, error, response
+from passwords import burn_verify, hash_password, needs_rehash, verify_password
+import session
+
+router = Router(allow_methods='GET, POST, OPTIONS')
+
+
+def session_response(user: dict) -> dict:
+    payload = {'user': dict(user)}
+    if session.enabled():
+        payload['token'], payload['expires_at'] = session.issue_token(user['id'])
+    return response(200, payload)
+
+
+@router.route('POST', 'register')
+def register(request) -> dict:
+    body = request.body
+    email = body.get('email', '').strip().lower()
+    password = body.get('password', '')
+    name = body.get('name', '')
+    phone = body.get('phone', '')
+
+    if not email or not password or not name:
+        return error(400, 'Заполните все обязательные поля')
+
+    password_hash = hash_password(password)
+
+    cursor = request.cursor()
+    cursor.execute(
+        "INSERT INTO users (email, password_hash, name, phone) VALUES (%s, %s, %s, %s) ON CONFLICT (email) DO NOTHING RETURNING id, email, name, phone",
+        (email, password_hash, name, phone)
+    )
+    user = cursor.fetchone()
+    request.conn.commit()
+
+    if not user:
+        return error(400, 'Пользователь с таким email уже существует')
+
+    return session_response(user)
+
+
+@router.route('POST', 'login')
+def login(request) -> dict:
+    body = request.body
+    email = body.get('email', '').strip().lower()
+    password = body.get('password', '')
+
+    if not email or not password:
+        return error(400, 'Введите email и пароль')
+
+    cursor = request.cursor()
+    cursor.execute(
+        "SELECT id, email, name, phone, password_hash FROM users WHERE email = %s",
+        (email,)
+    )
+    user = cursor.fetchone()
+
+    if not user:
+        burn_verify(password)
+        return error(401, 'Неверный email или пароль')
+
+    password_hash = user.pop('password_hash')
+    if not verify_password(password, password_hash):
+        return error(401, 'Неверный email или пароль')
+
+    if needs_rehash(password_hash):
+        cursor.execute(
+            "UPDATE users SET password_hash = %s WHERE id = %s AND password_hash = %s",
+            (hash_password(password), user['id'], password_hash)
+        )
+        request.conn.commit()
+
+    return session_response(user)
+
+
+@router.route('POST', 'logout')
+def logout(request) -> dict:
+    token = request.token
+    if not session.enabled() or not token:
+        return response(200, {'success': True})
+
+    try:
+        user_id, expires_at, session_id = session.parse_token(token)
+    except session.SessionError:
+        return response(200, {'success': True})
+
+    cursor = request.cursor()
+    cursor.execute(
+        "INSERT INTO revoked_sessions (session_id, user_id, expires_at) VALUES (%s, %s, %s) ON CONFLICT DO NOTHING",
+        (session_id, user_id, expires_at)
+    )
+    request.conn.commit()
+    session.revocations.add(session_id, expires_at)
+
+    return response(200, {'success': True})
+
 
 def handler(event: dict, context) -> dict:
     """API для регистрации и авторизации пользователей"""
-    
-    method = event.get('httpMethod', 'GET')
-    
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            },
-            'body': '',
-            'isBase64Encoded': False
-        }
-    
-    db_url = os.environ.get('DATABASE_URL')
-    schema = os.environ.get('MAIN_DB_SCHEMA', 'public')
-    
-    try:
-        conn = psycopg2.connect(db_url)
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        if method == 'POST':
-            body = json.loads(event.get('body', '{}'))
-            action = body.get('action')
-            
-            if action == 'register':
-                email = body.get('email', '').strip().lower()
-                password = body.get('password', '')
-                name = body.get('name', '')
-                phone = body.get('phone', '')
-                
-                if not email or not password or not name:
-                    return {
-                        'statusCode': 400,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps({'error': 'Заполните все обязательные поля'}),
-                        'isBase64Encoded': False
-                    }
-                
-                cursor.execute("SELECT id FROM users WHERE email = %s", (email,))
-                if cursor.fetchone():
-                    return {
-                        'statusCode': 400,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps({'error': 'Пользователь с таким email уже существует'}),
-                        'isBase64Encoded': False
-                    }
-                
-                password_hash = hashlib.sha256(password.encode()).hexdigest()
-                
-                cursor.execute(
-                    "INSERT INTO users (email, password_hash, name, phone) VALUES (%s, %s, %s, %s) RETURNING id, email, name, phone",
-                    (email, password_hash, name, phone)
-                )
-                user = cursor.fetchone()
-                conn.commit()
-                
-                return {
-                    'statusCode': 200,
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'user': dict(user)}),
-                    'isBase64Encoded': False
-                }
-            
-            elif action == 'login':
-                email = body.get('email', '').strip().lower()
-                password = body.get('password', '')
-                
-                if not email or not password:
-                    return {
-                        'statusCode': 400,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps({'error': 'Введите email и пароль'}),
-                        'isBase64Encoded': False
-                    }
-                
-                password_hash = hashlib.sha256(password.encode()).hexdigest()
-                
-                cursor.execute(
-                    "SELECT id, email, name, phone FROM users WHERE email = %s AND password_hash = %s",
-                    (email, password_hash)
-                )
-                user = cursor.fetchone()
-                
-                if not user:
-                    return {
-                        'statusCode': 401,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps({'error': 'Неверный email или пароль'}),
-                        'isBase64Encoded': False
-                    }
-                
-                return {
-                    'statusCode': 200,
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'user': dict(user)}),
-                    'isBase64Encoded': False
-                }
-        
-        cursor.close()
-        conn.close()
-        
-        return {
-            'statusCode': 405,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Method not allowed'}),
-            'isBase64Encoded': False
-        }
-        
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': str(e)}),
-            'isBase64Encoded': False
-        }
\ No newline at end of file
+    return router.dispatch(event, context)
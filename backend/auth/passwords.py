@@ -0,0 +1,143 @@
+"""Хэширование паролей с настраиваемой стоимостью.
+
+Хэш хранится в версионированном формате, по которому видно алгоритм и параметры:
+
+    pbkdf2_sha256$<итерации>$<соль>$<хэш>
+    scrypt$<n>$<r>$<p>$<соль>$<хэш>
+
+Соль и хэш — base64 без выравнивания. Старые хэши — голый sha256 в hex без соли;
+они проверяются как раньше и заменяются на текущий формат при входе (needs_rehash).
+
+Алгоритм и стоимость задаются переменными окружения PASSWORD_HASHER,
+PASSWORD_PBKDF2_ITERATIONS, PASSWORD_SCRYPT_N, PASSWORD_SCRYPT_R, PASSWORD_SCRYPT_P.
+"""
+import base64
+import hashlib
+import hmac
+import os
+
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode().rstrip('=')
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + '=' * (-len(data) % 4))
+
+
+class Pbkdf2Hasher:
+    algorithm = 'pbkdf2_sha256'
+
+    def __init__(self, iterations: int = 600_000):
+        self.iterations = iterations
+
+    def encode(self, password: str, salt: bytes) -> str:
+        key = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, self.iterations, KEY_BYTES)
+        return f'{self.algorithm}${self.iterations}${_b64encode(salt)}${_b64encode(key)}'
+
+    @staticmethod
+    def verify(password: str, parts: list) -> bool:
+        iterations, salt, key = parts
+        expected = _b64decode(key)
+        actual = hashlib.pbkdf2_hmac('sha256', password.encode(), _b64decode(salt), int(iterations), len(expected))
+        return hmac.compare_digest(actual, expected)
+
+    def is_current(self, parts: list) -> bool:
+        return int(parts[0]) >= self.iterations
+
+
+class ScryptHasher:
+    algorithm = 'scrypt'
+
+    def __init__(self, n: int = 2 ** 15, r: int = 8, p: int = 1):
+        self.n, self.r, self.p = n, r, p
+
+    @staticmethod
+    def _derive(password: str, salt: bytes, n: int, r: int, p: int, length: int) -> bytes:
+        # scrypt занимает около 128 * n * r * p байт, а стандартный лимит OpenSSL — 32 МБ
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r * p + 2 ** 20, dklen=length)
+
+    def encode(self, password: str, salt: bytes) -> str:
+        key = self._derive(password, salt, self.n, self.r, self.p, KEY_BYTES)
+        return f'{self.algorithm}${self.n}${self.r}${self.p}${_b64encode(salt)}${_b64encode(key)}'
+
+    @classmethod
+    def verify(cls, password: str, parts: list) -> bool:
+        n, r, p, salt, key = parts
+        expected = _b64decode(key)
+        actual = cls._derive(password, _b64decode(salt), int(n), int(r), int(p), len(expected))
+        return hmac.compare_digest(actual, expected)
+
+    def is_current(self, parts: list) -> bool:
+        n, r, p = (int(value) for value in parts[:3])
+        return (n, r, p) == (self.n, self.r, self.p)
+
+
+HASHERS = {Pbkdf2Hasher.algorithm: Pbkdf2Hasher, ScryptHasher.algorithm: ScryptHasher}
+
+
+def hasher_from_env():
+    algorithm = os.environ.get('PASSWORD_HASHER', Pbkdf2Hasher.algorithm)
+    if algorithm == ScryptHasher.algorithm:
+        return ScryptHasher(
+            n=int(os.environ.get('PASSWORD_SCRYPT_N', 2 ** 15)),
+            r=int(os.environ.get('PASSWORD_SCRYPT_R', 8)),
+            p=int(os.environ.get('PASSWORD_SCRYPT_P', 1))
+        )
+    if algorithm == Pbkdf2Hasher.algorithm:
+        return Pbkdf2Hasher(iterations=int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 600_000)))
+    raise ValueError(f'Неизвестный алгоритм хэширования паролей: {algorithm}')
+
+
+_hasher = hasher_from_env()
+
+
+def use_hasher(hasher) -> None:
+    """Подменяет текущий алгоритм, например в бенчмарке"""
+    global _hasher, _dummy_hash
+    _hasher = hasher
+    _dummy_hash = None
+
+
+def _is_legacy(stored: str) -> bool:
+    return len(stored) == 64 and '$' not in stored
+
+
+def hash_password(password: str) -> str:
+    return _hasher.encode(password, os.urandom(SALT_BYTES))
+
+
+def verify_password(password: str, stored: str) -> bool:
+    if _is_legacy(stored):
+        return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored)
+    algorithm, *parts = stored.split('$')
+    hasher = HASHERS.get(algorithm)
+    if hasher is None:
+        return False
+    try:
+        return hasher.verify(password, parts)
+    except (ValueError, OverflowError):
+        # Испорченный хэш (не то число частей, не число, не base64, недопустимые параметры) — пароль не подходит
+        return False
+
+
+def needs_rehash(stored: str) -> bool:
+    """True, если хэш старого формата, другого алгоритма или с устаревшими параметрами"""
+    if _is_legacy(stored):
+        return True
+    algorithm, *parts = stored.split('$')
+    return algorithm != _hasher.algorithm or not _hasher.is_current(parts)
+
+
+_dummy_hash = None
+
+
+def burn_verify(password: str) -> None:
+    """Проверка против фиктивного хэша, чтобы ответ для несуществующего email занимал столько же времени"""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password('')
+    verify_password(password, _dummy_hash)
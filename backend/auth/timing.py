@@ -0,0 +1,150 @@
+"""Замеры времени запроса по фазам; включаются переменной REQUEST_TIMING.
+
+REQUEST_TIMING=header добавляет к ответу Server-Timing, log — пишет в stdout одну строку
+JSON на запрос, header,log — и то и другое. Фазы: connect (соединение из пула), db (все
+команды, в логе — каждая со временем и числом строк), serialize (JSON тела), compress,
+handler (весь обработчик, включая connect, db и serialize) и total. Первый запрос
+процесса помечается cold, с init — временем от загрузки модулей до этого запроса.
+
+Без REQUEST_TIMING start() и current() возвращают None, а cursor_factory — исходный
+класс курсора, так что в обычном режиме остаются только эти проверки.
+"""
+import json
+import os
+import threading
+import time
+
+MODES = {mode.strip() for mode in os.environ.get('REQUEST_TIMING', '').split(',') if mode.strip()}
+HEADER = 'header' in MODES
+LOG = 'log' in MODES
+ENABLED = HEADER or LOG
+
+# В логе остаются первые команды запроса, остальные только считаются (импорт — тысячи пачек)
+MAX_LOGGED_STATEMENTS = 50
+
+_loaded_at = time.perf_counter()
+_cold = True
+_local = threading.local()
+
+
+class Trace:
+    __slots__ = ('started', 'cold', 'init', 'phases', 'statements', 'statement_count', 'rows')
+
+    def __init__(self, cold: bool, init: float):
+        self.started = time.perf_counter()
+        self.cold = cold
+        self.init = init
+        self.phases = {}
+        self.statements = []
+        self.statement_count = 0
+        self.rows = 0
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def measure(self, phase: str, func, *args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.add(phase, time.perf_counter() - started)
+
+    def statement(self, query, seconds: float, rows: int) -> None:
+        self.add('db', seconds)
+        self.statement_count += 1
+        self.rows += max(rows, 0)
+        if len(self.statements) < MAX_LOGGED_STATEMENTS:
+            if isinstance(query, bytes):
+                query = query.decode('utf-8', 'replace')
+            self.statements.append({'sql': ' '.join(str(query).split())[:120], 'ms': round(seconds * 1000, 3), 'rows': rows})
+
+    def server_timing(self, total: float) -> str:
+        parts = [f'total;dur={total * 1000:.1f}']
+        for phase, seconds in self.phases.items():
+            if phase == 'db':
+                parts.append(f'db;dur={seconds * 1000:.1f};desc="{self.statement_count} statements, {self.rows} rows"')
+            else:
+                parts.append(f'{phase};dur={seconds * 1000:.1f}')
+        if self.cold:
+            parts.append(f'init;dur={self.init * 1000:.1f};desc="cold start"')
+        return ', '.join(parts)
+
+    def log_line(self, total: float, method: str, action, status: int) -> str:
+        return json.dumps({
+            'request_timing': {
+                'method': method,
+                'action': action,
+                'status': status,
+                'cold': self.cold,
+                'init_ms': round(self.init * 1000, 1) if self.cold else None,
+                'total_ms': round(total * 1000, 3),
+                'phases_ms': {phase: round(seconds * 1000, 3) for phase, seconds in self.phases.items()},
+                'statement_count': self.statement_count,
+                'rows': self.rows,
+                'statements': self.statements
+            }
+        }, ensure_ascii=False)
+
+
+def start():
+    """Новый замер для запроса текущего потока; None, если замеры выключены"""
+    if not ENABLED:
+        return None
+    global _cold
+    cold, _cold = _cold, False
+    trace = Trace(cold, time.perf_counter() - _loaded_at if cold else 0.0)
+    _local.trace = trace
+    return trace
+
+
+def current():
+    return getattr(_local, 'trace', None) if ENABLED else None
+
+
+def finish(trace: Trace, result: dict, method: str, action) -> None:
+    total = time.perf_counter() - trace.started
+    _local.trace = None
+    if HEADER:
+        headers = result.setdefault('headers', {})
+        headers['Server-Timing'] = trace.server_timing(total)
+        headers['Timing-Allow-Origin'] = '*'
+        exposed = headers.get('Access-Control-Expose-Headers')
+        headers['Access-Control-Expose-Headers'] = f'{exposed}, Server-Timing' if exposed else 'Server-Timing'
+    if LOG:
+        print(trace.log_line(total, method, action, result.get('statusCode')), flush=True)
+
+
+class _TimedCursor:
+    """Примесь к классу курсора: время и число строк каждой команды в замер текущего запроса"""
+
+    def _timed(self, query, run):
+        trace = current()
+        if trace is None:
+            return run()
+        started = time.perf_counter()
+        try:
+            return run()
+        finally:
+            trace.statement(query, time.perf_counter() - started, self.rowcount)
+
+    def execute(self, query, vars=None):
+        return self._timed(query, lambda: super(_TimedCursor, self).execute(query, vars))
+
+    def executemany(self, query, vars_list):
+        return self._timed(query, lambda: super(_TimedCursor, self).executemany(query, vars_list))
+
+    def copy_expert(self, sql, file, size=8192):
+        return self._timed(sql, lambda: super(_TimedCursor, self).copy_expert(sql, file, size))
+
+
+_timed_cursors = {}
+
+
+def cursor_factory(base):
+    """base с замером команд, если замеры включены, иначе сам base"""
+    if not ENABLED:
+        return base
+    timed = _timed_cursors.get(base)
+    if timed is None:
+        timed = _timed_cursors[base] = type(f'Timed{base.__name__}', (_TimedCursor, base), {})
+    return timed
@@ -0,0 +1,190 @@
+"""Пересчёт КБЖУ в food_log после исправлений в каталоге.
+
+Записи продуктов из каталога читаются пачками по первичному ключу (id, date): каждая пачка —
+следующие --batch строк с food_name из списка после последнего обработанного ключа. КБЖУ
+считаются заново через macros.calculate, а изменившиеся строки записываются одним
+UPDATE ... FROM (VALUES ...) на пачку вместе с поправкой дневных итогов food_log_daily,
+сумм КБЖУ в user_food_stats и версий данных пользователей. Каждая пачка — отдельная короткая
+транзакция: её строки читаются с блокировкой FOR UPDATE, долгий снимок данных не держится
+и не мешает VACUUM.
+
+После каждой пачки в файл --checkpoint пишется последний обработанный (id, date), поэтому
+прерванный пересчёт продолжается с того же места тем же поиском по индексу. Скорость
+ограничивается --rate строк в секунду.
+
+    DATABASE_URL=... python backfill.py --foods "Курица грудка" "Рис отварной" --rate 2000
+
+Записи, которым КБЖУ задали при импорте вручную, тоже пересчитываются, если продукт
+с таким названием есть в каталоге.
+"""
+import argparse
+from datetime import date as date_type
+import json
+import os
+import sys
+import time
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from catalogue import get_catalogue
+from macros import calculate
+from versions import bump_version
+
+VERSION_SCOPE = 'food_log'
+REPORT_EVERY = 5
+
+# Порядок первичного ключа: каждая секция читается по своему индексу с места остановки
+SELECT_BATCH = """
+    SELECT id, food_name, grams::float8, calories::float8, protein::float8, fats::float8, carbs::float8, date
+    FROM food_log
+    WHERE food_name = ANY(%s) AND (id, date) > (%s, %s)
+    ORDER BY id, date
+    LIMIT %s
+"""
+
+CORRECT_FOOD_LOG = f"""
+    WITH corrected AS (
+        UPDATE food_log f SET calories = v.calories, protein = v.protein, fats = v.fats, carbs = v.carbs
+        FROM (VALUES %s) AS v (id, date, calories, protein, fats, carbs), food_log old
+        WHERE f.id = v.id AND f.date = v.date AND old.id = v.id AND old.date = v.date
+        RETURNING f.user_id, f.date, f.food_name,
+            f.calories - old.calories AS calories, f.protein - old.protein AS protein,
+            f.fats - old.fats AS fats, f.carbs - old.carbs AS carbs
+    ), totals AS (
+        SELECT user_id, date, SUM(calories) AS calories, SUM(protein) AS protein, SUM(fats) AS fats, SUM(carbs) AS carbs
+        FROM corrected
+        GROUP BY user_id, date
+    ), daily AS (
+        UPDATE food_log_daily SET
+            calories = food_log_daily.calories + totals.calories,
+            protein = food_log_daily.protein + totals.protein,
+            fats = food_log_daily.fats + totals.fats,
+            carbs = food_log_daily.carbs + totals.carbs
+        FROM totals
+        WHERE food_log_daily.user_id = totals.user_id AND food_log_daily.date = totals.date
+    ), foods AS (
+        UPDATE user_food_stats s SET
+            calories = s.calories + d.calories,
+            protein = s.protein + d.protein,
+            fats = s.fats + d.fats,
+            carbs = s.carbs + d.carbs
+        FROM (
+            SELECT user_id, food_name, SUM(calories) AS calories, SUM(protein) AS protein, SUM(fats) AS fats, SUM(carbs) AS carbs
+            FROM corrected
+            GROUP BY user_id, food_name
+        ) d
+        WHERE s.user_id = d.user_id AND s.food_name = d.food_name
+    ), {bump_version(VERSION_SCOPE, 'totals')}
+    SELECT COUNT(*) FROM corrected
+"""
+
+
+class Checkpoint:
+    """Последний обработанный (id, date) и счётчики; пишется атомарно через os.replace"""
+
+    def __init__(self, path):
+        self.path = path
+        self.last_id = 0
+        self.last_date = date_type.min
+        self.scanned = 0
+        self.updated = 0
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                state = json.load(f)
+            self.last_id, self.last_date = state['last_id'], date_type.fromisoformat(state['last_date'])
+            self.scanned, self.updated = state['scanned'], state['updated']
+
+    def save(self, last_id: int, last_date: date_type) -> None:
+        self.last_id, self.last_date = last_id, last_date
+        if not self.path:
+            return
+        state = {'last_id': last_id, 'last_date': last_date.isoformat(), 'scanned': self.scanned, 'updated': self.updated}
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(self.path + '.tmp', self.path)
+
+
+class RateLimiter:
+    def __init__(self, rows_per_second: float):
+        self.rows_per_second = rows_per_second
+        self.started = time.monotonic()
+        self.rows = 0
+
+    def wait(self, rows: int) -> None:
+        self.rows += rows
+        if self.rows_per_second > 0:
+            ahead = self.rows / self.rows_per_second - (time.monotonic() - self.started)
+            if ahead > 0:
+                time.sleep(ahead)
+
+
+def backfill(conn, foods: dict, batch_size: int, checkpoint: Checkpoint, limiter: RateLimiter, dry_run: bool) -> None:
+    """Один проход по записям продуктов foods (название -> индекс в каталоге) в порядке (id, date)"""
+    started = reported = time.monotonic()
+    scanned_before = checkpoint.scanned
+    names = list(foods)
+    while True:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                SELECT_BATCH + ('' if dry_run else ' FOR UPDATE'),
+                (names, checkpoint.last_id, checkpoint.last_date, batch_size)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                conn.rollback()
+                break
+            fresh = calculate([foods[row[1]] for row in rows], [row[2] for row in rows]).tolist()
+            changed = [(row[0], row[7], *values) for row, values in zip(rows, fresh) if tuple(row[3:7]) != tuple(values)]
+            if changed and not dry_run:
+                execute_values(cursor, CORRECT_FOOD_LOG, changed, template='(%s, %s::date, %s::numeric, %s::numeric, %s::numeric, %s::numeric)', page_size=len(changed))
+                checkpoint.updated += cursor.fetchone()[0]
+            elif changed:
+                checkpoint.updated += len(changed)
+        conn.commit()
+        checkpoint.scanned += len(rows)
+        checkpoint.save(rows[-1][0], rows[-1][7])
+        limiter.wait(len(rows))
+
+        if time.monotonic() - reported >= REPORT_EVERY:
+            reported = time.monotonic()
+            print(f'id {rows[-1][0]}: {progress(checkpoint, scanned_before, started)}', flush=True)
+    print(f'Готово: {progress(checkpoint, scanned_before, started)}')
+
+
+def progress(checkpoint: Checkpoint, scanned_before: int, started: float) -> str:
+    rate = (checkpoint.scanned - scanned_before) / max(time.monotonic() - started, 1e-9)
+    return f'просмотрено {checkpoint.scanned}, исправлено {checkpoint.updated}, {rate:,.0f} строк/с'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Пересчёт КБЖУ в food_log по текущему каталогу')
+    parser.add_argument('--foods', nargs='*', help='названия исправленных продуктов; по умолчанию весь каталог')
+    parser.add_argument('--batch', type=int, default=1000, help='строк в пачке')
+    parser.add_argument('--rate', type=float, default=5000, help='не больше строк в секунду, 0 — без ограничения')
+    parser.add_argument('--checkpoint', default='backfill.checkpoint.json', help='файл для продолжения после остановки')
+    parser.add_argument('--dry-run', action='store_true', help='ничего не записывать, только посчитать строки, которые изменятся')
+    args = parser.parse_args()
+
+    dsn = os.environ.get('DATABASE_URL')
+    if not dsn:
+        sys.exit('Укажите DATABASE_URL')
+
+    catalogue = get_catalogue()
+    names = sorted(set(args.foods) if args.foods else catalogue.names())
+    unknown = [name for name in names if catalogue.find(name) is None]
+    if unknown:
+        sys.exit(f'Нет в каталоге: {", ".join(unknown)}')
+
+    checkpoint = Checkpoint(None if args.dry_run else args.checkpoint)
+    conn = psycopg2.connect(dsn)
+    if args.dry_run:
+        conn.set_session(readonly=True)
+    backfill(conn, {name: catalogue.find(name) for name in names}, args.batch, checkpoint, RateLimiter(args.rate), args.dry_run)
+    conn.close()
+    if checkpoint.path and os.path.exists(checkpoint.path):
+        os.remove(checkpoint.path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Массовый импорт и экспорт истории: CSV или JSONL.
+
+Импорт разбирает тело построчно генератором и грузит строки в таблицу через
+COPY FROM STDIN пачками по COPY_CHUNK_ROWS, так что в памяти держится одна пачка.
+Экспорт отдаёт строки из Postgres так же потоком: CSV через COPY TO STDOUT,
+JSONL через серверный курсор.
+"""
+import csv
+import io
+import json
+import os
+import re
+from runtime import HttpError
+
+COPY_CHUNK_ROWS = int(os.environ.get('IMPORT_COPY_CHUNK_ROWS', 5000))
+EXPORT_FETCH_ROWS = int(os.environ.get('EXPORT_FETCH_ROWS', 5000))
+MAX_IMPORT_ROWS = int(os.environ.get('MAX_IMPORT_ROWS', 200_000))
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8'
+}
+
+
+def request_format(request, default: str = 'csv') -> str:
+    """Формат из параметра format или из Content-Type тела"""
+    fmt = request.params.get('format')
+    if not fmt:
+        content_type = request.headers.get('content-type', '')
+        fmt = 'jsonl' if 'ndjson' in content_type or 'jsonl' in content_type else default
+    if fmt not in FORMATS:
+        raise HttpError(400, 'format должен быть csv или jsonl')
+    return fmt
+
+
+def read_records(text: str, fmt: str):
+    """(номер строки, dict) для каждой непустой записи тела"""
+    stream = io.StringIO(text)
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise HttpError(400, f'Строка {line_number}: некорректный JSON')
+        if not isinstance(record, dict):
+            raise HttpError(400, f'Строка {line_number}: ожидается JSON-объект')
+        yield line_number, record
+
+
+_COPY_SPECIAL = re.compile(r'[\\\t\n\r]')
+_COPY_ESCAPES = {'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'}
+
+
+def _copy_value(value) -> str:
+    """Значение в текстовом формате COPY: NULL как \\N, спецсимволы строк экранируются"""
+    if value is None:
+        return '\\N'
+    if type(value) is not str:
+        return str(value)
+    if _COPY_SPECIAL.search(value) is None:
+        return value
+    return _COPY_SPECIAL.sub(lambda match: _COPY_ESCAPES[match.group()], value)
+
+
+def copy_rows(cursor, table: str, columns: tuple, rows, chunk_rows: int = COPY_CHUNK_ROWS) -> int:
+    """Загружает кортежи rows через COPY пачками по chunk_rows, возвращает число строк"""
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    buffer = io.StringIO()
+    pending = 0
+    total = 0
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(value) for value in row))
+        buffer.write('\n')
+        pending += 1
+        if pending == chunk_rows:
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+            total += pending
+            buffer = io.StringIO()
+            pending = 0
+        if total + pending > MAX_IMPORT_ROWS:
+            raise HttpError(400, f'Не больше {MAX_IMPORT_ROWS} строк за один импорт')
+    if pending:
+        buffer.seek(0)
+        cursor.copy_expert(statement, buffer)
+        total += pending
+    return total
+
+
+def export_body(conn, query: str, params, fmt: str) -> str:
+    """Результат SELECT в CSV с заголовком или в JSONL, по одной записи на строку"""
+    out = io.StringIO()
+    if fmt == 'csv':
+        with conn.cursor() as cursor:
+            cursor.copy_expert(f"COPY ({cursor.mogrify(query, params).decode()}) TO STDOUT WITH (FORMAT csv, HEADER)", out)
+        return out.getvalue()
+
+    with conn.cursor(name='export') as cursor:
+        cursor.itersize = EXPORT_FETCH_ROWS
+        cursor.execute(f"SELECT row_to_json(export)::text FROM ({query}) export", params)
+        for (line,) in cursor:
+            out.write(line)
+            out.write('\n')
+    return out.getvalue()
@@ -0,0 +1,180 @@
+"""Кэш ответов по ключу (например goals:<user_id>) в памяти контейнера: TTL + LRU с ограничением памяти.
+
+Запись в базу сбрасывает ключ через invalidate(). Если задан CACHE_REDIS_URL, за локальным
+слоем стоит общий Redis: тёплые контейнеры делят промахи, а сброс виден всем контейнерам
+не позже чем через CACHE_LOCAL_TTL секунд. Без Redis чужой контейнер может отдавать
+устаревший ответ до CACHE_TTL секунд.
+
+Настройки: CACHE_TTL, CACHE_LOCAL_TTL, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_REDIS_URL.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from runtime import conditional_response, etag_matches, not_modified, raw_response
+
+CACHE_TTL = float(os.environ.get('CACHE_TTL', 60))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1000))
+CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', 8 * 1024 * 1024))
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+CACHE_LOCAL_TTL = float(os.environ.get('CACHE_LOCAL_TTL', 5 if CACHE_REDIS_URL else CACHE_TTL))
+
+
+class LocalCache:
+    """LRU по числу записей и суммарной длине значений; записи живут ttl секунд"""
+
+    def __init__(self, ttl: float = CACHE_LOCAL_TTL, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        if self.ttl <= 0 or len(value) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self.size_bytes += len(value)
+            while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= len(entry[0])
+
+
+class RedisBackend:
+    """Общий слой в Redis; недоступный Redis считается промахом, а не ошибкой запроса"""
+
+    def __init__(self, url: str, ttl: float = CACHE_TTL, prefix: str = 'cache:'):
+        import redis
+        self._errors = redis.RedisError
+        self._client = redis.Redis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.05, decode_responses=True)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: str):
+        try:
+            return self._client.get(self.prefix + key)
+        except self._errors:
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        try:
+            self._client.set(self.prefix + key, value, ex=max(1, int(self.ttl)))
+        except self._errors:
+            pass
+
+    def delete(self, key: str) -> None:
+        try:
+            self._client.delete(self.prefix + key)
+        except self._errors:
+            pass
+
+
+class ResponseCache:
+    def __init__(self, local: LocalCache, shared=None):
+        self.local = local
+        self.shared = shared
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> tuple:
+        """(значение или None, откуда: local | shared | miss)"""
+        value = self.local.get(key)
+        if value is not None:
+            self.hits += 1
+            return value, 'local'
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.shared_hits += 1
+                self.local.set(key, value)
+                return value, 'shared'
+        self.misses += 1
+        return None, 'miss'
+
+    def set(self, key: str, value: str) -> None:
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+
+    def invalidate(self, key: str) -> None:
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def stats(self) -> str:
+        return (f'hits={self.hits}; shared_hits={self.shared_hits}; misses={self.misses}; '
+                f'entries={len(self.local)}; bytes={self.local.size_bytes}; evictions={self.local.evictions}')
+
+
+def shared_backend_from_env():
+    """RedisBackend по CACHE_REDIS_URL; без пакета redis — только локальный слой и строка в лог, а не падение импорта"""
+    if not CACHE_REDIS_URL:
+        return None
+    try:
+        return RedisBackend(CACHE_REDIS_URL)
+    except ImportError:
+        print('CACHE_REDIS_URL задан, но пакет redis не установлен: кэш работает только в памяти контейнера', flush=True)
+        return None
+
+
+cache = ResponseCache(LocalCache(), shared_backend_from_env())
+
+
+def use_shared_backend(backend) -> None:
+    """Подключает общий слой с методами get/set/delete (Redis или его замену)"""
+    cache.shared = backend
+
+
+def cached_response(key: str, load, request=None, etag=None) -> dict:
+    """200-ответ из кэша или из load() -> JSON-строка тела; в заголовках X-Cache и X-Cache-Stats.
+
+    С etag() -> ETag ответ условный: ETag хранится в кэше рядом с телом, и совпавший
+    If-None-Match даёт 304 без запроса к базе, а при промахе — без чтения строк.
+    """
+    entry, source = cache.get(key)
+    if entry is None:
+        tag = etag() if etag is not None else ''
+        if tag and etag_matches(request.headers.get('if-none-match'), tag):
+            return not_modified(tag)
+        entry = f'{tag}\n{load()}'
+        cache.set(key, entry)
+
+    tag, _, body = entry.partition('\n')
+    headers = {
+        'X-Cache': source,
+        'X-Cache-Stats': cache.stats(),
+        'Access-Control-Expose-Headers': 'X-Cache, X-Cache-Stats'
+    }
+    if not tag:
+        return raw_response(200, body, headers)
+    return conditional_response(request, tag, lambda: raw_response(200, body, headers))
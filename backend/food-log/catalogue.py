@@ -0,0 +1,183 @@
+"""Компактный каталог продуктов: колонки КБЖУ float64 и таблица строк с названиями.
+
+Собирается из CSV или JSON командой
+
+    python catalogue.py data/foods.csv data/foods.bin
+
+и читается функцией через mmap, без загрузки всего каталога в память процесса.
+
+Формат файла (little-endian, как на x86-64, где работают функции):
+    заголовок    MAGIC, версия, число продуктов и размеры таблиц ниже
+    4 колонки    calories, protein, fats, carbs — по count значений float64
+    смещения     count + 1 значений uint32 в таблице строк
+    порядок      count индексов uint32, отсортированных по названию (для поиска по имени)
+    поиск        таблицы FoodSearchIndex: смещения нормализованных названий, их порядок,
+                 смещения слов и номера их названий, смещения триграмм, границы и номера
+                 их списков названий — всё uint32
+    строки       названия, нормализованные названия, слова и триграммы в UTF-8 подряд
+
+Поисковый индекс строится при сборке, поэтому первый поиск в новом контейнере только
+открывает виды на mmap, а не разбирает все названия заново.
+"""
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from food_search import FoodSearchIndex, Strings
+
+MAGIC = b'FCAT'
+VERSION = 2
+# MAGIC, версия, продуктов, байт названий, байт нормализованных названий, слов, байт слов,
+# триграмм, байт триграмм, номеров в списках триграмм
+HEADER = struct.Struct('<4sIIIIIIIII')
+COLUMNS = ('calories', 'protein', 'fats', 'carbs')
+CATALOGUE_PATH = os.environ.get('FOOD_CATALOGUE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'foods.bin'))
+
+
+def _read_source(path: str) -> list:
+    if path.endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return [{'name': name, **nutrition} for name, nutrition in data.items()]
+        return data
+
+    with open(path, encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def compile_catalogue(source_path: str, target_path: str) -> int:
+    """Собирает бинарный каталог из CSV/JSON, возвращает число продуктов"""
+    foods = []
+    seen = set()
+    for row in _read_source(source_path):
+        name = row['name'].strip()
+        if not name or name in seen:
+            raise ValueError(f'Пустое или повторяющееся название продукта: {name!r}')
+        seen.add(name)
+        foods.append((name, [float(row[column]) for column in COLUMNS]))
+
+    encoded = [name.encode('utf-8') for name, _ in foods]
+    offsets = array('I', [0])
+    for name in encoded:
+        offsets.append(offsets[-1] + len(name))
+    order = array('I', sorted(range(len(encoded)), key=encoded.__getitem__))
+    index = FoodSearchIndex.build([name for name, _ in foods])
+    normalized, words, grams = Strings.pack(index.normalized), Strings.pack(index.words), Strings.pack(index.grams)
+
+    with open(target_path, 'wb') as f:
+        f.write(HEADER.pack(
+            MAGIC, VERSION, len(foods), offsets[-1], len(normalized.blob), len(words), len(words.blob),
+            len(grams), len(grams.blob), len(index.gram_ids)
+        ))
+        for column in range(len(COLUMNS)):
+            f.write(array('d', [nutrition[column] for _, nutrition in foods]).tobytes())
+        for table in (offsets, order, normalized.offsets, index.name_ids, words.offsets, index.word_ids,
+                      grams.offsets, index.gram_offsets, index.gram_ids):
+            f.write(table.tobytes())
+        for blob in (b''.join(encoded), normalized.blob, words.blob, grams.blob):
+            f.write(blob)
+    return len(foods)
+
+
+def _number(value: float):
+    return int(value) if value.is_integer() else value
+
+
+class Catalogue:
+    """Каталог продуктов поверх mmap; названия и значения читаются по требованию"""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, names_size, normalized_size, words, words_size, grams, grams_size, postings = \
+            HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'Неподдерживаемый формат каталога: {path}')
+
+        view = memoryview(self._mmap)
+        position = HEADER.size
+
+        def take(kind: str, size: int):
+            nonlocal position
+            part = view[position:position + struct.calcsize(kind) * size].cast(kind)
+            position += part.nbytes
+            return part
+
+        self.count = count
+        self.columns = {column: take('d', count) for column in COLUMNS}
+        self._offsets = take('I', count + 1)
+        self._order = take('I', count)
+        self._search = [take('I', size) for size in (count + 1, count, words + 1, words, grams + 1, grams + 1, postings)]
+        self._names_start = position
+        self._names_end = position + names_size
+        position += names_size
+        self._search_blobs = [take('B', size) for size in (normalized_size, words_size, grams_size)]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _name_bytes(self, index: int) -> bytes:
+        start = self._names_start + self._offsets[index]
+        return self._mmap[start:self._names_start + self._offsets[index + 1]]
+
+    def name(self, index: int) -> str:
+        return self._name_bytes(index).decode('utf-8')
+
+    def names(self) -> list:
+        blob = self._mmap[self._names_start:self._names_end]
+        return [blob[self._offsets[i]:self._offsets[i + 1]].decode('utf-8') for i in range(self.count)]
+
+    def search_index(self) -> FoodSearchIndex:
+        """Поисковый индекс, собранный compile_catalogue, — виды на mmap без копирования"""
+        normalized_offsets, name_ids, word_offsets, word_ids, gram_offsets, posting_offsets, postings = self._search
+        normalized, words, grams = self._search_blobs
+        return FoodSearchIndex(
+            Strings(normalized, normalized_offsets), name_ids,
+            Strings(words, word_offsets), word_ids,
+            Strings(grams, gram_offsets), posting_offsets, postings
+        )
+
+    def find(self, name: str):
+        """Индекс продукта по точному названию или None"""
+        target = name.encode('utf-8')
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._name_bytes(self._order[middle]) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self._name_bytes(self._order[low]) == target:
+            return self._order[low]
+        return None
+
+    def nutrition(self, index: int) -> dict:
+        return {column: _number(self.columns[column][index]) for column in COLUMNS}
+
+    def nutrition_matrix(self):
+        """Матрица продукты × COLUMNS в numpy — вид на mmap без копирования"""
+        import numpy as np
+        columns = np.frombuffer(self._mmap, dtype='<f8', count=len(COLUMNS) * self.count, offset=HEADER.size)
+        return columns.reshape(len(COLUMNS), self.count).T
+
+
+_catalogue = None
+
+
+def get_catalogue() -> Catalogue:
+    global _catalogue
+    if _catalogue is None:
+        _catalogue = Catalogue(CATALOGUE_PATH)
+    return _catalogue
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit('Использование: python catalogue.py <foods.csv|foods.json> <foods.bin>')
+    print(f'Собрано продуктов: {compile_catalogue(sys.argv[1], sys.argv[2])}')
@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+import psycopg2
+from psycopg2 import extensions
+
+POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '4'))
+POOL_MAX_IDLE = float(os.environ.get('DB_POOL_MAX_IDLE', '300'))
+POOL_HEALTH_CHECK_AFTER = float(os.environ.get('DB_POOL_HEALTH_CHECK_AFTER', '30'))
+POOL_ACQUIRE_TIMEOUT = float(os.environ.get('DB_POOL_ACQUIRE_TIMEOUT', '10'))
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+class PooledConnection(extensions.connection):
+    """Соединение пула. reused — выдано из простаивающих, а не открыто заново;
+    committed — после выдачи уже был commit, и повторять запрос на другом соединении нельзя"""
+
+    reused = False
+    committed = False
+
+    def commit(self):
+        super().commit()
+        self.committed = True
+
+
+def is_stale(conn) -> bool:
+    """Соединение из пула умерло, пока простаивало (рестарт Postgres, failover, таймаут простоя
+    на сервере), и на нём ничего не закоммичено: запрос можно повторить на новом соединении"""
+    return conn.closed != 0 and getattr(conn, 'reused', False) and not getattr(conn, 'committed', False)
+
+
+class ConnectionPool:
+    """Пул соединений с Postgres, переживающий тёплые вызовы функции"""
+
+    def __init__(self, dsn: str, max_size: int = POOL_MAX_SIZE, max_idle: float = POOL_MAX_IDLE,
+                 health_check_after: float = POOL_HEALTH_CHECK_AFTER, acquire_timeout: float = POOL_ACQUIRE_TIMEOUT):
+        self.dsn = dsn
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+        self.acquire_timeout = acquire_timeout
+        self._idle = []
+        self._in_use = 0
+        self._lock = threading.Condition()
+
+    def acquire(self):
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._lock:
+            while True:
+                while self._idle:
+                    conn, released_at = self._idle.pop()
+                    idle_for = time.monotonic() - released_at
+                    if conn.closed or idle_for > self.max_idle:
+                        self._close(conn)
+                        continue
+                    if idle_for > self.health_check_after and not self._is_alive(conn):
+                        self._close(conn)
+                        continue
+                    conn.reused, conn.committed = True, False
+                    self._in_use += 1
+                    return conn
+
+                if self._in_use < self.max_size:
+                    self._in_use += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhausted('Нет свободных соединений с базой данных')
+                self._lock.wait(remaining)
+
+        try:
+            return psycopg2.connect(self.dsn, connection_factory=PooledConnection)
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+                self._lock.notify()
+            raise
+
+    def release(self, conn) -> None:
+        reusable = not conn.closed
+        if reusable and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                reusable = False
+
+        with self._lock:
+            self._in_use -= 1
+            if reusable:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._close(conn)
+            self._lock.notify()
+
+    def close_all(self) -> None:
+        with self._lock:
+            while self._idle:
+                self._close(self._idle.pop()[0])
+
+    def _is_alive(self, conn) -> bool:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    @staticmethod
+    def _close(conn) -> None:
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+
+_pool = None
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool(os.environ.get('DATABASE_URL'))
+    return _pool
@@ -0,0 +1,209 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+import math
+from operator import itemgetter
+import re
+
+WORD_PATTERN = re.compile(r'\w+')
+SUBSTRING_MIN_QUERY_LENGTH = 3
+FUZZY_MIN_QUERY_LENGTH = 4
+FUZZY_MIN_COVERAGE = 0.5
+# На 100 000 названий редким триграммам запроса с опечаткой («тварог», «курица грутка»)
+# нужно до ~10 000 номеров; бюджет с запасом, чтобы граница ниже выполнялась
+FUZZY_MAX_POSTINGS = 50_000
+FUZZY_MAX_CANDIDATES = 200
+
+
+def normalize(text: str) -> str:
+    return text.lower().replace('ё', 'е').strip()
+
+
+def _grams(text: str, size: int) -> set:
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class Strings:
+    """Строки в UTF-8 подряд в blob, границы — в offsets (на одно значение больше, чем строк).
+
+    blob и offsets могут быть видами на mmap: строка копируется только при обращении к ней.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def pack(cls, strings: list) -> 'Strings':
+        offsets = array('I', [0])
+        for string in strings:
+            offsets.append(offsets[-1] + len(string))
+        return cls(b''.join(strings), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> bytes:
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]])
+
+
+class _Sorted:
+    """Ключи strings[ids[k]] в порядке ids — для bisect без отдельного списка ключей"""
+
+    def __init__(self, strings, ids):
+        self._strings = strings
+        self._ids = ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, position: int) -> bytes:
+        return self._strings[self._ids[position]]
+
+
+class FoodSearchIndex:
+    """Поисковый индекс по названиям продуктов.
+
+    Порядок выдачи: точное совпадение, начало названия, начало слова, подстрока,
+    затем похожие названия (опечатки) по совпадающим триграммам. Запросы короче
+    триграммы ищутся только по началу названия и слов: подстроку из одной-двух букв
+    пришлось бы искать перебором всего каталога.
+
+    Все таблицы — последовательности bytes в UTF-8 и массивы uint32, отсортированные
+    по bytes (порядок байт UTF-8 совпадает с порядком символов). build собирает их в
+    памяти, catalogue.py сохраняет их в foods.bin и открывает индекс прямо поверх mmap.
+    """
+
+    def __init__(self, normalized, name_ids, words, word_ids, grams, gram_offsets, gram_ids):
+        self.count = len(normalized)
+        self.normalized = normalized
+        self.name_ids = name_ids
+        self.words = words
+        self.word_ids = word_ids
+        self.grams = grams
+        self.gram_offsets = gram_offsets
+        self.gram_ids = gram_ids
+        self._name_keys = _Sorted(normalized, name_ids)
+
+    @classmethod
+    def build(cls, names: list) -> 'FoodSearchIndex':
+        normalized = [normalize(name).encode('utf-8') for name in names]
+        name_ids = array('I', sorted(range(len(normalized)), key=normalized.__getitem__))
+
+        words = []
+        postings = {}
+        for i, name in enumerate(normalized):
+            text = name.decode('utf-8')
+            for word in WORD_PATTERN.findall(text):
+                words.append((word.encode('utf-8'), i))
+            for gram in _grams(f' {text} ', 3):
+                postings.setdefault(gram.encode('utf-8'), []).append(i)
+        words.sort()
+
+        grams = sorted(postings)
+        gram_offsets = array('I', [0])
+        gram_ids = array('I')
+        for gram in grams:
+            gram_ids.extend(postings[gram])
+            gram_offsets.append(len(gram_ids))
+        return cls(
+            normalized, name_ids,
+            [word for word, _ in words], array('I', [i for _, i in words]),
+            grams, gram_offsets, gram_ids
+        )
+
+    def search(self, query: str, limit: int = 20) -> list:
+        """Возвращает индексы продуктов в порядке релевантности"""
+        query = normalize(query)
+        if not query:
+            return list(range(min(limit, self.count)))
+
+        found = []
+        seen = set()
+
+        def take(ids) -> bool:
+            for i in ids:
+                if i not in seen:
+                    seen.add(i)
+                    found.append(i)
+                    if len(found) >= limit:
+                        return True
+            return False
+
+        prefix = query.encode('utf-8')
+        if take(self._prefixed(self._name_keys, self.name_ids, prefix)):
+            return found
+        if take(self._prefixed(self.words, self.word_ids, prefix)) or len(query) < SUBSTRING_MIN_QUERY_LENGTH:
+            return found
+        if take(self._all_words(query)):
+            return found
+        if take(self._substring(query)):
+            return found
+        if len(query) >= FUZZY_MIN_QUERY_LENGTH:
+            take(self._similar(query))
+        return found
+
+    @staticmethod
+    def _prefixed(keys, ids, prefix: bytes):
+        # Ключи отсортированы, поэтому точное совпадение всегда идёт первым
+        position = bisect_left(keys, prefix)
+        while position < len(keys) and keys[position].startswith(prefix):
+            yield ids[position]
+            position += 1
+
+    def _all_words(self, query: str):
+        words = [word.encode('utf-8') for word in WORD_PATTERN.findall(query)]
+        if len(words) < 2:
+            return ()
+        ranges = []
+        for word in words:
+            # 0xff не встречается в UTF-8, поэтому word + b'\xff' больше любого слова с этим началом
+            start = bisect_left(self.words, word)
+            end = bisect_left(self.words, word + b'\xff', start)
+            ranges.append((end - start, start, end))
+        _, start, end = min(ranges)
+        candidates = sorted(set(self.word_ids[start:end]))
+        return (i for i in candidates if all(word in self.normalized[i] for word in words))
+
+    def _postings(self, gram: str):
+        """Номера названий с триграммой gram или None"""
+        key = gram.encode('utf-8')
+        position = bisect_left(self.grams, key)
+        if position == len(self.grams) or self.grams[position] != key:
+            return None
+        return self.gram_ids[self.gram_offsets[position]:self.gram_offsets[position + 1]]
+
+    def _substring(self, query: str):
+        needle = query.encode('utf-8')
+        lists = [self._postings(gram) for gram in _grams(query, 3)]
+        if not all(lists):
+            return ()
+        return (i for i in min(lists, key=len) if needle in self.normalized[i])
+
+    def _similar(self, query: str):
+        grams = _grams(f' {query} ', 3)
+        lists = sorted((ids for ids in map(self._postings, grams) if ids), key=len)
+
+        # Название с нужным покрытием обязано содержать хотя бы одну из самых
+        # редких триграмм запроса, поэтому кандидатов собираем только по ним.
+        # Граница верна, только если учтены все эти списки: без любого из них кандидаты
+        # ранжируются по неполным счётчикам и нужное название может не попасть в
+        # FUZZY_MAX_CANDIDATES. FUZZY_MAX_POSTINGS лишь ограничивает время на запросах,
+        # редкие триграммы которых встречаются в большей части каталога
+        needed = math.ceil(len(grams) * FUZZY_MIN_COVERAGE)
+        counts = Counter()
+        budget = FUZZY_MAX_POSTINGS
+        for ids in lists[:len(grams) - needed + 1]:
+            if len(ids) > budget:
+                break
+            budget -= len(ids)
+            counts.update(ids)
+
+        scored = []
+        for i, _ in sorted(counts.items(), key=itemgetter(1), reverse=True)[:FUZZY_MAX_CANDIDATES]:
+            name = f' {self.normalized[i].decode("utf-8")} '
+            shared = sum(1 for gram in grams if gram in name)
+            if shared >= needed:
+                scored.append((-shared, len(name), i))
+        scored.sort()
+        return (i for _, _, i in scored)
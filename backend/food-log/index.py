@@ -1,345 +1,690 @@
 import json
-import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from datetime import datetime
-
-FOOD_DATABASE = {
-    "Курица грудка": {"calories": 165, "protein": 31, "fats": 3.6, "carbs": 0},
-    "Курица бедро": {"calories": 211, "protein": 26, "fats": 11, "carbs": 0},
-    "Говядина постная": {"calories": 250, "protein": 26, "fats": 15, "carbs": 0},
-    "Свинина": {"calories": 242, "protein": 27, "fats": 14, "carbs": 0},
-    "Индейка": {"calories": 189, "protein": 29, "fats": 7, "carbs": 0},
-    "Лосось": {"calories": 208, "protein": 20, "fats": 13, "carbs": 0},
-    "Тунец": {"calories": 144, "protein": 23, "fats": 5, "carbs": 0},
-    "Треска": {"calories": 82, "protein": 18, "fats": 0.7, "carbs": 0},
-    "Креветки": {"calories": 99, "protein": 24, "fats": 0.3, "carbs": 0.2},
-    "Яйцо куриное": {"calories": 157, "protein": 13, "fats": 11, "carbs": 1.1},
-    "Яичный белок": {"calories": 52, "protein": 11, "fats": 0.2, "carbs": 0.7},
-    "Творог 0%": {"calories": 71, "protein": 16, "fats": 0.2, "carbs": 1.3},
-    "Творог 5%": {"calories": 121, "protein": 17, "fats": 5, "carbs": 1.8},
-    "Творог 9%": {"calories": 159, "protein": 16, "fats": 9, "carbs": 2},
-    "Молоко 1.5%": {"calories": 44, "protein": 2.8, "fats": 1.5, "carbs": 4.7},
-    "Молоко 3.2%": {"calories": 60, "protein": 2.9, "fats": 3.2, "carbs": 4.7},
-    "Кефир 1%": {"calories": 40, "protein": 3, "fats": 1, "carbs": 4},
-    "Йогурт натуральный": {"calories": 66, "protein": 5, "fats": 3.2, "carbs": 3.5},
-    "Греческий йогурт": {"calories": 97, "protein": 9, "fats": 5, "carbs": 4},
-    "Сыр моцарелла": {"calories": 280, "protein": 28, "fats": 17, "carbs": 3},
-    "Сыр чеддер": {"calories": 402, "protein": 25, "fats": 33, "carbs": 1.3},
-    "Сыр фета": {"calories": 264, "protein": 14, "fats": 21, "carbs": 4},
-    "Рис белый": {"calories": 130, "protein": 2.7, "fats": 0.3, "carbs": 28},
-    "Рис бурый": {"calories": 111, "protein": 2.6, "fats": 0.9, "carbs": 23},
-    "Гречка": {"calories": 123, "protein": 4.5, "fats": 1.2, "carbs": 25},
-    "Овсянка": {"calories": 68, "protein": 2.4, "fats": 1.4, "carbs": 12},
-    "Макароны": {"calories": 158, "protein": 5.8, "fats": 0.9, "carbs": 31},
-    "Хлеб белый": {"calories": 265, "protein": 8, "fats": 3, "carbs": 49},
-    "Хлеб ржаной": {"calories": 259, "protein": 8, "fats": 1, "carbs": 49},
-    "Хлеб цельнозерновой": {"calories": 247, "protein": 13, "fats": 4, "carbs": 41},
-    "Батон": {"calories": 260, "protein": 7.5, "fats": 2.9, "carbs": 51},
-    "Картофель": {"calories": 77, "protein": 2, "fats": 0.1, "carbs": 17},
-    "Батат": {"calories": 86, "protein": 1.6, "fats": 0.1, "carbs": 20},
-    "Киноа": {"calories": 120, "protein": 4.4, "fats": 1.9, "carbs": 21},
-    "Булгур": {"calories": 83, "protein": 3, "fats": 0.2, "carbs": 19},
-    "Банан": {"calories": 89, "protein": 1.1, "fats": 0.3, "carbs": 23},
-    "Яблоко": {"calories": 52, "protein": 0.3, "fats": 0.2, "carbs": 14},
-    "Апельсин": {"calories": 47, "protein": 0.9, "fats": 0.1, "carbs": 12},
-    "Груша": {"calories": 57, "protein": 0.4, "fats": 0.1, "carbs": 15},
-    "Виноград": {"calories": 69, "protein": 0.7, "fats": 0.2, "carbs": 18},
-    "Клубника": {"calories": 32, "protein": 0.7, "fats": 0.3, "carbs": 8},
-    "Черника": {"calories": 57, "protein": 0.7, "fats": 0.3, "carbs": 14},
-    "Малина": {"calories": 52, "protein": 1.2, "fats": 0.7, "carbs": 12},
-    "Арбуз": {"calories": 30, "protein": 0.6, "fats": 0.2, "carbs": 8},
-    "Дыня": {"calories": 34, "protein": 0.8, "fats": 0.2, "carbs": 8},
-    "Авокадо": {"calories": 160, "protein": 2, "fats": 15, "carbs": 9},
-    "Киви": {"calories": 61, "protein": 1.1, "fats": 0.5, "carbs": 15},
-    "Манго": {"calories": 60, "protein": 0.8, "fats": 0.4, "carbs": 15},
-    "Ананас": {"calories": 50, "protein": 0.5, "fats": 0.1, "carbs": 13},
-    "Персик": {"calories": 39, "protein": 0.9, "fats": 0.3, "carbs": 10},
-    "Абрикос": {"calories": 48, "protein": 1.4, "fats": 0.4, "carbs": 11},
-    "Брокколи": {"calories": 34, "protein": 2.8, "fats": 0.4, "carbs": 7},
-    "Цветная капуста": {"calories": 25, "protein": 1.9, "fats": 0.3, "carbs": 5},
-    "Капуста белокочанная": {"calories": 25, "protein": 1.3, "fats": 0.1, "carbs": 6},
-    "Морковь": {"calories": 41, "protein": 0.9, "fats": 0.2, "carbs": 10},
-    "Огурец": {"calories": 15, "protein": 0.7, "fats": 0.1, "carbs": 3.6},
-    "Помидор": {"calories": 18, "protein": 0.9, "fats": 0.2, "carbs": 3.9},
-    "Перец болгарский": {"calories": 27, "protein": 1, "fats": 0.3, "carbs": 6},
-    "Салат листовой": {"calories": 15, "protein": 1.4, "fats": 0.2, "carbs": 3},
-    "Шпинат": {"calories": 23, "protein": 2.9, "fats": 0.4, "carbs": 3.6},
-    "Кабачок": {"calories": 17, "protein": 0.6, "fats": 0.3, "carbs": 4.6},
-    "Баклажан": {"calories": 25, "protein": 1.2, "fats": 0.1, "carbs": 5.9},
-    "Лук репчатый": {"calories": 40, "protein": 1.1, "fats": 0.1, "carbs": 10},
-    "Чеснок": {"calories": 149, "protein": 6.5, "fats": 0.5, "carbs": 33},
-    "Свекла": {"calories": 43, "protein": 1.6, "fats": 0.2, "carbs": 10},
-    "Тыква": {"calories": 26, "protein": 1, "fats": 0.1, "carbs": 6.5},
-    "Спаржа": {"calories": 20, "protein": 2.2, "fats": 0.1, "carbs": 3.9},
-    "Орехи грецкие": {"calories": 654, "protein": 15, "fats": 65, "carbs": 14},
-    "Миндаль": {"calories": 579, "protein": 21, "fats": 50, "carbs": 22},
-    "Кешью": {"calories": 553, "protein": 18, "fats": 44, "carbs": 30},
-    "Арахис": {"calories": 567, "protein": 26, "fats": 49, "carbs": 16},
-    "Фундук": {"calories": 628, "protein": 15, "fats": 61, "carbs": 17},
-    "Семена подсолнечника": {"calories": 584, "protein": 21, "fats": 52, "carbs": 20},
-    "Семена тыквы": {"calories": 559, "protein": 30, "fats": 49, "carbs": 11},
-    "Семена льна": {"calories": 534, "protein": 18, "fats": 42, "carbs": 29},
-    "Семена чиа": {"calories": 486, "protein": 17, "fats": 31, "carbs": 42},
-    "Арахисовая паста": {"calories": 588, "protein": 25, "fats": 50, "carbs": 20},
-    "Оливковое масло": {"calories": 884, "protein": 0, "fats": 100, "carbs": 0},
-    "Подсолнечное масло": {"calories": 884, "protein": 0, "fats": 100, "carbs": 0},
-    "Сливочное масло": {"calories": 717, "protein": 0.8, "fats": 81, "carbs": 0.8},
-    "Кокосовое масло": {"calories": 862, "protein": 0, "fats": 100, "carbs": 0},
-    "Мед": {"calories": 304, "protein": 0.3, "fats": 0, "carbs": 82},
-    "Сахар": {"calories": 387, "protein": 0, "fats": 0, "carbs": 100},
-    "Темный шоколад": {"calories": 546, "protein": 6, "fats": 31, "carbs": 63},
-    "Молочный шоколад": {"calories": 535, "protein": 8, "fats": 30, "carbs": 59},
-    "Протеиновый батончик": {"calories": 350, "protein": 20, "fats": 10, "carbs": 40},
-    "Протеиновый порошок": {"calories": 400, "protein": 80, "fats": 5, "carbs": 10},
-    "Чай без сахара": {"calories": 1, "protein": 0, "fats": 0, "carbs": 0.3},
-    "Кофе черный": {"calories": 2, "protein": 0.1, "fats": 0, "carbs": 0.5},
-    "Сок апельсиновый": {"calories": 45, "protein": 0.7, "fats": 0.2, "carbs": 10},
-    "Кола": {"calories": 42, "protein": 0, "fats": 0, "carbs": 10.6},
-    "Пицца пепперони": {"calories": 298, "protein": 12, "fats": 13, "carbs": 33},
-    "Бургер": {"calories": 295, "protein": 17, "fats": 14, "carbs": 24},
-    "Картофель фри": {"calories": 312, "protein": 3.4, "fats": 15, "carbs": 41},
-    "Круассан": {"calories": 406, "protein": 8, "fats": 21, "carbs": 46},
-    "Донат": {"calories": 452, "protein": 5, "fats": 25, "carbs": 51},
-    "Мороженое": {"calories": 207, "protein": 3.5, "fats": 11, "carbs": 24},
-    "Пельмени": {"calories": 275, "protein": 12, "fats": 15, "carbs": 23},
-    "Блины": {"calories": 227, "protein": 6, "fats": 10, "carbs": 28},
-    "Сырники": {"calories": 220, "protein": 15, "fats": 10, "carbs": 18},
-    "Борщ": {"calories": 49, "protein": 1.6, "fats": 2.2, "carbs": 6.7},
+from psycopg2.extras import execute_values
+from datetime import date as date_type, datetime, timedelta
+from runtime import HttpError, Router, conditional_response, encode_body, error, raw_response, response
+from cache import cache, cached_response
+from versions import bump_version, data_version, make_etag
+from catalogue import get_catalogue
+from macros import calculate, calculate_one
+from food_search import WORD_PATTERN, FoodSearchIndex, normalize
+from bulk import FORMATS, copy_rows, export_body, read_records, request_format
+from partitions import ensure_partitions
+
+MAX_BATCH_ITEMS = 100
+# Даты записей дневника: раньше MIN_LOG_DATE и дальше MAX_FUTURE_DAYS вперёд — почти
+# наверняка опечатка или заглушка вроде 1970-01-01
+MIN_LOG_DATE = date_type(2000, 1, 1)
+MAX_FUTURE_DAYS = 366
+MAX_SUMMARY_DAYS = 366
+DEFAULT_SUGGESTIONS = 10
+MAX_SUGGESTIONS = 50
+# Сколько продуктов пользователя с наибольшим score читается для подсказок с префиксом
+SUGGEST_POOL = 100
+# Записи и цели питания: проценты в daily_summary зависят от целей
+VERSION_SCOPE = 'food_log'
+
+router = Router(allow_methods='GET, POST, PUT, DELETE, OPTIONS')
+
+# Записи добавляются и удаляются одним запросом вместе с пересчётом дневных итогов food_log_daily
+# и статистики продуктов пользователя user_food_stats для suggest_foods
+INSERT_FOOD_LOG = f"""
+    WITH inserted AS (
+        INSERT INTO food_log (user_id, date, food_name, grams, calories, protein, fats, carbs) VALUES %s
+        RETURNING id, user_id, date, food_name, grams, calories, protein, fats, carbs
+    ), foods AS (
+        INSERT INTO user_food_stats (user_id, food_name, entries, grams, calories, protein, fats, carbs, score)
+        SELECT user_id, food_name, COUNT(*), SUM(grams), SUM(calories), SUM(protein), SUM(fats), SUM(carbs), food_score_sum(food_score(date))
+        FROM inserted
+        GROUP BY user_id, food_name
+        ON CONFLICT (user_id, food_name) DO UPDATE SET
+            entries = user_food_stats.entries + EXCLUDED.entries,
+            grams = user_food_stats.grams + EXCLUDED.grams,
+            calories = user_food_stats.calories + EXCLUDED.calories,
+            protein = user_food_stats.protein + EXCLUDED.protein,
+            fats = user_food_stats.fats + EXCLUDED.fats,
+            carbs = user_food_stats.carbs + EXCLUDED.carbs,
+            score = food_score_add(user_food_stats.score, EXCLUDED.score)
+    ), rollup AS (
+        INSERT INTO food_log_daily (user_id, date, entries, calories, protein, fats, carbs)
+        SELECT user_id, date, COUNT(*), SUM(calories), SUM(protein), SUM(fats), SUM(carbs)
+        FROM inserted
+        GROUP BY user_id, date
+        ON CONFLICT (user_id, date) DO UPDATE SET
+            entries = food_log_daily.entries + EXCLUDED.entries,
+            calories = food_log_daily.calories + EXCLUDED.calories,
+            protein = food_log_daily.protein + EXCLUDED.protein,
+            fats = food_log_daily.fats + EXCLUDED.fats,
+            carbs = food_log_daily.carbs + EXCLUDED.carbs
+    ), {bump_version(VERSION_SCOPE, 'inserted')}
+    SELECT id FROM inserted ORDER BY id
+"""
+
+DELETE_FOOD_LOG = f"""
+    WITH deleted AS (
+        DELETE FROM food_log WHERE id = %s AND user_id = COALESCE(%s, user_id) AND date = COALESCE(%s, date)
+        RETURNING user_id, date, food_name, grams, calories, protein, fats, carbs
+    ), foods AS (
+        UPDATE user_food_stats s SET
+            entries = s.entries - d.entries,
+            grams = s.grams - d.grams,
+            calories = s.calories - d.calories,
+            protein = s.protein - d.protein,
+            fats = s.fats - d.fats,
+            carbs = s.carbs - d.carbs,
+            score = CASE WHEN s.entries = d.entries THEN '-Infinity' ELSE food_score_sub(s.score, d.score) END
+        FROM (
+            SELECT user_id, food_name, COUNT(*) AS entries, SUM(grams) AS grams, SUM(calories) AS calories,
+                SUM(protein) AS protein, SUM(fats) AS fats, SUM(carbs) AS carbs, food_score_sum(food_score(date)) AS score
+            FROM deleted
+            GROUP BY user_id, food_name
+        ) d
+        WHERE s.user_id = d.user_id AND s.food_name = d.food_name
+    ), totals AS (
+        SELECT user_id, date, COUNT(*) AS entries, SUM(calories) AS calories, SUM(protein) AS protein, SUM(fats) AS fats, SUM(carbs) AS carbs
+        FROM deleted
+        GROUP BY user_id, date
+    ), {bump_version(VERSION_SCOPE, 'deleted')}
+    UPDATE food_log_daily SET
+        entries = food_log_daily.entries - totals.entries,
+        calories = food_log_daily.calories - totals.calories,
+        protein = food_log_daily.protein - totals.protein,
+        fats = food_log_daily.fats - totals.fats,
+        carbs = food_log_daily.carbs - totals.carbs
+    FROM totals
+    WHERE food_log_daily.user_id = totals.user_id AND food_log_daily.date = totals.date
+"""
+
+# Дневные итоги пересчитываются целиком по строкам food_log за перечисленные дни
+REFRESH_FOOD_LOG_DAILY = f"""
+    WITH fresh AS (
+        SELECT user_id, date, COUNT(*) AS entries, SUM(calories) AS calories, SUM(protein) AS protein, SUM(fats) AS fats, SUM(carbs) AS carbs
+        FROM food_log
+        WHERE user_id = %s AND date = ANY(%s::date[])
+        GROUP BY user_id, date
+    ), {bump_version(VERSION_SCOPE, 'fresh')}
+    INSERT INTO food_log_daily (user_id, date, entries, calories, protein, fats, carbs)
+    SELECT * FROM fresh
+    ON CONFLICT (user_id, date) DO UPDATE SET
+        entries = EXCLUDED.entries,
+        calories = EXCLUDED.calories,
+        protein = EXCLUDED.protein,
+        fats = EXCLUDED.fats,
+        carbs = EXCLUDED.carbs
+"""
+
+# После импорта статистика перечисленных продуктов пользователя пересчитывается по food_log целиком
+REFRESH_USER_FOOD_STATS = """
+    INSERT INTO user_food_stats (user_id, food_name, entries, grams, calories, protein, fats, carbs, score)
+    SELECT user_id, food_name, COUNT(*), SUM(grams), SUM(calories), SUM(protein), SUM(fats), SUM(carbs), food_score_sum(food_score(date))
+    FROM food_log
+    WHERE user_id = %s AND food_name = ANY(%s)
+    GROUP BY user_id, food_name
+    ON CONFLICT (user_id, food_name) DO UPDATE SET
+        entries = EXCLUDED.entries,
+        grams = EXCLUDED.grams,
+        calories = EXCLUDED.calories,
+        protein = EXCLUDED.protein,
+        fats = EXCLUDED.fats,
+        carbs = EXCLUDED.carbs,
+        score = EXCLUDED.score
+"""
+
+IMPORT_COLUMNS = ('user_id', 'date', 'food_name', 'grams', 'calories', 'protein', 'fats', 'carbs')
+MACRO_FIELDS = ('calories', 'protein', 'fats', 'carbs')
+IMPORT_MACRO_BATCH = 1000
+EXPORT_QUERY = """
+    SELECT date, food_name, grams, calories, protein, fats, carbs FROM food_log
+    WHERE user_id = %s AND date >= COALESCE(%s, '-infinity'::date) AND date <= COALESCE(%s, 'infinity'::date)
+    ORDER BY date, created_at, id
+"""
+
+
+def _timestamp_text(column: str) -> str:
+    """TIMESTAMP текстом, как str(datetime) в остальных ответах: без дробной части, если она нулевая"""
+    return (
+        f"to_char({column}, 'YYYY-MM-DD HH24:MI:SS') || "
+        f"CASE WHEN date_trunc('second', {column}) = {column} THEN '' ELSE to_char({column}, '.US') END"
+    )
+
+
+# Разделы dashboard: каждый — подзапрос, собирающий JSON в Postgres, поэтому весь ответ
+# получается одним запросом. Поля и их вид те же, что у get_goals, get_logs за день,
+# первой страницы training-log и списка purchases (NUMERIC — строкой)
+DASHBOARD_TRAINING_LOGS = 100
+DASHBOARD_RECENT_DAYS = 92
+# Последние тренировки сначала ищутся с training_from: без нижней границы даты план перебирает
+# все месячные секции training_log. Тот же запрос возвращает число найденных записей и первую
+# неделю истории из training_weekly_stats. Только если записей меньше DASHBOARD_TRAINING_LOGS,
+# а история начинается раньше training_from, отдельно перезапрашивается раздел training_logs
+# от первой недели — остальные разделы второй раз не читаются
+DASHBOARD_RECENT_TRAINING = f"""recent_training AS (
+    SELECT * FROM training_log WHERE user_id = %(user_id)s AND date >= %(training_from)s
+    ORDER BY date DESC, created_at DESC, id DESC LIMIT {DASHBOARD_TRAINING_LOGS}
+)"""
+DASHBOARD_SECTIONS = {
+    'goals': """(
+        SELECT json_build_object(
+            'calories_goal', calories_goal::text, 'protein_goal', protein_goal::text,
+            'fats_goal', fats_goal::text, 'carbs_goal', carbs_goal::text
+        )
+        FROM user_nutrition_goals WHERE user_id = %(user_id)s
+    )""",
+    'food_logs': f"""COALESCE((
+        SELECT json_agg(json_build_object(
+            'id', id, 'food_name', food_name, 'grams', grams::text, 'calories', calories::text,
+            'protein', protein::text, 'fats', fats::text, 'carbs', carbs::text, 'created_at', {_timestamp_text('created_at')}
+        ) ORDER BY created_at DESC)
+        FROM food_log WHERE user_id = %(user_id)s AND date = %(date)s
+    ), '[]')""",
+    'training_logs': f"""COALESCE((
+        SELECT json_agg(json_build_object(
+            'id', id, 'date', date, 'program_id', program_id, 'exercise_name', exercise_name, 'sets', sets,
+            'reps', reps, 'weight', weight::text, 'notes', notes, 'created_at', {_timestamp_text('created_at')}
+        ) ORDER BY date DESC, created_at DESC, id DESC)
+        FROM recent_training
+    ), '[]')""",
+    'purchases': f"""COALESCE((
+        SELECT json_agg(json_build_object(
+            'id', id, 'program_id', program_id, 'program_title', program_title, 'program_category', program_category,
+            'price', price, 'calculated_data', calculated_data, 'purchased_at', {_timestamp_text('purchased_at')}
+        ) ORDER BY purchased_at DESC)
+        FROM purchases WHERE user_id = %(user_id)s
+    ), '[]')""",
 }
 
+_search_index = None
+
+
+def get_search_index() -> FoodSearchIndex:
+    global _search_index
+    if _search_index is None:
+        _search_index = get_catalogue().search_index()
+    return _search_index
+
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+def parse_log_date(value, default=None) -> date_type:
+    """Дата новой записи или default, если она не указана; ValueError, если даты нет и нет default,
+    формат не ГГГГ-ММ-ДД или дата вне MIN_LOG_DATE .. сегодня + MAX_FUTURE_DAYS"""
+    if value in (None, '') and default is not None:
+        return default
+    date = date_type.fromisoformat(value) if isinstance(value, str) else None
+    if date is None or not MIN_LOG_DATE <= date <= date_type.today() + timedelta(days=MAX_FUTURE_DAYS):
+        raise ValueError(value)
+    return date
+
+
+LOG_DATE_RULE = f'в формате ГГГГ-ММ-ДД, не раньше {MIN_LOG_DATE.isoformat()} и не дальше года вперёд'
+
+
+@router.route('GET', 'search_food')
+def search_food(request) -> dict:
+    query = request.params.get('query', '')
+    results = []
+
+    catalogue = get_catalogue()
+
+    for i in get_search_index().search(query, limit=20):
+        nutrition = catalogue.nutrition(i)
+        results.append({
+            'name': catalogue.name(i),
+            'calories': nutrition['calories'],
+            'protein': nutrition['protein'],
+            'fats': nutrition['fats'],
+            'carbs': nutrition['carbs']
+        })
+
+    return response(200, {'foods': results})
+
+
+# Обычная порция — средний вес записи продукта, КБЖУ — средние на запись
+SUGGEST_FOODS = """
+    SELECT food_name, entries,
+        ROUND(grams / entries)::float8 AS grams,
+        ROUND(calories / entries, 1)::float8 AS calories,
+        ROUND(protein / entries, 1)::float8 AS protein,
+        ROUND(fats / entries, 1)::float8 AS fats,
+        ROUND(carbs / entries, 1)::float8 AS carbs
+    FROM user_food_stats
+    WHERE user_id = %s AND entries > 0
+    ORDER BY score DESC
+    LIMIT %s
+"""
+
+
+def _matches_prefix(name: str, prefix: str) -> bool:
+    name = normalize(name)
+    return name.startswith(prefix) or any(word.startswith(prefix) for word in WORD_PATTERN.findall(name))
+
+
+@router.route('GET', 'suggest_foods')
+def suggest_foods(request) -> dict:
+    """Недавние и частые продукты пользователя с обычной порцией и её КБЖУ.
+
+    С query остаются продукты, название или слово которых начинается с query, а после них
+    идут результаты search_food (КБЖУ на 100 г). Продукты, которых уже нет в каталоге, пропускаются.
+    """
+    params = request.params
+    user_id = request.authorize(params.get('user_id'))
+
+    if not user_id:
+        return error(400, 'user_id обязателен')
+
+    try:
+        limit = max(1, min(int(params.get('limit', DEFAULT_SUGGESTIONS)), MAX_SUGGESTIONS))
+    except ValueError:
+        return error(400, 'limit должен быть числом')
+
+    query = params.get('query', '')
+    prefix = normalize(query)
+    catalogue = get_catalogue()
+    # Строки читаются кортежами: словари RealDictCursor на сотню строк дороже самого запроса
+    cursor = request.conn.cursor()
+    cursor.execute(SUGGEST_FOODS, (user_id, SUGGEST_POOL))
+
+    foods = []
+    for name, entries, grams, calories, protein, fats, carbs in cursor.fetchall():
+        if catalogue.find(name) is None or (prefix and not _matches_prefix(name, prefix)):
+            continue
+        foods.append({'name': name, 'grams': grams, 'calories': calories, 'protein': protein, 'fats': fats, 'carbs': carbs, 'entries': entries})
+        if len(foods) == limit:
+            break
+
+    if prefix and len(foods) < limit:
+        seen = {food['name'] for food in foods}
+        for i in get_search_index().search(query, limit=limit + len(seen)):
+            name = catalogue.name(i)
+            if name in seen:
+                continue
+            foods.append({'name': name, 'grams': 100, **catalogue.nutrition(i), 'entries': 0})
+            if len(foods) == limit:
+                break
+
+    return response(200, {'foods': foods})
+
+
+@router.route('GET', 'get_goals')
+def get_goals(request) -> dict:
+    user_id = request.authorize(request.params.get('user_id'))
+
+    if not user_id:
+        return error(400, 'user_id обязателен')
+
+    def load() -> str:
+        cursor = request.cursor()
+        cursor.execute(
+            "SELECT calories_goal, protein_goal, fats_goal, carbs_goal FROM user_nutrition_goals WHERE user_id = %s",
+            (user_id,)
+        )
+        goals = cursor.fetchone()
+        return encode_body({'goals': dict(goals) if goals else None})
+
+    return cached_response(f'goals:{user_id}', load)
+
+
+@router.route('GET', 'daily_summary')
+def daily_summary(request) -> dict:
+    params = request.params
+    user_id = request.authorize(params.get('user_id'))
+
+    if not user_id:
+        return error(400, 'user_id обязателен')
+
+    try:
+        date_to = parse_date(params.get('to')) or date_type.today()
+        date_from = parse_date(params.get('from')) or date_to - timedelta(days=6)
+    except ValueError:
+        return error(400, 'Даты from и to должны быть в формате ГГГГ-ММ-ДД')
+
+    if date_from > date_to or (date_to - date_from).days >= MAX_SUMMARY_DAYS:
+        return error(400, f'Период должен быть не длиннее {MAX_SUMMARY_DAYS} дней')
+
+    version = data_version(request, user_id, VERSION_SCOPE)
+    return conditional_response(
+        request,
+        make_etag(VERSION_SCOPE, user_id, version, 'daily_summary', date_from, date_to),
+        lambda: daily_summary_response(request, user_id, date_from, date_to)
+    )
+
+
+def daily_summary_response(request, user_id, date_from, date_to) -> dict:
+    days = request.rows(
+        """
+        SELECT d.date, d.entries, d.calories, d.protein, d.fats, d.carbs,
+            ROUND(d.calories * 100 / NULLIF(g.calories_goal, 0), 1) AS calories_percent,
+            ROUND(d.protein * 100 / NULLIF(g.protein_goal, 0), 1) AS protein_percent,
+            ROUND(d.fats * 100 / NULLIF(g.fats_goal, 0), 1) AS fats_percent,
+            ROUND(d.carbs * 100 / NULLIF(g.carbs_goal, 0), 1) AS carbs_percent
+        FROM food_log_daily d
+        LEFT JOIN user_nutrition_goals g ON g.user_id = d.user_id
+        WHERE d.user_id = %s AND d.date BETWEEN %s AND %s AND d.entries > 0
+        ORDER BY d.date
+        """,
+        (user_id, date_from, date_to)
+    )
+
+    return response(200, {'days': days})
+
+
+@router.route('GET', 'get_logs', default=True)
+def get_logs(request) -> dict:
+    user_id = request.authorize(request.params.get('user_id'))
+    date = request.params.get('date')
+
+    if not user_id:
+        return error(400, 'user_id обязателен')
+
+    version = data_version(request, user_id, VERSION_SCOPE)
+    return conditional_response(
+        request,
+        make_etag(VERSION_SCOPE, user_id, version, 'get_logs', date),
+        lambda: logs_response(request, user_id, date)
+    )
+
+
+def logs_response(request, user_id, date) -> dict:
+    if date:
+        logs = request.rows(
+            "SELECT id, food_name, grams, calories, protein, fats, carbs, created_at FROM food_log WHERE user_id = %s AND date = %s ORDER BY created_at DESC",
+            (user_id, date)
+        )
+    else:
+        logs = request.rows(
+            "SELECT id, date, food_name, grams, calories, protein, fats, carbs, created_at FROM food_log WHERE user_id = %s ORDER BY date DESC, created_at DESC LIMIT 100",
+            (user_id,)
+        )
+
+    return response(200, {'logs': logs})
+
+
+@router.route('GET', 'export')
+def export_logs(request) -> dict:
+    params = request.params
+    user_id = request.authorize(params.get('user_id'))
+
+    if not user_id:
+        return error(400, 'user_id обязателен')
+
+    fmt = request_format(request)
+    try:
+        date_from = parse_date(params.get('from'))
+        date_to = parse_date(params.get('to'))
+    except ValueError:
+        return error(400, 'Даты from и to должны быть в формате ГГГГ-ММ-ДД')
+
+    version = data_version(request, user_id, VERSION_SCOPE)
+    return conditional_response(
+        request,
+        make_etag(VERSION_SCOPE, user_id, version, 'export', fmt, date_from, date_to),
+        lambda: raw_response(
+            200,
+            export_body(request.conn, EXPORT_QUERY, (user_id, date_from, date_to), fmt),
+            {'Content-Type': FORMATS[fmt], 'Content-Disposition': f'attachment; filename="food-log.{fmt}"'}
+        )
+    )
+
+
+@router.route('GET', 'dashboard')
+def dashboard(request) -> dict:
+    """Всё для открытия приложения одним вызовом: цели, питание за день, последние тренировки и покупки"""
+    params = request.params
+    user_id = request.authorize(params.get('user_id'))
+
+    if not user_id:
+        return error(400, 'user_id обязателен')
+
+    try:
+        date = parse_date(params.get('date')) or date_type.today()
+    except ValueError:
+        return error(400, 'Дата должна быть в формате ГГГГ-ММ-ДД')
+
+    fields = [field.strip() for field in params.get('fields', ','.join(DASHBOARD_SECTIONS)).split(',') if field.strip()]
+    unknown = [field for field in fields if field not in DASHBOARD_SECTIONS]
+    if not fields or unknown:
+        return error(400, f'fields — список из {", ".join(DASHBOARD_SECTIONS)}')
+
+    sections = ', '.join(f"'{field}', {DASHBOARD_SECTIONS[field]}" for field in dict.fromkeys(fields))
+    values = {'user_id': user_id, 'date': date, 'training_from': date_type.today() - timedelta(days=DASHBOARD_RECENT_DAYS)}
+    cursor = request.conn.cursor()
+    if 'training_logs' not in fields:
+        cursor.execute(f"SELECT json_build_object({sections})::text", values)
+        return raw_response(200, cursor.fetchone()[0])
+
+    cursor.execute(
+        f"WITH {DASHBOARD_RECENT_TRAINING} SELECT json_build_object({sections})::text, (SELECT COUNT(*) FROM recent_training), "
+        "(SELECT MIN(week_start) FROM training_weekly_stats WHERE user_id = %(user_id)s)",
+        values
+    )
+    body, found, first_week = cursor.fetchone()
+    if found < DASHBOARD_TRAINING_LOGS and first_week is not None and first_week < values['training_from']:
+        cursor.execute(
+            f"WITH {DASHBOARD_RECENT_TRAINING} SELECT {DASHBOARD_SECTIONS['training_logs']}::text",
+            {**values, 'training_from': first_week}
+        )
+        dashboard = json.loads(body)
+        dashboard['training_logs'] = json.loads(cursor.fetchone()[0])
+        body = encode_body(dashboard)
+
+    return raw_response(200, body)
+
+
+@router.route('POST', 'set_goals')
+def set_goals(request) -> dict:
+    body = request.body
+    user_id = request.authorize(body.get('user_id'))
+    calories_goal = body.get('calories_goal')
+    protein_goal = body.get('protein_goal')
+    fats_goal = body.get('fats_goal')
+    carbs_goal = body.get('carbs_goal')
+
+    if not all([user_id, calories_goal, protein_goal, fats_goal, carbs_goal]):
+        return error(400, 'Все поля обязательны')
+
+    cursor = request.cursor()
+    cursor.execute(
+        f"""
+        WITH goals AS (
+            INSERT INTO user_nutrition_goals (user_id, calories_goal, protein_goal, fats_goal, carbs_goal)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (user_id) DO UPDATE SET
+                calories_goal = EXCLUDED.calories_goal,
+                protein_goal = EXCLUDED.protein_goal,
+                fats_goal = EXCLUDED.fats_goal,
+                carbs_goal = EXCLUDED.carbs_goal,
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING user_id
+        ), {bump_version(VERSION_SCOPE, 'goals')}
+        SELECT user_id FROM goals
+        """,
+        (user_id, calories_goal, protein_goal, fats_goal, carbs_goal)
+    )
+    request.conn.commit()
+    cache.invalidate(f'goals:{user_id}')
+
+    return response(200, {'success': True})
+
+
+@router.route('POST', 'add_foods')
+def add_foods(request) -> dict:
+    body = request.body
+    user_id = request.authorize(body.get('user_id'))
+    items = body.get('items')
+
+    if not user_id or not isinstance(items, list) or not items:
+        return error(400, 'user_id и items обязательны')
+
+    if len(items) > MAX_BATCH_ITEMS:
+        return error(400, f'Не больше {MAX_BATCH_ITEMS} продуктов за раз')
+
+    catalogue = get_catalogue()
+    rows = []
+    indices = []
+
+    for item in items:
+        food_name = item.get('food_name', '') if isinstance(item, dict) else ''
+        food_index = catalogue.find(food_name) if food_name else None
+        if food_index is None:
+            return error(400, f'Продукт не найден в базе: {food_name}')
+
+        grams = item.get('grams', 100)
+        if isinstance(grams, bool) or not isinstance(grams, (int, float)) or grams <= 0:
+            return error(400, f'Некорректный вес продукта: {food_name}')
+
+        try:
+            date = parse_log_date(item.get('date'), date_type.today())
+        except (ValueError, TypeError):
+            return error(400, f'Дата продукта {food_name} должна быть {LOG_DATE_RULE}')
+
+        rows.append((user_id, date, food_name, grams))
+        indices.append(food_index)
+
+    macros = calculate(indices, [row[3] for row in rows]).tolist()
+    cursor = request.cursor()
+    ensure_partitions(cursor, 'food_log', {row[1] for row in rows})
+    inserted = execute_values(
+        cursor,
+        INSERT_FOOD_LOG,
+        [(*row, *row_macros) for row, row_macros in zip(rows, macros)],
+        page_size=len(rows),
+        fetch=True
+    )
+    request.conn.commit()
+
+    return response(200, {'success': True, 'ids': [row['id'] for row in inserted]})
+
+
+@router.route('POST', 'add_food', default=True)
+def add_food(request) -> dict:
+    body = request.body
+    user_id = request.authorize(body.get('user_id'))
+    food_name = body.get('food_name', '')
+    grams = body.get('grams', 100)
+
+    if not user_id or not food_name:
+        return error(400, 'user_id и food_name обязательны')
+
+    try:
+        date = parse_log_date(body.get('date'), date_type.today())
+    except (ValueError, TypeError):
+        return error(400, f'Дата должна быть {LOG_DATE_RULE}')
+
+    catalogue = get_catalogue()
+    food_index = catalogue.find(food_name)
+    if food_index is None:
+        return error(400, 'Продукт не найден в базе')
+
+    calories, protein, fats, carbs = calculate_one(food_index, grams)
+
+    cursor = request.cursor()
+    ensure_partitions(cursor, 'food_log', [date])
+    cursor.execute(
+        INSERT_FOOD_LOG,
+        ((user_id, date, food_name, grams, calories, protein, fats, carbs),)
+    )
+    log_id = cursor.fetchone()['id']
+    request.conn.commit()
+
+    return response(200, {'success': True, 'id': log_id})
+
+
+@router.route('DELETE')
+def delete_food(request) -> dict:
+    owner_id = request.authorize()
+    log_id = request.body.get('id')
+
+    if not log_id:
+        return error(400, 'id обязателен')
+
+    # Дата записи необязательна, но с ней удаление смотрит только в секцию её месяца
+    try:
+        date = parse_date(request.body.get('date'))
+    except (ValueError, TypeError):
+        return error(400, 'Дата должна быть в формате ГГГГ-ММ-ДД')
+
+    cursor = request.cursor()
+    cursor.execute(DELETE_FOOD_LOG, (log_id, owner_id, date))
+    request.conn.commit()
+
+    return response(200, {'success': True})
+
+
+def import_rows(records, user_id, dates: set, foods: set):
+    """Проверенные строки для COPY; КБЖУ берутся из строки или считаются по каталогу пачками.
+    В dates и foods копятся даты и названия продуктов импорта"""
+    catalogue = get_catalogue()
+    resolved = {}
+    pending = []
+    for line_number, record in records:
+        food_name = str(record.get('food_name') or '').strip()
+        try:
+            date = parse_log_date(record.get('date'))
+        except (ValueError, TypeError):
+            raise HttpError(400, f'Строка {line_number}: дата должна быть {LOG_DATE_RULE}')
+        try:
+            # Вес по умолчанию — только для пустого поля: 0 из JSONL, как и "0" из CSV, отклоняется ниже
+            grams = record.get('grams')
+            grams = 100.0 if grams in (None, '') else float(grams)
+            given = [record.get(field) for field in MACRO_FIELDS]
+            macros = tuple(float(value) for value in given) if all(value not in (None, '') for value in given) else None
+        except (ValueError, TypeError):
+            raise HttpError(400, f'Строка {line_number}: некорректные grams или КБЖУ')
+        if not food_name or len(food_name) > 255 or not 0 < grams < 1e8:
+            raise HttpError(400, f'Строка {line_number}: нужны food_name до 255 символов и положительный вес')
+        if macros is not None and not all(0 <= value < 1e8 for value in macros):
+            raise HttpError(400, f'Строка {line_number}: КБЖУ должны быть неотрицательными числами')
+
+        food_index = None
+        if macros is None:
+            if food_name not in resolved:
+                resolved[food_name] = catalogue.find(food_name)
+            food_index = resolved[food_name]
+            if food_index is None:
+                raise HttpError(400, f'Строка {line_number}: продукт не найден в базе, укажите calories, protein, fats и carbs')
+
+        dates.add(date)
+        foods.add(food_name)
+        pending.append(((user_id, date, food_name, grams), food_index, macros))
+        if len(pending) == IMPORT_MACRO_BATCH:
+            yield from with_macros(pending)
+            pending = []
+    yield from with_macros(pending)
+
+
+def with_macros(pending: list):
+    """Дописывает КБЖУ к строкам импорта: для продуктов из каталога — одним вызовом calculate"""
+    lookups = [(food_index, row[3]) for row, food_index, _ in pending if food_index is not None]
+    computed = iter(calculate(*zip(*lookups)).tolist() if lookups else ())
+    for row, food_index, macros in pending:
+        yield (*row, *(next(computed) if food_index is not None else macros))
+
+
+@router.route('POST', 'import')
+def import_logs(request) -> dict:
+    """Импорт дневника питания из CSV или JSONL: тело — сами данные, user_id и format в query-параметрах"""
+    user_id = request.authorize(request.params.get('user_id'))
+
+    if not user_id:
+        return error(400, 'user_id обязателен')
+
+    fmt = request_format(request)
+    dates = set()
+    foods = set()
+    cursor = request.cursor()
+    imported = copy_rows(cursor, 'food_log', IMPORT_COLUMNS, import_rows(read_records(request.text, fmt), user_id, dates, foods))
+
+    if imported:
+        # Месяцы без секции узнаём только после разбора: их строки переносятся из секции по умолчанию
+        ensure_partitions(cursor, 'food_log', dates)
+        cursor.execute(REFRESH_FOOD_LOG_DAILY, (user_id, sorted(dates)))
+        cursor.execute(REFRESH_USER_FOOD_STATS, (user_id, sorted(foods)))
+    request.conn.commit()
+
+    return response(200, {'success': True, 'imported': imported})
+
+
 def handler(event: dict, context) -> dict:
     """API для работы с дневником питания и базой продуктов"""
-    
-    method = event.get('httpMethod', 'GET')
-    
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            },
-            'body': '',
-            'isBase64Encoded': False
-        }
-    
-    db_url = os.environ.get('DATABASE_URL')
-    
-    try:
-        conn = psycopg2.connect(db_url)
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        if method == 'GET':
-            params = event.get('queryStringParameters', {}) or {}
-            action = params.get('action', 'get_logs')
-            
-            if action == 'search_food':
-                query = params.get('query', '').lower()
-                results = []
-                
-                for food_name, nutrition in FOOD_DATABASE.items():
-                    if query in food_name.lower():
-                        results.append({
-                            'name': food_name,
-                            'calories': nutrition['calories'],
-                            'protein': nutrition['protein'],
-                            'fats': nutrition['fats'],
-                            'carbs': nutrition['carbs']
-                        })
-                
-                return {
-                    'statusCode': 200,
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'foods': results[:20]}),
-                    'isBase64Encoded': False
-                }
-            
-            elif action == 'get_goals':
-                user_id = params.get('user_id')
-                
-                if not user_id:
-                    return {
-                        'statusCode': 400,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps({'error': 'user_id обязателен'}),
-                        'isBase64Encoded': False
-                    }
-                
-                cursor.execute(
-                    "SELECT calories_goal, protein_goal, fats_goal, carbs_goal FROM user_nutrition_goals WHERE user_id = %s",
-                    (user_id,)
-                )
-                goals = cursor.fetchone()
-                
-                if not goals:
-                    return {
-                        'statusCode': 200,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps({'goals': None}),
-                        'isBase64Encoded': False
-                    }
-                
-                return {
-                    'statusCode': 200,
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'goals': dict(goals)}),
-                    'isBase64Encoded': False
-                }
-            
-            else:
-                user_id = params.get('user_id')
-                date = params.get('date')
-                
-                if not user_id:
-                    return {
-                        'statusCode': 400,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps({'error': 'user_id обязателен'}),
-                        'isBase64Encoded': False
-                    }
-                
-                if date:
-                    cursor.execute(
-                        "SELECT id, food_name, grams, calories, protein, fats, carbs, created_at FROM food_log WHERE user_id = %s AND date = %s ORDER BY created_at DESC",
-                        (user_id, date)
-                    )
-                else:
-                    cursor.execute(
-                        "SELECT id, date, food_name, grams, calories, protein, fats, carbs, created_at FROM food_log WHERE user_id = %s ORDER BY date DESC, created_at DESC LIMIT 100",
-                        (user_id,)
-                    )
-                
-                logs = cursor.fetchall()
-                
-                return {
-                    'statusCode': 200,
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'logs': [dict(log) for log in logs]}, default=str),
-                    'isBase64Encoded': False
-                }
-        
-        elif method == 'POST':
-            body = json.loads(event.get('body', '{}'))
-            action = body.get('action', 'add_food')
-            
-            if action == 'set_goals':
-                user_id = body.get('user_id')
-                calories_goal = body.get('calories_goal')
-                protein_goal = body.get('protein_goal')
-                fats_goal = body.get('fats_goal')
-                carbs_goal = body.get('carbs_goal')
-                
-                if not all([user_id, calories_goal, protein_goal, fats_goal, carbs_goal]):
-                    return {
-                        'statusCode': 400,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps({'error': 'Все поля обязательны'}),
-                        'isBase64Encoded': False
-                    }
-                
-                cursor.execute(
-                    """
-                    INSERT INTO user_nutrition_goals (user_id, calories_goal, protein_goal, fats_goal, carbs_goal)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (user_id) DO UPDATE SET
-                        calories_goal = EXCLUDED.calories_goal,
-                        protein_goal = EXCLUDED.protein_goal,
-                        fats_goal = EXCLUDED.fats_goal,
-                        carbs_goal = EXCLUDED.carbs_goal,
-                        updated_at = CURRENT_TIMESTAMP
-                    """,
-                    (user_id, calories_goal, protein_goal, fats_goal, carbs_goal)
-                )
-                conn.commit()
-                
-                return {
-                    'statusCode': 200,
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'success': True}),
-                    'isBase64Encoded': False
-                }
-            
-            else:
-                user_id = body.get('user_id')
-                date = body.get('date', datetime.now().strftime('%Y-%m-%d'))
-                food_name = body.get('food_name', '')
-                grams = body.get('grams', 100)
-                
-                if not user_id or not food_name:
-                    return {
-                        'statusCode': 400,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps({'error': 'user_id и food_name обязательны'}),
-                        'isBase64Encoded': False
-                    }
-                
-                food_data = FOOD_DATABASE.get(food_name)
-                if not food_data:
-                    return {
-                        'statusCode': 400,
-                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                        'body': json.dumps({'error': 'Продукт не найден в базе'}),
-                        'isBase64Encoded': False
-                    }
-                
-                multiplier = grams / 100
-                calories = round(food_data['calories'] * multiplier, 1)
-                protein = round(food_data['protein'] * multiplier, 1)
-                fats = round(food_data['fats'] * multiplier, 1)
-                carbs = round(food_data['carbs'] * multiplier, 1)
-                
-                cursor.execute(
-                    "INSERT INTO food_log (user_id, date, food_name, grams, calories, protein, fats, carbs) VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING id",
-                    (user_id, date, food_name, grams, calories, protein, fats, carbs)
-                )
-                log_id = cursor.fetchone()['id']
-                conn.commit()
-                
-                return {
-                    'statusCode': 200,
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'success': True, 'id': log_id}),
-                    'isBase64Encoded': False
-                }
-        
-        elif method == 'DELETE':
-            body = json.loads(event.get('body', '{}'))
-            log_id = body.get('id')
-            
-            if not log_id:
-                return {
-                    'statusCode': 400,
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'error': 'id обязателен'}),
-                    'isBase64Encoded': False
-                }
-            
-            cursor.execute("DELETE FROM food_log WHERE id = %s", (log_id,))
-            conn.commit()
-            
-            return {
-                'statusCode': 200,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'success': True}),
-                'isBase64Encoded': False
-            }
-        
-        cursor.close()
-        conn.close()
-        
-        return {
-            'statusCode': 405,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Method not allowed'}),
-            'isBase64Encoded': False
-        }
-        
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': str(e)}),
-            'isBase64Encoded': False
-        }
+    return router.dispatch(event, context)
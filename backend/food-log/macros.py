@@ -0,0 +1,54 @@
+"""КБЖУ записей дневника одной векторной операцией по матрице каталога.
+
+Матрица продукты × [ккал, Б, Ж, У] — вид numpy на mmap каталога. Для массивов индексов
+и граммовок все значения считаются разом, с тем же результатом, что у поштучного
+round(значение * (граммы / 100), 1) в Python.
+
+numpy импортируется при первом расчёте, а не при загрузке модуля: поиск, дневник, цели и
+dashboard КБЖУ не считают и не должны платить за импорт numpy при холодном старте.
+"""
+from typing import TYPE_CHECKING
+
+from catalogue import get_catalogue
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_matrix = None
+
+
+def nutrition_matrix() -> 'np.ndarray':
+    global _matrix
+    if _matrix is None:
+        _matrix = get_catalogue().nutrition_matrix()
+    return _matrix
+
+
+def round_like_python(values: 'np.ndarray') -> 'np.ndarray':
+    """round(x, 1) для каждого элемента, бит в бит.
+
+    round() округляет точное двоичное значение x, а rint(x * 10) — уже округлённое
+    произведение. Результаты расходятся, только когда x * 10 округлилось ровно в k + 0.5:
+    тогда направление решает знак ошибки умножения. Она вычисляется точно как
+    (8x - x * 10) + 2x — оба вычитания точные по лемме Стербенца.
+    """
+    import numpy as np
+    scaled = values * 10
+    rounded = np.rint(scaled)
+    halves = scaled - np.floor(scaled) == 0.5
+    if halves.any():
+        exact, near = values[halves], scaled[halves]
+        error = (exact * 8 - near) + exact * 2
+        rounded[halves] = np.where(error > 0, np.ceil(near), np.where(error < 0, np.floor(near), rounded[halves]))
+    return rounded / 10
+
+
+def calculate(indices, grams) -> 'np.ndarray':
+    """КБЖУ для пар (индекс продукта, граммы): массив len(indices) × 4"""
+    import numpy as np
+    multiplier = np.asarray(grams, dtype=np.float64) / 100
+    return round_like_python(nutrition_matrix()[np.asarray(indices, dtype=np.intp)] * multiplier[:, None])
+
+
+def calculate_one(index: int, grams) -> tuple:
+    return tuple(calculate([index], [grams])[0].tolist())
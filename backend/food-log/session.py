@@ -0,0 +1,101 @@
+"""Подписанные токены сессий: выдаются функцией auth, проверяются в каждой функции без запроса к базе.
+
+Формат токена: v1.<user_id>.<истекает, unix>.<id сессии>.<подпись>, где подпись —
+первые 16 байт HMAC-SHA256 от всего, что стоит до неё, в base64url.
+
+Секрет задаётся переменной окружения SESSION_SECRET; пока она не задана, токены не выдаются
+и функции, как раньше, доверяют user_id из запроса.
+"""
+import base64
+import hmac
+import os
+import time
+
+VERSION = 'v1'
+SIGNATURE_BYTES = 16
+SESSION_TTL = int(os.environ.get('SESSION_TTL', 14 * 24 * 3600))
+REVOCATION_REFRESH = int(os.environ.get('SESSION_REVOCATION_REFRESH', 30))
+
+_secret = os.environ.get('SESSION_SECRET', '').encode()
+
+
+class SessionError(Exception):
+    pass
+
+
+def enabled() -> bool:
+    return bool(_secret)
+
+
+def _sign(message: bytes) -> bytes:
+    return base64.urlsafe_b64encode(hmac.digest(_secret, message, 'sha256')[:SIGNATURE_BYTES]).rstrip(b'=')
+
+
+def issue_token(user_id: int, ttl: int = SESSION_TTL) -> tuple:
+    """Новый токен и время его истечения (unix)"""
+    expires_at = int(time.time()) + ttl
+    session_id = base64.urlsafe_b64encode(os.urandom(9)).decode()
+    message = f'{VERSION}.{user_id}.{expires_at}.{session_id}'
+    return f'{message}.{_sign(message.encode()).decode()}', expires_at
+
+
+def parse_token(token: str) -> tuple:
+    """(user_id, expires_at, session_id) для подписанного и не истёкшего токена, иначе SessionError"""
+    message, _, signature = token.rpartition('.')
+    if not hmac.compare_digest(_sign(message.encode()), signature.encode()):
+        raise SessionError('Недействительный токен')
+    try:
+        version, user_id, expires_at, session_id = message.split('.')
+        user_id, expires_at = int(user_id), int(expires_at)
+    except ValueError:
+        raise SessionError('Недействительный токен')
+    if version != VERSION:
+        raise SessionError('Недействительный токен')
+    if expires_at <= time.time():
+        raise SessionError('Срок действия токена истёк')
+    return user_id, expires_at, session_id
+
+
+class RevocationCache:
+    """Отозванные сессии в памяти контейнера; новые подтягиваются из revoked_sessions раз в refresh секунд"""
+
+    def __init__(self, refresh: int = REVOCATION_REFRESH):
+        self.refresh = refresh
+        self._revoked = {}
+        self._loaded_at = 0.0
+        self._last_revoked_at = None
+
+    def add(self, session_id: str, expires_at: int) -> None:
+        self._revoked[session_id] = expires_at
+
+    def is_revoked(self, session_id: str, load) -> bool:
+        """load(after) -> [(session_id, expires_at, revoked_at)] отзывов новее after"""
+        now = time.monotonic()
+        if now - self._loaded_at >= self.refresh:
+            self._reload(load)
+            self._loaded_at = now
+        return session_id in self._revoked
+
+    def _reload(self, load) -> None:
+        for session_id, expires_at, revoked_at in load(self._last_revoked_at):
+            self._revoked[session_id] = expires_at
+            if self._last_revoked_at is None or revoked_at > self._last_revoked_at:
+                self._last_revoked_at = revoked_at
+        wall_now = time.time()
+        for session_id in [sid for sid, expires_at in self._revoked.items() if expires_at <= wall_now]:
+            del self._revoked[session_id]
+
+
+revocations = RevocationCache()
+
+
+def fetch_revocations(conn, after) -> list:
+    """Отзывы новее after (с запасом на транзакции, закоммиченные позже своего revoked_at)"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT session_id, expires_at, revoked_at FROM revoked_sessions "
+            "WHERE expires_at > EXTRACT(EPOCH FROM CURRENT_TIMESTAMP) "
+            "AND revoked_at >= COALESCE(%s, '-infinity'::timestamp) - INTERVAL '1 minute' ORDER BY revoked_at",
+            (after,)
+        )
+        return cursor.fetchall()
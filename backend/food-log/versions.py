@@ -0,0 +1,30 @@
+"""Версии данных пользователя для ETag и условных GET.
+
+Каждая запись увеличивает счётчик user_data_versions(user_id, scope) в той же команде,
+поэтому ETag списка считается одним запросом по первичному ключу, без чтения строк.
+"""
+import hashlib
+
+
+def bump_version(scope: str, source: str) -> str:
+    """CTE для WITH ...: +1 к версии scope у каждого user_id из source"""
+    return f"""version_bump AS (
+        INSERT INTO user_data_versions (user_id, scope, version)
+        SELECT DISTINCT user_id, '{scope}', 1 FROM {source}
+        ON CONFLICT (user_id, scope) DO UPDATE SET version = user_data_versions.version + 1
+    )"""
+
+
+def data_version(request, user_id, scope: str) -> int:
+    cursor = request.conn.cursor()
+    cursor.execute("SELECT version FROM user_data_versions WHERE user_id = %s AND scope = %s", (user_id, scope))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def make_etag(scope: str, user_id, version: int, *variant) -> str:
+    """Слабый ETag; variant — всё, кроме версии, от чего зависит ответ (параметры, текущая дата)"""
+    tag = f'{scope}.{user_id}.{version}'
+    if variant:
+        tag += '.' + hashlib.blake2b(repr(variant).encode(), digest_size=6).hexdigest()
+    return f'W/"{tag}"'
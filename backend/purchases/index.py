@@ -1,106 +1,102 @@
 import json
-import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import execute_values
+from runtime import Router, encode_body, error, response
+from cache import cache, cached_response
+from versions import bump_version, data_version, make_etag
+
+VERSION_SCOPE = 'purchases'
+
+router = Router(allow_methods='GET, POST, OPTIONS', allow_headers='Content-Type, Idempotency-Key, X-Auth-Token, If-None-Match')
+
+INSERT_PURCHASES = f"""
+    WITH inserted AS (
+        INSERT INTO purchases (user_id, program_id, program_title, program_category, price, calculated_data, idempotency_key) VALUES %s
+        RETURNING id, user_id, program_id, program_title, program_category, price, calculated_data, purchased_at
+    ), {bump_version(VERSION_SCOPE, 'inserted')}
+    SELECT id, program_id, program_title, program_category, price, calculated_data, purchased_at FROM inserted ORDER BY id
+"""
+
+
+@router.route('GET')
+def list_purchases(request) -> dict:
+    user_id = request.authorize(request.params.get('user_id'))
+
+    if not user_id:
+        return error(400, 'user_id обязателен')
+
+    def load() -> str:
+        purchases = request.rows(
+            "SELECT id, program_id, program_title, program_category, price, calculated_data, purchased_at FROM purchases WHERE user_id = %s ORDER BY purchased_at DESC",
+            (user_id,)
+        )
+        return encode_body({'purchases': purchases})
+
+    return cached_response(
+        f'purchases:{user_id}',
+        load,
+        request,
+        etag=lambda: make_etag(VERSION_SCOPE, user_id, data_version(request, user_id, VERSION_SCOPE))
+    )
+
+
+@router.route('POST')
+def save_purchases(request) -> dict:
+    body = request.body
+    user_id = request.authorize(body.get('user_id'))
+    programs = body.get('programs', [])
+
+    if not user_id or not programs:
+        return error(400, 'user_id и programs обязательны')
+
+    idempotency_key = body.get('idempotency_key') or request.headers.get('idempotency-key')
 
-def handler(event: dict, context) -> dict:
-    """API для работы с покупками пользователей"""
-    
-    method = event.get('httpMethod', 'GET')
-    
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            },
-            'body': '',
-            'isBase64Encoded': False
-        }
-    
-    db_url = os.environ.get('DATABASE_URL')
-    schema = os.environ.get('MAIN_DB_SCHEMA', 'public')
-    
     try:
-        conn = psycopg2.connect(db_url)
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        if method == 'GET':
-            params = event.get('queryStringParameters', {}) or {}
-            user_id = params.get('user_id')
-            
-            if not user_id:
-                return {
-                    'statusCode': 400,
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'error': 'user_id обязателен'}),
-                    'isBase64Encoded': False
-                }
-            
+        rows = [
+            (
+                user_id,
+                program['id'],
+                program['title'],
+                program['category'],
+                program['price'],
+                json.dumps(program.get('calculatedData')),
+                idempotency_key
+            )
+            for program in programs
+        ]
+    except (KeyError, TypeError):
+        return error(400, 'Некорректные данные программы')
+
+    cursor = request.cursor()
+
+    if idempotency_key:
+        cursor.execute(
+            "INSERT INTO purchase_checkouts (user_id, idempotency_key) VALUES (%s, %s) ON CONFLICT DO NOTHING RETURNING user_id",
+            (user_id, idempotency_key)
+        )
+
+        if not cursor.fetchone():
             cursor.execute(
-                "SELECT id, program_id, program_title, program_category, price, calculated_data, purchased_at FROM purchases WHERE user_id = %s ORDER BY purchased_at DESC",
-                (user_id,)
+                "SELECT id, program_id, program_title, program_category, price, calculated_data, purchased_at FROM purchases WHERE user_id = %s AND idempotency_key = %s ORDER BY id",
+                (user_id, idempotency_key)
             )
             purchases = cursor.fetchall()
-            
-            return {
-                'statusCode': 200,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'purchases': [dict(p) for p in purchases]}, default=str),
-                'isBase64Encoded': False
-            }
-        
-        elif method == 'POST':
-            body = json.loads(event.get('body', '{}'))
-            user_id = body.get('user_id')
-            programs = body.get('programs', [])
-            
-            if not user_id or not programs:
-                return {
-                    'statusCode': 400,
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'error': 'user_id и programs обязательны'}),
-                    'isBase64Encoded': False
-                }
-            
-            for program in programs:
-                cursor.execute(
-                    "INSERT INTO purchases (user_id, program_id, program_title, program_category, price, calculated_data) VALUES (%s, %s, %s, %s, %s, %s)",
-                    (
-                        user_id,
-                        program['id'],
-                        program['title'],
-                        program['category'],
-                        program['price'],
-                        json.dumps(program.get('calculatedData'))
-                    )
-                )
-            
-            conn.commit()
-            
-            return {
-                'statusCode': 200,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'success': True, 'message': 'Покупки сохранены'}),
-                'isBase64Encoded': False
-            }
-        
-        cursor.close()
-        conn.close()
-        
-        return {
-            'statusCode': 405,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Method not allowed'}),
-            'isBase64Encoded': False
-        }
-        
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': str(e)}),
-            'isBase64Encoded': False
-        }
\ No newline at end of file
+            request.conn.commit()
+
+            return response(200, {'success': True, 'message': 'Покупки уже сохранены', 'purchases': [dict(p) for p in purchases]})
+
+    purchases = execute_values(
+        cursor,
+        INSERT_PURCHASES,
+        rows,
+        page_size=len(rows),
+        fetch=True
+    )
+    request.conn.commit()
+    cache.invalidate(f'purchases:{user_id}')
+
+    return response(200, {'success': True, 'message': 'Покупки сохранены', 'purchases': [dict(p) for p in purchases]})
+
+
+def handler(event: dict, context) -> dict:
+    """API для работы с покупками пользователей"""
+    return router.dispatch(event, context)
@@ -1,147 +1,520 @@
+import base64
 import json
-import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from datetime import datetime
+from datetime import date as date_type, datetime, timedelta
+from decimal import Decimal
+from runtime import HttpError, Router, conditional_response, error, raw_response, response
+from versions import bump_version, data_version, make_etag
+from bulk import FORMATS, copy_rows, export_body, read_records, request_format
+from partitions import ensure_partitions
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+DEFAULT_ANALYTICS_WEEKS = 12
+MAX_ANALYTICS_WEEKS = 104
+MAX_BULK_ROWS = 500
+RECENT_DAYS = 92
+VERSION_SCOPE = 'training_log'
+PATCH_FIELDS = ('date', 'program_id', 'exercise_name', 'sets', 'reps', 'weight', 'notes')
+IMPORT_COLUMNS = ('user_id', 'date', 'program_id', 'exercise_name', 'sets', 'reps', 'weight', 'notes')
+EXPORT_QUERY = """
+    SELECT date, exercise_name, sets, reps, weight, notes, program_id FROM training_log
+    WHERE user_id = %s AND date >= COALESCE(%s, '-infinity'::date) AND date <= COALESCE(%s, 'infinity'::date)
+    ORDER BY date, created_at, id
+"""
+
+router = Router(allow_methods='GET, POST, PUT, DELETE, OPTIONS')
+
+# Недельные итоги training_weekly_stats: объём = подходы × повторы × вес, 1ПМ по формуле Эпли.
+# Одни и те же выражения используются при вставке записи и при пересчёте недели
+WEEKLY_STATS_AGGREGATES = """
+    COUNT(*),
+    SUM(COALESCE(sets, 1)),
+    SUM(COALESCE(sets, 1) * COALESCE(reps, 0)),
+    SUM(COALESCE(sets, 1) * COALESCE(reps, 0) * COALESCE(weight, 0)),
+    MAX(weight),
+    MAX(CASE WHEN reps = 1 THEN weight WHEN reps > 1 THEN ROUND(weight * (1 + reps / 30.0), 2) END)
+"""
+
+INSERT_TRAINING_LOG = f"""
+    WITH inserted AS (
+        INSERT INTO training_log (user_id, date, program_id, exercise_name, sets, reps, weight, notes)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        RETURNING id, user_id, date, exercise_name, sets, reps, weight
+    ), stats AS (
+        INSERT INTO training_weekly_stats (user_id, exercise_name, week_start, entries, sets, reps, volume, best_weight, best_e1rm)
+        SELECT user_id, exercise_name, date_trunc('week', date)::date, {WEEKLY_STATS_AGGREGATES}
+        FROM inserted
+        GROUP BY user_id, exercise_name, date_trunc('week', date)::date
+        ON CONFLICT (user_id, exercise_name, week_start) DO UPDATE SET
+            entries = training_weekly_stats.entries + EXCLUDED.entries,
+            sets = training_weekly_stats.sets + EXCLUDED.sets,
+            reps = training_weekly_stats.reps + EXCLUDED.reps,
+            volume = training_weekly_stats.volume + EXCLUDED.volume,
+            best_weight = GREATEST(training_weekly_stats.best_weight, EXCLUDED.best_weight),
+            best_e1rm = GREATEST(training_weekly_stats.best_e1rm, EXCLUDED.best_e1rm)
+    ), {bump_version(VERSION_SCOPE, 'inserted')}
+    SELECT id FROM inserted
+"""
+
+# Максимумы нельзя уменьшить инкрементально, поэтому при изменении записи
+# затронутые недели пересчитываются целиком по строкам training_log за эту неделю.
+# Границы всех недель передаются константами: по ним секции отсекаются ещё при планировании
+REFRESH_WEEKLY_STATS = f"""
+    WITH weeks AS (
+        SELECT DISTINCT user_id, exercise_name, date_trunc('week', date)::date AS week_start
+        FROM unnest(%s::integer[], %s::varchar[], %s::date[]) AS changed (user_id, exercise_name, date)
+    ), fresh AS (
+        SELECT weeks.user_id, weeks.exercise_name, weeks.week_start, {WEEKLY_STATS_AGGREGATES}
+        FROM weeks
+        JOIN training_log t ON t.user_id = weeks.user_id AND t.exercise_name = weeks.exercise_name
+            AND t.date >= weeks.week_start AND t.date < weeks.week_start + 7
+            AND t.date >= %s AND t.date < %s
+        GROUP BY weeks.user_id, weeks.exercise_name, weeks.week_start
+    ), emptied AS (
+        DELETE FROM training_weekly_stats s
+        USING weeks
+        WHERE s.user_id = weeks.user_id AND s.exercise_name = weeks.exercise_name AND s.week_start = weeks.week_start
+            AND NOT EXISTS (
+                SELECT 1 FROM fresh
+                WHERE fresh.user_id = weeks.user_id AND fresh.exercise_name = weeks.exercise_name AND fresh.week_start = weeks.week_start
+            )
+    ), {bump_version(VERSION_SCOPE, 'weeks')}
+    INSERT INTO training_weekly_stats (user_id, exercise_name, week_start, entries, sets, reps, volume, best_weight, best_e1rm)
+    SELECT * FROM fresh
+    ON CONFLICT (user_id, exercise_name, week_start) DO UPDATE SET
+        entries = EXCLUDED.entries,
+        sets = EXCLUDED.sets,
+        reps = EXCLUDED.reps,
+        volume = EXCLUDED.volume,
+        best_weight = EXCLUDED.best_weight,
+        best_e1rm = EXCLUDED.best_e1rm
+"""
+
+# После импорта недели в диапазоне дат пересчитываются одним проходом по training_log —
+# целиком, вместе с записями, которые уже были в этих неделях до и после импортированных дат
+REBUILD_WEEKLY_STATS = f"""
+    WITH fresh AS (
+        SELECT user_id, exercise_name, date_trunc('week', date)::date AS week_start, {WEEKLY_STATS_AGGREGATES}
+        FROM training_log
+        WHERE user_id = %s AND date >= date_trunc('week', %s::date) AND date < date_trunc('week', %s::date) + INTERVAL '7 days'
+        GROUP BY user_id, exercise_name, date_trunc('week', date)::date
+    ), {bump_version(VERSION_SCOPE, 'fresh')}
+    INSERT INTO training_weekly_stats (user_id, exercise_name, week_start, entries, sets, reps, volume, best_weight, best_e1rm)
+    SELECT * FROM fresh
+    ON CONFLICT (user_id, exercise_name, week_start) DO UPDATE SET
+        entries = EXCLUDED.entries,
+        sets = EXCLUDED.sets,
+        reps = EXCLUDED.reps,
+        volume = EXCLUDED.volume,
+        best_weight = EXCLUDED.best_weight,
+        best_e1rm = EXCLUDED.best_e1rm
+"""
+
+# Правка многих записей одной командой: CTE old блокирует строки и запоминает прежние упражнение
+# и дату (по ним пересчитывается и та неделя, из которой запись ушла), UPDATE находит строки по
+# (id, date) из old. Если клиент прислал прежние даты всех записей (old_date), они подставляются
+# в {dates} списком констант, и план открывает только секции этих месяцев. В patch только
+# меняющиеся поля
+UPDATE_TRAINING_LOGS = """
+    WITH old AS (
+        SELECT t.id, t.exercise_name, t.date FROM training_log t WHERE t.id = ANY(%s) AND t.user_id = %s{dates} FOR UPDATE
+    )
+    UPDATE training_log t SET
+        date = CASE WHEN v.patch ? 'date' THEN (v.patch->>'date')::date ELSE t.date END,
+        program_id = CASE WHEN v.patch ? 'program_id' THEN v.patch->>'program_id' ELSE t.program_id END,
+        exercise_name = CASE WHEN v.patch ? 'exercise_name' THEN v.patch->>'exercise_name' ELSE t.exercise_name END,
+        sets = CASE WHEN v.patch ? 'sets' THEN (v.patch->>'sets')::integer ELSE t.sets END,
+        reps = CASE WHEN v.patch ? 'reps' THEN (v.patch->>'reps')::integer ELSE t.reps END,
+        weight = CASE WHEN v.patch ? 'weight' THEN (v.patch->>'weight')::numeric ELSE t.weight END,
+        notes = CASE WHEN v.patch ? 'notes' THEN v.patch->>'notes' ELSE t.notes END
+    FROM old JOIN unnest(%s::integer[], %s::jsonb[]) AS v (id, patch) ON v.id = old.id
+    WHERE t.id = old.id AND t.date = old.date{dates}
+    RETURNING t.id, t.date, t.program_id, t.exercise_name, t.sets, t.reps, t.weight, t.notes, t.created_at,
+        old.exercise_name AS old_exercise_name, old.date AS old_date
+"""
+
+DELETE_TRAINING_LOGS = """
+    DELETE FROM training_log WHERE id = ANY(%s) AND user_id = %s
+    RETURNING id, date, program_id, exercise_name, sets, reps, weight, notes, created_at
+"""
+
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+def encode_cursor(log: dict) -> str:
+    # date и created_at приходят из RowSet текстом в формате Postgres
+    key = f"{log['date']}|{log['created_at'].replace(' ', 'T')}|{log['id']}"
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Курсор следующей страницы: (date, created_at, id) последней отданной записи"""
+    if not token:
+        return None
+    key = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+    date, created_at, log_id = key.split('|')
+    return parse_date(date), datetime.fromisoformat(created_at), int(log_id)
+
+
+@router.route('GET', 'analytics')
+def analytics(request) -> dict:
+    params = request.params
+    user_id = request.authorize(params.get('user_id'))
+
+    if not user_id:
+        return error(400, 'user_id обязателен')
+
+    try:
+        weeks = max(1, min(int(params.get('weeks', DEFAULT_ANALYTICS_WEEKS)), MAX_ANALYTICS_WEEKS))
+    except ValueError:
+        return error(400, 'weeks должно быть числом')
+
+    exercise_name = params.get('exercise_name')
+    exercise_filter = 'AND exercise_name = %s' if exercise_name else ''
+    exercise_values = [exercise_name] if exercise_name else []
+    today = date_type.today()
+    first_week = today - timedelta(days=today.weekday(), weeks=weeks - 1)
+
+    version = data_version(request, user_id, VERSION_SCOPE)
+    return conditional_response(
+        request,
+        make_etag(VERSION_SCOPE, user_id, version, 'analytics', first_week, exercise_name),
+        lambda: analytics_response(request, user_id, first_week, exercise_filter, exercise_values)
+    )
+
+
+def analytics_response(request, user_id, first_week, exercise_filter: str, exercise_values: list) -> dict:
+    weekly = request.rows(
+        f"""
+        SELECT exercise_name, week_start, entries, sets, reps, volume, best_weight, best_e1rm
+        FROM training_weekly_stats
+        WHERE user_id = %s AND week_start >= %s {exercise_filter}
+        ORDER BY exercise_name, week_start
+        """,
+        [user_id, first_week, *exercise_values]
+    )
+
+    records = request.rows(
+        f"""
+        SELECT exercise_name,
+            MAX(best_weight) AS best_weight,
+            (array_agg(week_start ORDER BY best_weight DESC NULLS LAST, week_start))[1] AS best_weight_week,
+            MAX(best_e1rm) AS best_e1rm,
+            (array_agg(week_start ORDER BY best_e1rm DESC NULLS LAST, week_start))[1] AS best_e1rm_week,
+            MAX(volume) AS best_volume,
+            SUM(volume) AS total_volume
+        FROM training_weekly_stats
+        WHERE user_id = %s {exercise_filter}
+        GROUP BY exercise_name
+        ORDER BY exercise_name
+        """,
+        [user_id, *exercise_values]
+    )
+
+    return response(200, {'weekly': weekly, 'records': records})
+
+
+@router.route('GET', default=True)
+def list_logs(request) -> dict:
+    params = request.params
+    user_id = request.authorize(params.get('user_id'))
+
+    if not user_id:
+        return error(400, 'user_id обязателен')
+
+    try:
+        date_from = parse_date(params.get('from'))
+        date_to = parse_date(params.get('to'))
+        after = decode_cursor(params.get('cursor'))
+        limit = max(1, min(int(params.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+    except ValueError:
+        return error(400, 'Некорректные параметры from, to, cursor или limit')
+
+    version = data_version(request, user_id, VERSION_SCOPE)
+    return conditional_response(
+        request,
+        make_etag(VERSION_SCOPE, user_id, version, date_from, date_to, after, limit),
+        lambda: logs_response(request, user_id, date_from, date_to, after, limit)
+    )
+
+
+def logs_response(request, user_id, date_from, date_to, after, limit: int) -> dict:
+    # Без нижней границы даты план перебирает все месячные секции. Сначала страница ищется
+    # в последних RECENT_DAYS днях; если там не набралось limit записей, а история пользователя
+    # начинается раньше (по training_weekly_stats), запрос повторяется от её первой недели
+    recent = (after[0] if after else date_type.today()) - timedelta(days=RECENT_DAYS)
+    if (not date_from or date_from < recent) and not (date_to and date_to < recent):
+        logs = select_logs(request, user_id, recent, date_to, after, limit)
+        if len(logs) <= limit:
+            earliest = first_week(request, user_id)
+            if earliest is not None and earliest < recent:
+                logs = select_logs(request, user_id, max(date_from or earliest, earliest), date_to, after, limit)
+    else:
+        logs = select_logs(request, user_id, date_from, date_to, after, limit)
+
+    next_cursor = None
+    if len(logs) > limit:
+        logs = logs[:limit]
+        next_cursor = encode_cursor(logs[-1])
+
+    return response(200, {'logs': logs, 'next_cursor': next_cursor})
+
+
+def first_week(request, user_id):
+    """Первая неделя с записями пользователя; training_weekly_stats мала, секции не затрагиваются"""
+    cursor = request.conn.cursor()
+    cursor.execute("SELECT MIN(week_start) FROM training_weekly_stats WHERE user_id = %s", (user_id,))
+    return cursor.fetchone()[0]
+
+
+def select_logs(request, user_id, date_from, date_to, after, limit: int):
+    """До limit + 1 записей страницы: лишняя показывает, что есть следующая"""
+    conditions = ['user_id = %s']
+    values = [user_id]
+    if date_from:
+        conditions.append('date >= %s')
+        values.append(date_from)
+    if date_to:
+        conditions.append('date <= %s')
+        values.append(date_to)
+    if after:
+        # Отдельное условие на date отсекает секции более поздних месяцев, сравнение кортежей — нет
+        conditions.append('date <= %s AND (date, created_at, id) < (%s, %s, %s)')
+        values.extend((after[0], *after))
+    values.append(limit + 1)
+
+    return request.rows(
+        f"SELECT id, date, program_id, exercise_name, sets, reps, weight, notes, created_at FROM training_log WHERE {' AND '.join(conditions)} ORDER BY date DESC, created_at DESC, id DESC LIMIT %s",
+        values
+    )
+
+
+@router.route('GET', 'export')
+def export_logs(request) -> dict:
+    params = request.params
+    user_id = request.authorize(params.get('user_id'))
+
+    if not user_id:
+        return error(400, 'user_id обязателен')
+
+    fmt = request_format(request)
+    try:
+        date_from = parse_date(params.get('from'))
+        date_to = parse_date(params.get('to'))
+    except ValueError:
+        return error(400, 'Даты from и to должны быть в формате ГГГГ-ММ-ДД')
+
+    version = data_version(request, user_id, VERSION_SCOPE)
+    return conditional_response(
+        request,
+        make_etag(VERSION_SCOPE, user_id, version, 'export', fmt, date_from, date_to),
+        lambda: raw_response(
+            200,
+            export_body(request.conn, EXPORT_QUERY, (user_id, date_from, date_to), fmt),
+            {'Content-Type': FORMATS[fmt], 'Content-Disposition': f'attachment; filename="training-log.{fmt}"'}
+        )
+    )
+
+
+@router.route('POST')
+def add_log(request) -> dict:
+    body = request.body
+    user_id = request.authorize(body.get('user_id'))
+    date = body.get('date', datetime.now().strftime('%Y-%m-%d'))
+    program_id = body.get('program_id')
+    exercise_name = body.get('exercise_name', '')
+    sets = body.get('sets')
+    reps = body.get('reps')
+    weight = body.get('weight')
+    notes = body.get('notes', '')
+
+    if not user_id or not exercise_name:
+        return error(400, 'user_id и exercise_name обязательны')
+
+    cursor = request.cursor()
+    ensure_partitions(cursor, 'training_log', [date])
+    cursor.execute(
+        INSERT_TRAINING_LOG,
+        (user_id, date, program_id, exercise_name, sets, reps, weight, notes)
+    )
+    log_id = cursor.fetchone()['id']
+    request.conn.commit()
+
+    return response(200, {'success': True, 'id': log_id})
+
+
+def parse_patch(item) -> tuple:
+    """(id, изменяемые поля, прежняя дата или None) из элемента правки; значения приводятся к тексту для JSONB"""
+    try:
+        log_id = int(item['id'])
+    except (KeyError, TypeError, ValueError):
+        raise HttpError(400, 'У каждой записи нужен числовой id')
+
+    patch = {field: item[field] for field in PATCH_FIELDS if field in item}
+    if not patch:
+        raise HttpError(400, f'Нет полей для обновления записи {log_id}')
+    try:
+        old_date = date_type.fromisoformat(str(item['old_date'])) if item.get('old_date') else None
+        if 'date' in patch:
+            patch['date'] = date_type.fromisoformat(str(patch['date'])).isoformat()
+        for field in ('sets', 'reps'):
+            if patch.get(field) is not None:
+                patch[field] = int(patch[field])
+        if patch.get('weight') is not None:
+            weight = Decimal(str(patch['weight']))
+            if not weight.is_finite() or abs(weight) >= 1000:
+                raise ValueError
+            patch['weight'] = str(weight)
+    except (ValueError, TypeError, ArithmeticError):
+        raise HttpError(400, f'Некорректные date, old_date, sets, reps или weight у записи {log_id}')
+
+    exercise_name = patch.get('exercise_name')
+    program_id = patch.get('program_id')
+    if 'exercise_name' in patch and (not isinstance(exercise_name, str) or not exercise_name.strip() or len(exercise_name) > 255) \
+            or not isinstance(program_id, (str, type(None))) or (program_id and len(program_id) > 50):
+        raise HttpError(400, f'У записи {log_id} нужен exercise_name до 255 символов, program_id — до 50')
+    return log_id, patch, old_date
+
+
+def refresh_weeks(cursor, user_id, changed: list) -> None:
+    """Пересчёт недельных итогов по парам (упражнение, дата) изменённых записей"""
+    days = [day for _, day in changed]
+    first_week = min(days) - timedelta(days=min(days).weekday())
+    cursor.execute(
+        REFRESH_WEEKLY_STATS,
+        ([user_id] * len(changed), [exercise_name for exercise_name, _ in changed], days, first_week, max(days) + timedelta(days=7))
+    )
+
+
+@router.route('PUT')
+def update_logs(request) -> dict:
+    """Правка одной записи (id и поля в теле) или многих сразу (updates: [{id, поля}]) одной командой;
+    old_date — дата записи до правки, если клиент её знает"""
+    body = request.body
+    user_id = request.authorize(body.get('user_id'))
+
+    if not user_id:
+        return error(400, 'user_id обязателен')
+
+    single = 'updates' not in body
+    items = [body] if single else body['updates']
+    if not isinstance(items, list) or not items or len(items) > MAX_BULK_ROWS:
+        return error(400, f'updates — список от 1 до {MAX_BULK_ROWS} записей')
+
+    patches = [parse_patch(item) if isinstance(item, dict) else parse_patch({}) for item in items]
+    if len({log_id for log_id, _, _ in patches}) != len(patches):
+        return error(400, 'id записей в updates повторяются')
+
+    ids = [log_id for log_id, _, _ in patches]
+    old_dates = [old_date for _, _, old_date in patches]
+    dates = [sorted(set(old_dates))] if all(old_dates) else []
+    cursor = request.cursor()
+    ensure_partitions(cursor, 'training_log', [patch['date'] for _, patch, _ in patches if 'date' in patch])
+    cursor.execute(
+        UPDATE_TRAINING_LOGS.format(dates=' AND t.date = ANY(%s::date[])' if dates else ''),
+        (ids, user_id, *dates, ids, [json.dumps(patch) for _, patch, _ in patches], *dates)
+    )
+    rows = cursor.fetchall()
+    if rows:
+        refresh_weeks(
+            cursor,
+            user_id,
+            [(row['old_exercise_name'], row['old_date']) for row in rows] + [(row['exercise_name'], row['date']) for row in rows]
+        )
+    updated = [{key: value for key, value in row.items() if not key.startswith('old_')} for row in rows]
+    request.conn.commit()
+
+    if single and not updated:
+        return error(404, 'Запись не найдена')
+
+    return response(200, {'success': True, 'updated': updated})
+
+
+@router.route('DELETE')
+def delete_logs(request) -> dict:
+    """Удаление записей по списку ids (или одной по id) вместе с пересчётом недельных итогов"""
+    body = request.body
+    user_id = request.authorize(body.get('user_id'))
+
+    if not user_id:
+        return error(400, 'user_id обязателен')
+
+    ids = body.get('ids', [body['id']] if 'id' in body else None)
+    if not isinstance(ids, list) or not ids or len(ids) > MAX_BULK_ROWS \
+            or not all(isinstance(log_id, int) and not isinstance(log_id, bool) for log_id in ids):
+        return error(400, f'ids — список от 1 до {MAX_BULK_ROWS} числовых id')
+
+    cursor = request.cursor()
+    cursor.execute(DELETE_TRAINING_LOGS, (ids, user_id))
+    deleted = [dict(row) for row in cursor.fetchall()]
+
+    if deleted:
+        refresh_weeks(cursor, user_id, [(row['exercise_name'], row['date']) for row in deleted])
+    request.conn.commit()
+
+    return response(200, {'success': True, 'deleted': deleted})
+
+
+def _optional(record: dict, field: str, convert):
+    value = record.get(field)
+    if value is None or value == '':
+        return None
+    return convert(value)
+
+
+def import_rows(records, user_id, span: list, months: set):
+    """Проверенные строки для COPY; в span копятся первая и последняя дата импорта, в months — месяцы"""
+    for line_number, record in records:
+        try:
+            date = date_type.fromisoformat(str(record.get('date') or ''))
+            sets = _optional(record, 'sets', int)
+            reps = _optional(record, 'reps', int)
+            weight = _optional(record, 'weight', lambda value: Decimal(str(value)))
+        except (ValueError, TypeError, ArithmeticError):
+            raise HttpError(400, f'Строка {line_number}: некорректные date, sets, reps или weight')
+        if weight is not None and (not weight.is_finite() or abs(weight) >= 1000):
+            raise HttpError(400, f'Строка {line_number}: вес должен быть меньше 1000')
+
+        exercise_name = str(record.get('exercise_name') or '').strip()
+        program_id = _optional(record, 'program_id', str)
+        if not exercise_name or len(exercise_name) > 255 or (program_id and len(program_id) > 50):
+            raise HttpError(400, f'Строка {line_number}: нужен exercise_name до 255 символов, program_id — до 50')
+
+        if not span:
+            span.extend((date, date))
+        elif date < span[0]:
+            span[0] = date
+        elif date > span[1]:
+            span[1] = date
+        months.add(date.replace(day=1))
+        yield user_id, date, program_id, exercise_name, sets, reps, weight, record.get('notes') or ''
+
+
+@router.route('POST', 'import')
+def import_logs(request) -> dict:
+    """Импорт истории из CSV или JSONL: тело — сами данные, user_id и format в query-параметрах"""
+    user_id = request.authorize(request.params.get('user_id'))
+
+    if not user_id:
+        return error(400, 'user_id обязателен')
+
+    fmt = request_format(request)
+    span = []
+    months = set()
+    cursor = request.cursor()
+    imported = copy_rows(cursor, 'training_log', IMPORT_COLUMNS, import_rows(read_records(request.text, fmt), user_id, span, months))
+
+    if imported:
+        # Месяцы без секции узнаём только после разбора: их строки переносятся из секции по умолчанию
+        ensure_partitions(cursor, 'training_log', months)
+        cursor.execute(REBUILD_WEEKLY_STATS, (user_id, *span))
+    request.conn.commit()
+
+    return response(200, {'success': True, 'imported': imported})
+
 
 def handler(event: dict, context) -> dict:
     """API для работы с дневником тренировок"""
-    
-    method = event.get('httpMethod', 'GET')
-    
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            },
-            'body': '',
-            'isBase64Encoded': False
-        }
-    
-    db_url = os.environ.get('DATABASE_URL')
-    schema = os.environ.get('MAIN_DB_SCHEMA', 'public')
-    
-    try:
-        conn = psycopg2.connect(db_url)
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        if method == 'GET':
-            params = event.get('queryStringParameters', {}) or {}
-            user_id = params.get('user_id')
-            
-            if not user_id:
-                return {
-                    'statusCode': 400,
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'error': 'user_id обязателен'}),
-                    'isBase64Encoded': False
-                }
-            
-            cursor.execute(
-                "SELECT id, date, program_id, exercise_name, sets, reps, weight, notes, created_at FROM training_log WHERE user_id = %s ORDER BY date DESC, created_at DESC",
-                (user_id,)
-            )
-            logs = cursor.fetchall()
-            
-            return {
-                'statusCode': 200,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'logs': [dict(log) for log in logs]}, default=str),
-                'isBase64Encoded': False
-            }
-        
-        elif method == 'POST':
-            body = json.loads(event.get('body', '{}'))
-            user_id = body.get('user_id')
-            date = body.get('date', datetime.now().strftime('%Y-%m-%d'))
-            program_id = body.get('program_id')
-            exercise_name = body.get('exercise_name', '')
-            sets = body.get('sets')
-            reps = body.get('reps')
-            weight = body.get('weight')
-            notes = body.get('notes', '')
-            
-            if not user_id or not exercise_name:
-                return {
-                    'statusCode': 400,
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'error': 'user_id и exercise_name обязательны'}),
-                    'isBase64Encoded': False
-                }
-            
-            cursor.execute(
-                "INSERT INTO training_log (user_id, date, program_id, exercise_name, sets, reps, weight, notes) VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING id",
-                (user_id, date, program_id, exercise_name, sets, reps, weight, notes)
-            )
-            log_id = cursor.fetchone()['id']
-            conn.commit()
-            
-            return {
-                'statusCode': 200,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'success': True, 'id': log_id}),
-                'isBase64Encoded': False
-            }
-        
-        elif method == 'PUT':
-            body = json.loads(event.get('body', '{}'))
-            log_id = body.get('id')
-            
-            if not log_id:
-                return {
-                    'statusCode': 400,
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'error': 'id обязателен'}),
-                    'isBase64Encoded': False
-                }
-            
-            update_fields = []
-            update_values = []
-            
-            for field in ['date', 'program_id', 'exercise_name', 'sets', 'reps', 'weight', 'notes']:
-                if field in body:
-                    update_fields.append(f"{field} = %s")
-                    update_values.append(body[field])
-            
-            if not update_fields:
-                return {
-                    'statusCode': 400,
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'error': 'Нет полей для обновления'}),
-                    'isBase64Encoded': False
-                }
-            
-            update_values.append(log_id)
-            cursor.execute(
-                f"UPDATE training_log SET {', '.join(update_fields)} WHERE id = %s",
-                update_values
-            )
-            conn.commit()
-            
-            return {
-                'statusCode': 200,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'success': True}),
-                'isBase64Encoded': False
-            }
-        
-        cursor.close()
-        conn.close()
-        
-        return {
-            'statusCode': 405,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Method not allowed'}),
-            'isBase64Encoded': False
-        }
-        
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': str(e)}),
-            'isBase64Encoded': False
-        }
\ No newline at end of file
+    return router.dispatch(event, context)
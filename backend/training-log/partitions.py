@@ -0,0 +1,37 @@
+"""Месячные секции food_log и training_log (миграция V0009).
+
+Строка с датой, для месяца которой секции нет, попадает в секцию по умолчанию
+<таблица>_default — запись не ломается, но запросы за этот месяц перестают отсекать
+лишнее. Поэтому перед записью функции вызывают ensure_partitions с датами строк:
+ensure_monthly_partitions в базе создаёт недостающие месяцы и переносит в них строки
+из секции по умолчанию. Проверенные месяцы запоминаются до конца жизни контейнера,
+так что обычная запись обходится без лишнего запроса.
+
+Если транзакция с созданием секции откатится, месяц всё равно считается проверенным:
+до перезапуска контейнера его строки лягут в секцию по умолчанию, на данные это не влияет.
+"""
+from datetime import date
+
+_ensured = set()
+
+
+def _month(value):
+    """Первое число месяца даты; строку, которую не разобрать, пропускаем — её проверит сама база"""
+    if not isinstance(value, date):
+        try:
+            value = date.fromisoformat(str(value))
+        except ValueError:
+            return None
+    return value.replace(day=1)
+
+
+def ensure_partitions(cursor, table: str, dates) -> None:
+    months = {(table, month) for month in map(_month, dates) if month is not None} - _ensured
+    if not months:
+        return
+    cursor.execute(
+        "SELECT ensure_monthly_partitions(%s, month, month) FROM unnest(%s::date[]) AS month",
+        (table, sorted(month for _, month in months))
+    )
+    cursor.fetchall()
+    _ensured.update(months)
@@ -0,0 +1,451 @@
+import base64
+import gzip
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from json.encoder import encode_basestring_ascii
+import psycopg2
+from psycopg2.extensions import DECIMAL, PYDATE, PYDATETIME, cursor as base_cursor, new_type, register_type
+from psycopg2.extras import RealDictCursor
+from db import get_pool, is_stale
+import session
+import timing
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON_HEADERS = {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+
+# Тела длиннее порога сжимаются, если клиент прислал подходящий Accept-Encoding
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 2048))
+GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+
+# Значения из Postgres кодируются так же, как раньше json.dumps(..., default=str)
+_ENCODERS = {Decimal: str, date: date.isoformat, datetime: str}
+
+
+def _encode_value(value):
+    encoder = _ENCODERS.get(type(value))
+    if encoder is None:
+        raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+    return encoder(value)
+
+
+_json_encoder = json.JSONEncoder(default=_encode_value)
+dumps = _json_encoder.encode
+
+
+def use_json_encoder(encoder) -> None:
+    """Подменяет кодировщик ответов: encoder(payload) -> str"""
+    global dumps
+    dumps = encoder
+
+
+def _orjson_encoder():
+    import orjson
+
+    def encode(payload) -> str:
+        return orjson.dumps(payload, default=_encode_value, option=orjson.OPT_PASSTHROUGH_DATETIME).decode()
+    return encode
+
+
+if os.environ.get('JSON_ENCODER') == 'orjson':
+    use_json_encoder(_orjson_encoder())
+
+
+# Для списков NUMERIC, DATE и TIMESTAMP читаются из Postgres текстом и сразу приводятся
+# к виду, который дал бы str()/isoformat() от Decimal, date и datetime
+def _numeric_text(value, cursor):
+    if value is None:
+        return None
+    if value.lstrip('-').startswith('0.000000'):
+        return str(DECIMAL(value, cursor))
+    return value
+
+
+def _date_text(value, cursor):
+    if value is None:
+        return None
+    if not value[:1].isdigit() or value.endswith('BC'):
+        return PYDATE(value, cursor).isoformat()
+    return value
+
+
+def _timestamp_text(value, cursor):
+    if value is None:
+        return None
+    if not value[:1].isdigit() or value.endswith('BC'):
+        return str(PYDATETIME(value, cursor))
+    head, dot, fraction = value.partition('.')
+    return f'{head}.{fraction.ljust(6, "0")}' if dot else value
+
+
+_TEXT_CASTERS = (
+    new_type(DECIMAL.values, 'NUMERIC_TEXT', _numeric_text),
+    new_type(PYDATE.values, 'DATE_TEXT', _date_text),
+    new_type(PYDATETIME.values, 'TIMESTAMP_TEXT', _timestamp_text),
+)
+
+
+def _quoted(value: str) -> str:
+    return '"' + value + '"'
+
+
+def _boolean(value: bool) -> str:
+    return 'true' if value else 'false'
+
+
+# OID типа колонки -> кодировщик значения в JSON; остальные типы идут через _json_encoder
+_COLUMN_ENCODERS = {
+    16: _boolean,
+    20: int.__repr__, 21: int.__repr__, 23: int.__repr__,
+    25: encode_basestring_ascii, 1042: encode_basestring_ascii, 1043: encode_basestring_ascii,
+    1082: _quoted, 1114: _quoted, 1700: _quoted,
+}
+
+
+class RowSet:
+    """Строки выборки кортежами; в JSON пишутся напрямую, без dict на каждую строку"""
+
+    __slots__ = ('columns', 'rows', '_encoders', '_template')
+
+    def __init__(self, description, rows: list):
+        self.columns = [column.name for column in description]
+        self.rows = rows
+        self._encoders = [_COLUMN_ENCODERS.get(column.type_code, _json_encoder.encode) for column in description]
+        self._template = '{' + ', '.join(
+            encode_basestring_ascii(name).replace('%', '%%') + ': %s' for name in self.columns
+        ) + '}'
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            sliced = RowSet.__new__(RowSet)
+            sliced.columns, sliced.rows = self.columns, self.rows[index]
+            sliced._encoders, sliced._template = self._encoders, self._template
+            return sliced
+        return dict(zip(self.columns, self.rows[index]))
+
+    def json(self) -> str:
+        encoders = self._encoders
+        template = self._template
+        return '[' + ', '.join([
+            template % tuple(['null' if value is None else encode(value) for encode, value in zip(encoders, row)])
+            for row in self.rows
+        ]) + ']'
+
+
+def encode_body(payload) -> str:
+    trace = timing.current()
+    if trace is not None:
+        return trace.measure('serialize', _encode_body, payload)
+    return _encode_body(payload)
+
+
+def _encode_body(payload) -> str:
+    if type(payload) is dict and any(type(value) is RowSet for value in payload.values()):
+        return '{' + ', '.join(
+            encode_basestring_ascii(key) + ': ' + (value.json() if type(value) is RowSet else dumps(value))
+            for key, value in payload.items()
+        ) + '}'
+    return dumps(payload)
+
+
+def raw_response(status_code: int, body: str, headers: dict = None) -> dict:
+    """Ответ с готовым JSON-телом, например из кэша"""
+    response_headers = dict(JSON_HEADERS)
+    if headers:
+        response_headers.update(headers)
+    return {
+        'statusCode': status_code,
+        'headers': response_headers,
+        'body': body,
+        'isBase64Encoded': False
+    }
+
+
+def response(status_code: int, payload, headers: dict = None) -> dict:
+    return raw_response(status_code, encode_body(payload), headers)
+
+
+def error(status_code: int, message: str) -> dict:
+    return response(status_code, {'error': message})
+
+
+def etag_matches(if_none_match, etag: str) -> bool:
+    """Сравнение If-None-Match с ETag по слабому правилу (без учёта префикса W/)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    return any(
+        (candidate[2:] if candidate.startswith('W/') else candidate) == opaque
+        for candidate in (part.strip() for part in if_none_match.split(','))
+    )
+
+
+def not_modified(etag: str) -> dict:
+    return {
+        'statusCode': 304,
+        'headers': {'Access-Control-Allow-Origin': '*', 'Access-Control-Expose-Headers': 'ETag', 'ETag': etag},
+        'body': '',
+        'isBase64Encoded': False
+    }
+
+
+def conditional_response(request, etag: str, build) -> dict:
+    """304 без тела, если клиент прислал тот же ETag, иначе build() с заголовком ETag"""
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return not_modified(etag)
+    result = build()
+    headers = result['headers']
+    headers['ETag'] = etag
+    exposed = headers.get('Access-Control-Expose-Headers')
+    headers['Access-Control-Expose-Headers'] = f'{exposed}, ETag' if exposed else 'ETag'
+    return result
+
+
+def accepted_encodings(accept_encoding) -> set:
+    """Кодировки из Accept-Encoding, кроме отключённых через q=0"""
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        params = params.strip().replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding)
+    return accepted
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_response(request, result: dict) -> dict:
+    """Сжимает большое тело в br или gzip по Accept-Encoding; платформа требует тело в base64"""
+    body = result.get('body')
+    if result.get('isBase64Encoded') or not body or len(body) < COMPRESS_MIN_BYTES:
+        return result
+    headers = result.setdefault('headers', {})
+    if 'Content-Encoding' in headers:
+        return result
+    vary = headers.get('Vary')
+    headers['Vary'] = f'{vary}, Accept-Encoding' if vary else 'Accept-Encoding'
+
+    accepted = accepted_encodings(request.headers.get('accept-encoding'))
+    if brotli is not None and 'br' in accepted:
+        encoding = 'br'
+    elif 'gzip' in accepted or '*' in accepted:
+        encoding = 'gzip'
+    else:
+        return result
+
+    raw = body.encode()
+    encoded = base64.b64encode(compress(raw, encoding)).decode()
+    if len(encoded) >= len(raw):
+        return result
+    headers['Content-Encoding'] = encoding
+    result['body'] = encoded
+    result['isBase64Encoded'] = True
+    return result
+
+
+class HttpError(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class Request:
+    """Входящее событие; тело, заголовки и соединение с базой разбираются по первому обращению"""
+
+    __slots__ = ('event', 'method', 'params', '_body', '_headers', '_conn', '_session_user_id')
+
+    def __init__(self, event: dict):
+        self.event = event
+        self.method = event.get('httpMethod', 'GET')
+        self.params = event.get('queryStringParameters') or {}
+        self._body = None
+        self._headers = None
+        self._conn = None
+        self._session_user_id = None
+
+    @property
+    def body(self) -> dict:
+        if self._body is None:
+            try:
+                self._body = json.loads(self.event.get('body') or '{}')
+            except ValueError:
+                raise HttpError(400, 'Некорректный JSON в теле запроса')
+            if not isinstance(self._body, dict):
+                raise HttpError(400, 'Тело запроса должно быть JSON-объектом')
+        return self._body
+
+    @property
+    def text(self) -> str:
+        """Тело как есть, например CSV для импорта; base64 от платформы декодируется"""
+        body = self.event.get('body') or ''
+        if self.event.get('isBase64Encoded'):
+            try:
+                body = base64.b64decode(body).decode('utf-8')
+            except ValueError:
+                raise HttpError(400, 'Тело запроса должно быть в UTF-8')
+        return body
+
+    @property
+    def headers(self) -> dict:
+        if self._headers is None:
+            self._headers = {key.lower(): value for key, value in (self.event.get('headers') or {}).items()}
+        return self._headers
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            trace = timing.current()
+            if trace is None:
+                self._conn = get_pool().acquire()
+            else:
+                self._conn = trace.measure('connect', get_pool().acquire)
+                self._conn.cursor_factory = timing.cursor_factory(base_cursor)
+        return self._conn
+
+    def cursor(self):
+        return self.conn.cursor(cursor_factory=timing.cursor_factory(RealDictCursor))
+
+    @property
+    def token(self):
+        token = self.headers.get('x-auth-token')
+        if not token:
+            authorization = self.headers.get('authorization', '')
+            token = authorization[7:] if authorization.startswith('Bearer ') else None
+        return token
+
+    def authorize(self, claimed_user_id=None):
+        """user_id, от имени которого выполняется запрос.
+
+        С SESSION_SECRET берётся из токена сессии (401 без токена, 403, если в запросе чужой user_id);
+        без него, как раньше, возвращается user_id из запроса.
+        """
+        if not session.enabled():
+            return claimed_user_id
+        if self._session_user_id is None:
+            token = self.token
+            if not token:
+                raise HttpError(401, 'Требуется авторизация')
+            try:
+                user_id, _, session_id = session.parse_token(token)
+            except session.SessionError as e:
+                raise HttpError(401, str(e))
+            if session.revocations.is_revoked(session_id, lambda after: session.fetch_revocations(self.conn, after)):
+                raise HttpError(401, 'Сессия завершена')
+            self._session_user_id = user_id
+        if claimed_user_id not in (None, '') and str(claimed_user_id) != str(self._session_user_id):
+            raise HttpError(403, 'Нет доступа к данным другого пользователя')
+        return self._session_user_id
+
+    def rows(self, query: str, params=None) -> RowSet:
+        """Выполняет SELECT и возвращает RowSet для ответа списком"""
+        cursor = self.conn.cursor()
+        for caster in _TEXT_CASTERS:
+            register_type(caster, cursor)
+        cursor.execute(query, params)
+        return RowSet(cursor.description, cursor.fetchall())
+
+    def close(self) -> None:
+        if self._conn is not None:
+            get_pool().release(self._conn)
+            self._conn = None
+
+    def drop_stale_connection(self) -> bool:
+        """Возвращает в пул (то есть закрывает) умершее соединение; True, если запрос можно повторить"""
+        if self._conn is None or not is_stale(self._conn):
+            return False
+        self.close()
+        return True
+
+
+class Router:
+    """Таблица маршрутов (метод, action) -> обработчик.
+
+    action берётся из query-параметров для GET и из тела для остальных методов
+    (или из query-параметров, если тело не JSON, как у импорта CSV);
+    маршрут с default=True обслуживает запросы без action или с неизвестным action.
+    """
+
+    def __init__(self, allow_methods: str, allow_headers: str = 'Content-Type, X-Auth-Token, If-None-Match'):
+        self._routes = {}
+        self._defaults = {}
+        self._action_methods = set()
+        self._preflight_headers = {
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': allow_methods,
+            'Access-Control-Allow-Headers': allow_headers
+        }
+
+    def route(self, method: str, action: str = None, default: bool = False):
+        def register(func):
+            if action is not None:
+                self._routes[(method, action)] = func
+                self._action_methods.add(method)
+            if default or action is None:
+                self._defaults[method] = func
+            return func
+        return register
+
+    def _resolve(self, request: Request):
+        if request.method not in self._action_methods:
+            return self._defaults.get(request.method)
+        source = request.params if request.method == 'GET' or 'action' in request.params else request.body
+        return self._routes.get((request.method, source.get('action'))) or self._defaults.get(request.method)
+
+    @staticmethod
+    def _run(request: Request, func, trace) -> dict:
+        if trace is None:
+            return compress_response(request, func(request))
+        result = trace.measure('handler', func, request)
+        return trace.measure('compress', compress_response, request, result)
+
+    def dispatch(self, event: dict, context) -> dict:
+        if event.get('httpMethod') == 'OPTIONS':
+            return {'statusCode': 200, 'headers': dict(self._preflight_headers), 'body': '', 'isBase64Encoded': False}
+
+        request = Request(event)
+        trace = timing.start()
+        try:
+            func = self._resolve(request)
+            if func is None:
+                result = error(405, 'Method not allowed')
+            else:
+                try:
+                    result = self._run(request, func, trace)
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    # Соединение из пула оказалось мёртвым: один повтор на новом соединении
+                    if not request.drop_stale_connection():
+                        raise
+                    result = self._run(request, func, trace)
+        except HttpError as e:
+            result = error(e.status_code, e.message)
+        except Exception as e:
+            result = error(500, str(e))
+        finally:
+            request.close()
+        if trace is not None:
+            timing.finish(trace, result, request.method, request.params.get('action') or (request._body or {}).get('action'))
+        return result
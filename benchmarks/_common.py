@@ -0,0 +1,96 @@
+import importlib.util
+import json
+import os
+import sys
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+import psycopg2
+
+ROOT = Path(__file__).resolve().parent.parent
+BACKEND = ROOT / 'backend'
+MIGRATIONS = ROOT / 'db_migrations'
+
+_loaded_backends = {str(BACKEND)}
+
+
+def database_url() -> str:
+    dsn = os.environ.get('DATABASE_URL')
+    if not dsn:
+        sys.exit('Укажите DATABASE_URL локального Postgres, например postgresql://postgres@localhost/bench')
+    return dsn
+
+
+def load_handler(function: str, backend: Path = BACKEND):
+    """Импортирует <backend>/<function>/index.py вместе с его соседними модулями.
+
+    backend позволяет загрузить функцию из другой копии дерева, например из выгрузки старой ревизии.
+    """
+    function_dir = Path(backend) / function
+    _loaded_backends.add(str(backend))
+    for name, module in list(sys.modules.items()):
+        module_file = getattr(module, '__file__', None) or ''
+        if module_file.startswith(tuple(_loaded_backends)):
+            del sys.modules[name]
+
+    sys.path.insert(0, str(function_dir))
+    try:
+        spec = importlib.util.spec_from_file_location(f'{function.replace("-", "_")}_index', function_dir / 'index.py')
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(str(function_dir))
+    return module
+
+
+def apply_migrations(dsn: str) -> None:
+    """Применяет db_migrations/V*.sql, которые ещё не были применены к локальной базе"""
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute("CREATE TABLE IF NOT EXISTS bench_schema_history (version VARCHAR(50) PRIMARY KEY)")
+        cursor.execute("SELECT version FROM bench_schema_history")
+        applied = {row[0] for row in cursor.fetchall()}
+        for path in sorted(MIGRATIONS.glob('V*.sql')):
+            version = path.name.split('__')[0]
+            if version in applied:
+                continue
+            cursor.execute(path.read_text(encoding='utf-8'))
+            cursor.execute("INSERT INTO bench_schema_history (version) VALUES (%s)", (version,))
+    conn.close()
+
+
+def ensure_user(dsn: str, email: str = 'bench@example.com') -> int:
+    conn = psycopg2.connect(dsn)
+    with conn, conn.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO users (email, password_hash, name) VALUES (%s, '', 'Bench') "
+            "ON CONFLICT (email) DO UPDATE SET name = EXCLUDED.name RETURNING id",
+            (email,)
+        )
+        user_id = cursor.fetchone()[0]
+    conn.close()
+    return user_id
+
+
+def make_event(method: str, path: str = '/', body=None, headers: dict = None) -> dict:
+    query = dict(parse_qsl(urlsplit(path).query))
+    return {
+        'httpMethod': method,
+        'headers': headers or {},
+        'queryStringParameters': query or None,
+        'body': json.dumps(body) if body is not None else None,
+        'isBase64Encoded': False
+    }
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(title: str, samples_ms: list) -> None:
+    print(f'{title:<40} n={len(samples_ms):<6} p50={percentile(samples_ms, 50):8.3f} ms  p99={percentile(samples_ms, 99):8.3f} ms')
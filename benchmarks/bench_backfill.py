@@ -0,0 +1,161 @@
+"""Пересчёт КБЖУ после исправления каталога: скорость, продолжение с checkpoint и влияние на запись.
+
+Загружает --rows записей питания нескольким пользователям, собирает каталог, в котором у
+--corrected продуктов изменены КБЖУ, и запускает food-log/backfill.py. Первый запуск
+прерывается через --interrupt-after секунд; пока он идёт, замеряются обычные add_food.
+Второй запуск продолжает с checkpoint. Затем все записи сверяются с новым каталогом,
+а food_log_daily — с полным пересчётом; последний запуск без ограничения скорости
+возвращает исходные значения.
+
+    DATABASE_URL=postgresql://postgres@localhost/bench python benchmarks/bench_backfill.py --rows 200000
+"""
+import argparse
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import psycopg2
+
+from _common import BACKEND, apply_migrations, database_url, ensure_user, load_handler, make_event, report
+
+FOOD_LOG = BACKEND / 'food-log'
+
+
+def corrected_catalogue(directory: Path, count: int) -> tuple:
+    with open(FOOD_LOG / 'data' / 'foods.csv', encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    for row in rows[:count]:
+        row['calories'] = str(float(row['calories']) * 1.1 + 3)
+        row['protein'] = str(float(row['protein']) + 0.7)
+    source = directory / 'foods.csv'
+    with open(source, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    target = directory / 'foods.bin'
+    subprocess.run([sys.executable, 'catalogue.py', str(source), str(target)], cwd=FOOD_LOG, check=True, capture_output=True)
+    return target, [row['name'] for row in rows[:count]]
+
+
+def seed(user_ids: list, rows: int) -> None:
+    food = load_handler('food-log')
+    catalogue = food.get_catalogue()
+    start = date.today() - timedelta(days=365)
+    per_user = rows // len(user_ids)
+    for offset, user_id in enumerate(user_ids):
+        body = ''.join(
+            f'{(start + timedelta(days=i % 365)).isoformat()},{catalogue.name((i + offset) % len(catalogue))},{50 + i % 250}\n'
+            for i in range(per_user)
+        )
+        result = food.handler(make_event('POST', f'/?action=import&user_id={user_id}') | {'body': 'date,food_name,grams\n' + body}, None)
+        assert result['statusCode'] == 200, result['body']
+
+
+def run_backfill(dsn: str, catalogue_path: Path, checkpoint: Path, names: list, rate: float, timeout=None) -> str:
+    env = dict(os.environ, DATABASE_URL=dsn, FOOD_CATALOGUE_PATH=str(catalogue_path))
+    command = [sys.executable, 'backfill.py', '--foods', *names, '--rate', str(rate), '--checkpoint', str(checkpoint)]
+    try:
+        return subprocess.run(command, cwd=FOOD_LOG, env=env, check=True, capture_output=True, text=True, timeout=timeout).stdout
+    except subprocess.TimeoutExpired as e:
+        return (e.stdout or b'').decode()
+
+
+def verify(dsn: str, user_ids: list, catalogue_path: Path, names: list) -> int:
+    os.environ['FOOD_CATALOGUE_PATH'] = str(catalogue_path)
+    load_handler('food-log')
+    macros = sys.modules['macros']
+    catalogue = sys.modules['catalogue'].get_catalogue()
+    conn = psycopg2.connect(dsn)
+    with conn, conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT food_name, grams::float8, calories::float8, protein::float8, fats::float8, carbs::float8 "
+            "FROM food_log WHERE user_id = ANY(%s) AND food_name = ANY(%s)",
+            (user_ids, names)
+        )
+        rows = cursor.fetchall()
+        expected = macros.calculate([catalogue.find(row[0]) for row in rows], [row[1] for row in rows]).tolist()
+        assert all(tuple(row[2:]) == tuple(values) for row, values in zip(rows, expected)), 'food_log не совпадает с новым каталогом'
+        cursor.execute(
+            """
+            SELECT user_id, date, COUNT(*), SUM(calories), SUM(protein), SUM(fats), SUM(carbs) FROM food_log WHERE user_id = ANY(%s) GROUP BY user_id, date
+            EXCEPT SELECT user_id, date, entries, calories, protein, fats, carbs FROM food_log_daily WHERE user_id = ANY(%s)
+            """,
+            (user_ids, user_ids)
+        )
+        assert not cursor.fetchall(), 'food_log_daily расходится с food_log'
+    conn.close()
+    del os.environ['FOOD_CATALOGUE_PATH']
+    return len(rows)
+
+
+def add_food_latency(user_id: int, stop: threading.Event) -> list:
+    food = load_handler('food-log')
+    catalogue = food.get_catalogue()
+    event = make_event('POST', body={'user_id': user_id, 'food_name': catalogue.name(len(catalogue) - 1), 'grams': 120})
+    samples = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        assert food.handler(event, None)['statusCode'] == 200
+        samples.append((time.perf_counter() - started) * 1000)
+        time.sleep(0.005)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--corrected', type=int, default=10)
+    parser.add_argument('--rate', type=float, default=5000)
+    parser.add_argument('--interrupt-after', type=float, default=2.0)
+    args = parser.parse_args()
+
+    dsn = database_url()
+    apply_migrations(dsn)
+    user_ids = [ensure_user(dsn, f'bench-backfill-{i}@example.com') for i in range(args.users)]
+    conn = psycopg2.connect(dsn)
+    with conn, conn.cursor() as cursor:
+        cursor.execute("DELETE FROM food_log WHERE user_id = ANY(%s)", (user_ids,))
+        cursor.execute("DELETE FROM food_log_daily WHERE user_id = ANY(%s)", (user_ids,))
+    conn.close()
+    seed(user_ids, args.rows)
+
+    with tempfile.TemporaryDirectory() as directory:
+        catalogue_path, names = corrected_catalogue(Path(directory), args.corrected)
+        checkpoint = Path(directory) / 'checkpoint.json'
+
+        baseline_stop = threading.Event()
+        threading.Timer(args.interrupt_after, baseline_stop.set).start()
+        report('add_food без пересчёта', add_food_latency(user_ids[0], baseline_stop))
+
+        stop = threading.Event()
+        samples = []
+        writer = threading.Thread(target=lambda: samples.extend(add_food_latency(user_ids[0], stop)))
+        writer.start()
+        run_backfill(dsn, catalogue_path, checkpoint, names, args.rate, timeout=args.interrupt_after)
+        stop.set()
+        writer.join()
+        report('add_food во время пересчёта', samples)
+        assert checkpoint.exists(), 'первый запуск не оставил checkpoint'
+        print(f'прерван после {args.interrupt_after} с, checkpoint: {checkpoint.read_text(encoding="utf-8")}')
+
+        second = run_backfill(dsn, catalogue_path, checkpoint, names, args.rate)
+        print(second.strip().splitlines()[-1])
+        assert not checkpoint.exists()
+        checked = verify(dsn, user_ids, catalogue_path, names)
+        print(f'{checked} записей совпадают с новым каталогом, food_log_daily совпадает с пересчётом: ok')
+
+        original = FOOD_LOG / 'data' / 'foods.bin'
+        restored = run_backfill(dsn, original, checkpoint, names, 0)
+        print(f'обратно к исходному каталогу без ограничения скорости: {restored.strip().splitlines()[-1]}')
+        verify(dsn, user_ids, original, names)
+
+
+if __name__ == '__main__':
+    main()
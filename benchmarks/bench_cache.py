@@ -0,0 +1,96 @@
+"""Кэш целей питания и списка покупок: запрос в Postgres против попадания в кэш контейнера.
+
+Сценарии: кэш выключен (CACHE_TTL=0), попадание в локальный кэш, попадание в общий слой
+из «другого» тёплого контейнера (свежий импорт функции с тем же общим хранилищем) и сброс
+кэша записью. Общий слой здесь — словарь в памяти с интерфейсом Redis-бэкенда.
+
+    DATABASE_URL=postgresql://postgres@localhost/bench python benchmarks/bench_cache.py --iterations 500
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from _common import apply_migrations, database_url, ensure_user, load_handler, make_event, report
+
+
+class DictBackend:
+    """Замена Redis для замеров: общий словарь на несколько загрузок функции"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def load(function: str, ttl: str, shared=None):
+    os.environ['CACHE_TTL'] = ttl
+    module = load_handler(function)
+    if shared is not None:
+        sys.modules['cache'].use_shared_backend(shared)
+    return module
+
+
+def measure(module, event: dict, iterations: int, expected: str, fresh=None) -> list:
+    samples = []
+    for _ in range(iterations):
+        if fresh is not None:
+            fresh()
+        started = time.perf_counter()
+        result = module.handler(event, None)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert result['statusCode'] == 200 and result['body'] == expected
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+
+    dsn = database_url()
+    apply_migrations(dsn)
+    user_id = ensure_user(dsn)
+
+    goals = {'action': 'set_goals', 'user_id': user_id, 'calories_goal': 2200, 'protein_goal': 120, 'fats_goal': 70, 'carbs_goal': 260}
+    scenarios = [
+        ('food-log', make_event('GET', f'/?action=get_goals&user_id={user_id}')),
+        ('purchases', make_event('GET', f'/?user_id={user_id}')),
+    ]
+    load('food-log', '60').handler(make_event('POST', body=goals), None)
+
+    for function, event in scenarios:
+        uncached = load(function, '0')
+        expected = uncached.handler(event, None)['body']
+        report(f'{function} без кэша', measure(uncached, event, args.iterations, expected))
+
+        shared = DictBackend()
+        first = load(function, '60', shared)
+        first.handler(event, None)
+        report(f'{function} локальный кэш', measure(first, event, args.iterations, expected))
+
+        second = load(function, '60', shared)
+        local = sys.modules['cache'].cache.local
+        report(f'{function} общий слой', measure(second, event, args.iterations, expected, fresh=lambda: local.delete(next(iter(shared.data)))))
+        print(f'  X-Cache-Stats: {second.handler(event, None)["headers"]["X-Cache-Stats"]}')
+
+    module = load('food-log', '60')
+    event = scenarios[0][1]
+    module.handler(event, None)
+    module.handler(make_event('POST', body={**goals, 'calories_goal': 2300}), None)
+    result = module.handler(event, None)
+    assert result['headers']['X-Cache'] == 'miss' and json.loads(result['body'])['goals']['calories_goal'] == '2300.00'
+    module.handler(make_event('POST', body=goals), None)
+    print('сброс кэша после set_goals: ok')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Холодный старт и память: словарь FOOD_DATABASE в исходниках против mmap-каталога.
+
+Каждый вариант запускается в отдельном процессе: импорт модуля с каталогом
+и один поиск продукта по названию, как при первом add_food в новом контейнере,
+а для mmap-каталога ещё и первый search_food с опечаткой — открытие поискового
+индекса из foods.bin.
+
+    python benchmarks/bench_catalogue.py --size 100000
+"""
+import argparse
+import csv
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from _common import BACKEND, load_handler
+from bench_food_search import synthetic_catalogue
+
+FOOD_LOG = BACKEND / 'food-log'
+
+PROBE = '''
+import json, re, sys, time
+started = time.perf_counter()
+{load}
+elapsed = (time.perf_counter() - started) * 1000
+peak_kb = int(re.search(r'VmHWM:\s+(\d+)', open('/proc/self/status').read()).group(1))
+print(json.dumps({{'ms': elapsed, 'found': found, 'max_rss_mb': peak_kb / 1024}}))
+'''
+
+LEGACY = '''
+sys.path.insert(0, {directory!r})
+import legacy_foods
+found = legacy_foods.FOOD_DATABASE.get({name!r}) is not None
+'''
+
+MMAP = '''
+import os
+os.environ['FOOD_CATALOGUE_PATH'] = {path!r}
+sys.path.insert(0, {directory!r})
+import catalogue
+found = catalogue.get_catalogue().find({name!r}) is not None
+'''
+
+MMAP_SEARCH = MMAP + '''
+found = found and bool(catalogue.get_catalogue().search_index().search({query!r}))
+'''
+
+
+def probe(load: str) -> dict:
+    output = subprocess.run([sys.executable, '-c', PROBE.format(load=load)], check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=100_000)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    module = load_handler('food-log')
+    base = module.get_catalogue()
+    rows = []
+    for i, name in enumerate(synthetic_catalogue(base.names(), args.size)):
+        rows.append({'name': name, **base.nutrition(i % len(base))})
+    probe_name = rows[-1]['name']
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = Path(directory) / 'foods.csv'
+        with open(source, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['name', 'calories', 'protein', 'fats', 'carbs'])
+            writer.writeheader()
+            writer.writerows(rows)
+        compiled = Path(directory) / 'foods.bin'
+        sys.modules['catalogue'].compile_catalogue(str(source), str(compiled))
+
+        literal = {row['name']: {key: value for key, value in row.items() if key != 'name'} for row in rows}
+        (Path(directory) / 'legacy_foods.py').write_text(f'FOOD_DATABASE = {literal!r}\n', encoding='utf-8')
+
+        print(f'каталог: {len(rows)} продуктов, бинарный файл {compiled.stat().st_size / 1024:.0f} KB, исходник {source.stat().st_size / 1024:.0f} KB')
+        variants = [
+            ('словарь в исходниках', LEGACY.format(directory=directory, name=probe_name)),
+            ('mmap-каталог', MMAP.format(path=str(compiled), directory=str(FOOD_LOG), name=probe_name)),
+            ('mmap, первый поиск', MMAP_SEARCH.format(path=str(compiled), directory=str(FOOD_LOG), name=probe_name, query='курица грутка')),
+        ]
+        for title, load in variants:
+            results = [probe(load) for _ in range(args.runs)]
+            assert all(result['found'] for result in results)
+            first, warm = results[0], sorted(result['ms'] for result in results[1:]) or [results[0]['ms']]
+            print(f'{title:<22} первый запуск {first["ms"]:8.1f} ms  медиана повторных {warm[len(warm) // 2]:8.1f} ms  '
+                  f'max RSS {max(result["max_rss_mb"] for result in results):6.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
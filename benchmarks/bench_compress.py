@@ -0,0 +1,111 @@
+"""Сжатие ответов: байты «по проводу» и время CPU для gzip и brotli по уровням.
+
+Тела берутся из настоящих ответов функций (страница тренировок, покупки с calculated_data,
+записи питания за день). Размер «по проводу» — длина base64, в котором платформа отдаёт
+сжатое тело шлюзу. В конце проверяется, что ответ с Accept-Encoding распаковывается в
+то же тело, что и без него.
+
+    DATABASE_URL=postgresql://postgres@localhost/bench python benchmarks/bench_compress.py --iterations 50
+"""
+import argparse
+import base64
+import gzip
+import time
+from datetime import date, timedelta
+
+from _common import apply_migrations, database_url, ensure_user, load_handler, make_event, percentile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def seed(user_id: int, entries: int) -> None:
+    today = date.today()
+    training = load_handler('training-log')
+    for i in range(entries):
+        training.handler(make_event('POST', body={
+            'user_id': user_id, 'exercise_name': f'Упражнение {i % 12}', 'sets': 3 + i % 3, 'reps': 6 + i % 6,
+            'weight': 40 + i % 45, 'notes': 'Разминка 10 минут, рабочие подходы без отказа' if i % 4 == 0 else '',
+            'date': (today - timedelta(days=i % 90)).isoformat()
+        }), None)
+
+    purchases = load_handler('purchases')
+    purchases.handler(make_event('POST', body={
+        'user_id': user_id,
+        'programs': [
+            {
+                'id': f'n{i}', 'title': f'ПИТАНИЕ {i}', 'category': 'nutrition', 'price': 1490 + i,
+                'calculatedData': {'height': 170 + i % 20, 'weight': 60 + i % 40, 'age': 20 + i % 30,
+                                   'calories': 2100 + i * 7 % 900, 'protein': 120 + i % 60, 'fats': 60 + i % 40, 'carbs': 250 + i % 120}
+            }
+            for i in range(entries // 2)
+        ]
+    }), None)
+
+    food = load_handler('food-log')
+    catalogue = food.get_catalogue()
+    items = [{'food_name': catalogue.name(i * 7 % len(catalogue)), 'grams': 50 + i % 250, 'date': today.isoformat()} for i in range(60)]
+    food.handler(make_event('POST', body={'action': 'add_foods', 'user_id': user_id, 'items': items[:food.MAX_BATCH_ITEMS]}), None)
+
+
+def codecs() -> list:
+    result = [(f'gzip {level}', lambda body, level=level: gzip.compress(body, compresslevel=level, mtime=0)) for level in (1, 4, 6, 9)]
+    if brotli is not None:
+        result += [(f'br {quality}', lambda body, quality=quality: brotli.compress(body, quality=quality)) for quality in (1, 4, 6, 9, 11)]
+    return result
+
+
+def cpu_ms(compress, body: bytes, iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        started = time.process_time()
+        base64.b64encode(compress(body))
+        samples.append((time.process_time() - started) * 1000)
+    return percentile(samples, 50)
+
+
+def check_roundtrip(module, path: str) -> None:
+    plain = module.handler(make_event('GET', path), None)
+    for encoding, decompress in (('gzip', gzip.decompress), ('br', brotli.decompress if brotli else None)):
+        if decompress is None:
+            continue
+        packed = module.handler(make_event('GET', path, headers={'Accept-Encoding': f'{encoding}, deflate'}), None)
+        assert packed['isBase64Encoded'] and packed['headers']['Content-Encoding'] == encoding, packed['headers']
+        assert decompress(base64.b64decode(packed['body'])).decode() == plain['body']
+    refused = module.handler(make_event('GET', path, headers={'Accept-Encoding': 'gzip;q=0'}), None)
+    assert not refused['isBase64Encoded'] and refused['body'] == plain['body']
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--entries', type=int, default=500)
+    parser.add_argument('--email', default='bench-compress@example.com')
+    args = parser.parse_args()
+
+    dsn = database_url()
+    apply_migrations(dsn)
+    user_id = ensure_user(dsn, args.email)
+    seed(user_id, args.entries)
+
+    payloads = [
+        ('training-log', 'страница тренировок', f'/?user_id={user_id}&limit=500'),
+        ('purchases', 'покупки', f'/?user_id={user_id}'),
+        ('food-log', 'записи питания за день', f'/?action=get_logs&user_id={user_id}&date={date.today().isoformat()}'),
+    ]
+    for function, title, path in payloads:
+        module = load_handler(function)
+        body = module.handler(make_event('GET', path), None)['body'].encode()
+        print(f'{title}: {len(body)} Б без сжатия')
+        for name, compress in codecs():
+            packed = compress(body)
+            wire = len(base64.b64encode(packed))
+            print(f'  {name:<8} {len(packed):>8} Б  base64 {wire:>8} Б ({wire / len(body):6.1%})  CPU p50={cpu_ms(compress, body, args.iterations):7.3f} ms')
+        check_roundtrip(module, path)
+    print('распаковка совпадает с телом без сжатия, q=0 отключает кодировку: ok')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Открытие приложения: четыре отдельных вызова против одного dashboard.
+
+Клиент при открытии запрашивает get_goals и get_logs за день у food-log, первую страницу
+training-log и список purchases. Сначала проверяется, что разделы dashboard совпадают
+с ответами этих вызовов. Затем оба варианта замеряются тёплыми (пул и кэши функций
+заполнены) и холодными: перед каждым вызовом пулы закрываются, а кэши очищаются, как
+в новых контейнерах. Пользователь заполняется как в bench_load.py.
+
+    DATABASE_URL=postgresql://postgres@localhost/bench python benchmarks/bench_dashboard.py --iterations 200
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import date
+
+import psycopg2
+
+from _common import apply_migrations, database_url, load_handler, make_event, report
+from bench_load import seed_users
+
+
+def load_function(function: str) -> tuple:
+    """handler функции вместе с её пулом и кэшем, чтобы сбрасывать их для холодного вызова"""
+    module = load_handler(function)
+    return module.handler, sys.modules['db'].get_pool(), sys.modules.get('cache')
+
+
+def separate_events(user_id: int, today: str) -> list:
+    return [
+        ('food-log', make_event('GET', f'/?action=get_goals&user_id={user_id}')),
+        ('food-log', make_event('GET', f'/?action=get_logs&user_id={user_id}&date={today}')),
+        ('training-log', make_event('GET', f'/?user_id={user_id}')),
+        ('purchases', make_event('GET', f'/?user_id={user_id}')),
+    ]
+
+
+def seed_extras(dsn: str, user_id: int, today: str) -> None:
+    conn = psycopg2.connect(dsn)
+    with conn, conn.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO user_nutrition_goals (user_id, calories_goal, protein_goal, fats_goal, carbs_goal) VALUES (%s, 2200, 140, 70, 250) "
+            "ON CONFLICT (user_id) DO NOTHING",
+            (user_id,)
+        )
+        cursor.execute("DELETE FROM purchases WHERE user_id = %s", (user_id,))
+        cursor.execute(
+            "INSERT INTO purchases (user_id, program_id, program_title, program_category, price, calculated_data) "
+            "SELECT %s, 's' || n, 'Программа ' || n, 'strength', 1990, '{\"weeks\": 8, \"days\": [1, 3, 5]}' FROM generate_series(1, 5) n",
+            (user_id,)
+        )
+        cursor.execute(
+            "INSERT INTO food_log (user_id, date, food_name, grams, calories, protein, fats, carbs) "
+            "SELECT %s, %s, 'Гречка', 150, 471, 18.9, 5, 93 FROM generate_series(1, 12)",
+            (user_id, today)
+        )
+    conn.close()
+
+
+def check_sections(functions: dict, user_id: int, today: str) -> None:
+    dashboard = json.loads(call(functions, 'food-log', make_event('GET', f'/?action=dashboard&user_id={user_id}&date={today}')))
+    separate = [json.loads(call(functions, function, event)) for function, event in separate_events(user_id, today)]
+    assert dashboard['goals'] == separate[0]['goals'] is not None
+    assert dashboard['food_logs'] == separate[1]['logs'] and dashboard['food_logs']
+    assert dashboard['training_logs'] == separate[2]['logs'] and dashboard['training_logs']
+    assert dashboard['purchases'] == separate[3]['purchases'] and dashboard['purchases']
+    trimmed = json.loads(call(functions, 'food-log', make_event('GET', f'/?action=dashboard&user_id={user_id}&date={today}&fields=goals,purchases')))
+    assert list(trimmed) == ['goals', 'purchases']
+
+
+def call(functions: dict, function: str, event: dict) -> str:
+    result = functions[function][0](event, None)
+    assert result['statusCode'] == 200, result['body'][:300]
+    return result['body']
+
+
+def reset_functions(functions: dict) -> None:
+    for _, pool, cache_module in functions.values():
+        pool.close_all()
+        if cache_module is not None:
+            cache_module.cache.local = cache_module.LocalCache()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    dsn = database_url()
+    apply_migrations(dsn)
+    today = date.today().isoformat()
+    user_id = seed_users(dsn, 1, 5000, 20_000)[0]
+    seed_extras(dsn, user_id, today)
+    functions = {function: load_function(function) for function in ('food-log', 'training-log', 'purchases')}
+    check_sections(functions, user_id, today)
+    print('разделы dashboard совпадают с ответами get_goals, get_logs, training-log и purchases: ok')
+
+    separate = separate_events(user_id, today)
+    combined = make_event('GET', f'/?action=dashboard&user_id={user_id}&date={today}')
+    for title, cold in (('тёплые', False), ('холодные соединения и кэши', True)):
+        four, one = [], []
+        for _ in range(args.iterations):
+            if cold:
+                reset_functions(functions)
+            started = time.perf_counter()
+            for function, event in separate:
+                call(functions, function, event)
+            four.append((time.perf_counter() - started) * 1000)
+            if cold:
+                reset_functions(functions)
+            started = time.perf_counter()
+            call(functions, 'food-log', combined)
+            one.append((time.perf_counter() - started) * 1000)
+        report(f'{title}: 4 вызова подряд', four)
+        report(f'{title}: dashboard', one)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Условные GET: полный ответ против 304 по If-None-Match для списков и аналитики.
+
+Для каждого эндпоинта печатает время и размер полного ответа и ответа 304, а затем
+проверяет, что каждая запись (добавление, удаление, цели, правка, покупка) меняет ETag.
+
+    DATABASE_URL=postgresql://postgres@localhost/bench python benchmarks/bench_etag.py --iterations 300
+"""
+import argparse
+import json
+import os
+import time
+from datetime import date, timedelta
+
+from _common import apply_migrations, database_url, ensure_user, load_handler, make_event, report
+
+
+def seed(user_id: int, entries: int) -> None:
+    food = load_handler('food-log')
+    catalogue = food.get_catalogue()
+    today = date.today()
+    items = [
+        {'food_name': catalogue.name(i % len(catalogue)), 'grams': 50 + i % 200, 'date': (today - timedelta(days=i % 7)).isoformat()}
+        for i in range(entries)
+    ]
+    for start in range(0, len(items), food.MAX_BATCH_ITEMS):
+        food.handler(make_event('POST', body={'action': 'add_foods', 'user_id': user_id, 'items': items[start:start + food.MAX_BATCH_ITEMS]}), None)
+
+    training = load_handler('training-log')
+    for i in range(entries):
+        training.handler(make_event('POST', body={
+            'user_id': user_id, 'exercise_name': f'Упражнение {i % 10}', 'sets': 3, 'reps': 8, 'weight': 50 + i % 30,
+            'date': (today - timedelta(days=i % 60)).isoformat()
+        }), None)
+
+    purchases = load_handler('purchases')
+    purchases.handler(make_event('POST', body={
+        'user_id': user_id,
+        'programs': [{'id': i, 'title': f'Программа {i}', 'category': 'strength', 'price': 990, 'calculatedData': {'weeks': 8}} for i in range(20)]
+    }), None)
+
+
+def measure(module, event: dict, iterations: int, status: int) -> tuple:
+    samples = []
+    size = 0
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = module.handler(event, None)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert result['statusCode'] == status, result
+        size = len(result['body'].encode())
+    return samples, size
+
+
+def etag(module, path: str) -> str:
+    result = module.handler(make_event('GET', path), None)
+    assert result['statusCode'] == 200, result
+    return result['headers']['ETag']
+
+
+def check_writes(user_id: int) -> None:
+    today = date.today().isoformat()
+    food = load_handler('food-log')
+    path = f'/?action=get_logs&user_id={user_id}&date={today}'
+    before = etag(food, path)
+    added = food.handler(make_event('POST', body={'user_id': user_id, 'date': today, 'food_name': food.get_catalogue().name(0), 'grams': 50}), None)
+    after_add = etag(food, path)
+    assert after_add != before, 'add_food не сменил ETag'
+    food.handler(make_event('DELETE', body={'id': json.loads(added['body'])['id'], 'user_id': user_id}), None)
+    assert etag(food, path) != after_add, 'DELETE food-log не сменил ETag'
+
+    summary = f'/?action=daily_summary&user_id={user_id}'
+    before = etag(food, summary)
+    food.handler(make_event('POST', body={'action': 'set_goals', 'user_id': user_id, 'calories_goal': 2100, 'protein_goal': 110, 'fats_goal': 70, 'carbs_goal': 250}), None)
+    assert etag(food, summary) != before, 'set_goals не сменил ETag'
+
+    training = load_handler('training-log')
+    path = f'/?user_id={user_id}'
+    before = etag(training, path)
+    created = training.handler(make_event('POST', body={'user_id': user_id, 'exercise_name': 'Проверка', 'sets': 1, 'reps': 1, 'weight': 10, 'date': today}), None)
+    after_post = etag(training, path)
+    assert after_post != before, 'POST training-log не сменил ETag'
+    training.handler(make_event('PUT', body={'id': json.loads(created['body'])['id'], 'user_id': user_id, 'weight': 12}), None)
+    assert etag(training, path) != after_post, 'PUT training-log не сменил ETag'
+
+    purchases = load_handler('purchases')
+    path = f'/?user_id={user_id}'
+    before = etag(purchases, path)
+    purchases.handler(make_event('POST', body={'user_id': user_id, 'programs': [{'id': 999, 'title': 'Проверка', 'category': 'cardio', 'price': 1}]}), None)
+    assert etag(purchases, path) != before, 'POST purchases не сменил ETag'
+    print('ETag меняется после каждой записи: ok')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=300)
+    parser.add_argument('--entries', type=int, default=700)
+    parser.add_argument('--email', default='bench-etag@example.com')
+    args = parser.parse_args()
+
+    dsn = database_url()
+    apply_migrations(dsn)
+    user_id = ensure_user(dsn, args.email)
+    seed(user_id, args.entries)
+
+    endpoints = [
+        ('training-log', f'/?user_id={user_id}&limit=500'),
+        ('training-log', f'/?action=analytics&user_id={user_id}'),
+        ('food-log', f'/?action=daily_summary&user_id={user_id}'),
+        ('food-log', f'/?action=get_logs&user_id={user_id}&date={date.today().isoformat()}'),
+        ('purchases', f'/?user_id={user_id}'),
+    ]
+    os.environ['CACHE_TTL'] = '0'
+    for function, path in endpoints:
+        module = load_handler(function)
+        tag = etag(module, path)
+        full, full_size = measure(module, make_event('GET', path), args.iterations, 200)
+        cached, cached_size = measure(module, make_event('GET', path, headers={'If-None-Match': tag}), args.iterations, 304)
+        title = f'{function} {path.split("action=")[1].split("&")[0] if "action=" in path else "список"}'
+        report(f'{title} 200 ({full_size} Б)', full)
+        report(f'{title} 304 ({cached_size} Б)', cached)
+
+    check_writes(user_id)
+
+
+if __name__ == '__main__':
+    main()
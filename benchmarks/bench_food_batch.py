@@ -0,0 +1,49 @@
+"""Запись приёма пищи: N отдельных POST против одного add_foods.
+
+    DATABASE_URL=postgresql://postgres@localhost/bench python benchmarks/bench_food_batch.py
+"""
+import argparse
+import time
+
+from _common import apply_migrations, database_url, ensure_user, load_handler, make_event, percentile
+
+
+def meal(catalogue, size: int) -> list:
+    return [{'food_name': catalogue.name(i % len(catalogue)), 'grams': 50 + 10 * i, 'date': '2026-01-11'} for i in range(size)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 10, 15])
+    args = parser.parse_args()
+
+    dsn = database_url()
+    apply_migrations(dsn)
+    user_id = ensure_user(dsn)
+    module = load_handler('food-log')
+    catalogue = module.get_catalogue()
+
+    for size in args.sizes:
+        items = meal(catalogue, size)
+        single_events = [make_event('POST', body={'user_id': user_id, **item}) for item in items]
+        batch_event = make_event('POST', body={'action': 'add_foods', 'user_id': user_id, 'items': items})
+
+        looped, batched = [], []
+        for _ in range(args.iterations):
+            started = time.perf_counter()
+            for event in single_events:
+                assert module.handler(event, None)['statusCode'] == 200
+            looped.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            assert module.handler(batch_event, None)['statusCode'] == 200
+            batched.append((time.perf_counter() - started) * 1000)
+
+        p50_looped, p50_batched = percentile(looped, 50), percentile(batched, 50)
+        print(f'{size:>3} продуктов: по одному p50={p50_looped:7.2f} ms  add_foods p50={p50_batched:7.2f} ms  '
+              f'ускорение x{p50_looped / p50_batched:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Скорость поиска продуктов на синтетическом каталоге (по умолчанию 100 000 позиций).
+
+Сравнивает линейный перебор каталога (как раньше в search_food) с FoodSearchIndex,
+собранным в памяти, и с тем же индексом из foods.bin поверх mmap, как в функции.
+
+    python benchmarks/bench_food_search.py --size 100000
+"""
+import argparse
+import gc
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _common import load_handler, percentile
+
+MODIFIERS = ['домашний', 'отварной', 'запечённый', 'жареный', 'фермерский', 'копчёный', 'тушёный', 'свежий', 'сушёный', 'маринованный']
+BRANDS = ['Простоквашино', 'Агуша', 'Мираторг', 'Черкизово', 'Вкусвилл', 'Петелинка', 'Савушкин', 'Экомилк']
+# Начало первого названия в выдаче для запросов с опечатками: время поиска без верного ответа ничего не значит
+EXPECTED_TOP = {'курица грутка': 'Курица грудка', 'тварог': 'Творог', 'копченый лосось': 'Лосось копчёный'}
+QUERIES = ['кур', 'грудка', 'курица грутка', 'тварог', 'сыр', 'мёд', 'о', 'бо', 'ъъ', 'мираторг', 'копченый лосось', 'нет такого продукта']
+
+
+def synthetic_catalogue(base_names: list, size: int) -> list:
+    rng = random.Random(42)
+    names = list(base_names)
+    seen = set(names)
+    while len(names) < size:
+        name = f'{rng.choice(base_names)} {rng.choice(MODIFIERS)} {rng.choice(BRANDS)} {rng.randint(1, 999)}'
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+def linear_search(names: list, query: str, limit: int = 20) -> list:
+    query = query.lower()
+    return [name for name in names if query in name.lower()][:limit]
+
+
+def measure(search, queries: list, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        for query in queries:
+            started = time.perf_counter()
+            search(query)
+            samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    module = load_handler('food-log')
+    names = synthetic_catalogue(module.get_catalogue().names(), args.size)
+
+    started = time.perf_counter()
+    index = module.FoodSearchIndex.build(names)
+    gc.freeze()
+    print(f'построение индекса на {len(names)} позиций: {(time.perf_counter() - started) * 1000:.1f} ms')
+
+    catalogue = sys.modules['catalogue']
+    with tempfile.TemporaryDirectory() as directory:
+        source, compiled = Path(directory) / 'foods.json', Path(directory) / 'foods.bin'
+        source.write_text(json.dumps({name: {column: 0 for column in catalogue.COLUMNS} for name in names}), encoding='utf-8')
+        catalogue.compile_catalogue(str(source), str(compiled))
+        started = time.perf_counter()
+        mapped = catalogue.Catalogue(str(compiled)).search_index()
+        print(f'открытие индекса из foods.bin: {(time.perf_counter() - started) * 1000:.3f} ms')
+
+        variants = [
+            ('linear', lambda q: linear_search(names, q)),
+            ('index', lambda q: index.search(q, limit=20)),
+            ('mmap', lambda q: mapped.search(q, limit=20)),
+        ]
+        for title, search in variants:
+            samples = measure(search, QUERIES, args.repeat if title != 'linear' else 1)
+            print(f'{title:<8} p50={percentile(samples, 50):8.3f} ms  p99={percentile(samples, 99):8.3f} ms  max={max(samples):8.3f} ms')
+        assert all(index.search(query) == mapped.search(query) for query in QUERIES)
+        for query, expected in EXPECTED_TOP.items():
+            top = names[mapped.search(query, limit=1)[0]]
+            assert top.startswith(expected), f'{query}: первым найдено {top!r}, ожидалось {expected}…'
+
+        print()
+        for query in QUERIES:
+            memory = measure(lambda q: index.search(q, limit=20), [query], args.repeat)
+            samples = measure(lambda q: mapped.search(q, limit=20), [query], args.repeat)
+            top = [names[i] for i in mapped.search(query, limit=3)]
+            print(f'{query:<22} p50={percentile(memory, 50):7.3f} ms  mmap p50={percentile(samples, 50):7.3f} ms  {top}')
+
+
+if __name__ == '__main__':
+    main()
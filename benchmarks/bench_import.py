@@ -0,0 +1,179 @@
+"""Массовый импорт истории через COPY против одного POST на строку, и экспорт.
+
+Для каждого дневника генерирует --rows строк в CSV и JSONL и грузит их действием import.
+Поштучная загрузка замеряется на --single строках и пересчитывается на весь объём.
+После импорта недельные и дневные итоги сверяются с полным пересчётом по таблицам,
+а экспорт, загруженный обратно, должен дать тот же экспорт.
+
+    DATABASE_URL=postgresql://postgres@localhost/bench python benchmarks/bench_import.py --rows 100000
+"""
+import argparse
+import csv
+import io
+import json
+import time
+from datetime import date, timedelta
+
+import psycopg2
+
+from _common import apply_migrations, database_url, ensure_user, load_handler, make_event
+
+
+def training_records(count: int) -> list:
+    start = date.today() - timedelta(days=5 * 365)
+    return [
+        {
+            'date': (start + timedelta(days=i * 5 * 365 // count)).isoformat(),
+            'exercise_name': f'Упражнение {i % 25}', 'sets': 3 + i % 3, 'reps': 1 + i % 12,
+            'weight': f'{20 + i % 180}.{i % 4 * 25:02d}', 'notes': 'после отпуска, "лёгкая"\tнеделя' if i % 50 == 0 else '',
+            'program_id': 's1' if i % 3 == 0 else ''
+        }
+        for i in range(count)
+    ]
+
+
+def food_records(catalogue, count: int) -> list:
+    start = date.today() - timedelta(days=5 * 365)
+    records = []
+    for i in range(count):
+        record = {'date': (start + timedelta(days=i * 5 * 365 // count)).isoformat(), 'food_name': catalogue.name(i * 7 % len(catalogue)), 'grams': 50 + i % 300}
+        if i % 10 == 0:
+            record.update(food_name=f'Домашнее блюдо {i % 40}', calories=180.5, protein=12, fats=7.25, carbs=20)
+        records.append(record)
+    return records
+
+
+def to_csv(records: list) -> str:
+    columns = sorted({key for record in records for key in record})
+    out = io.StringIO()
+    writer = csv.DictWriter(out, columns)
+    writer.writeheader()
+    writer.writerows(records)
+    return out.getvalue()
+
+
+def to_jsonl(records: list) -> str:
+    return ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+
+
+def reset(dsn: str, user_id: int) -> None:
+    conn = psycopg2.connect(dsn)
+    with conn, conn.cursor() as cursor:
+        for table in ('training_log', 'training_weekly_stats', 'food_log', 'food_log_daily', 'user_food_stats'):
+            cursor.execute(f"DELETE FROM {table} WHERE user_id = %s", (user_id,))
+    conn.close()
+
+
+def check_rollups(dsn: str, user_id: int) -> None:
+    module = load_handler('training-log')
+    conn = psycopg2.connect(dsn)
+    with conn, conn.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT exercise_name, date_trunc('week', date)::date, {module.WEEKLY_STATS_AGGREGATES}
+            FROM training_log WHERE user_id = %s GROUP BY 1, 2
+            EXCEPT SELECT exercise_name, week_start, entries, sets, reps, volume, best_weight, best_e1rm
+            FROM training_weekly_stats WHERE user_id = %s
+            """,
+            (user_id, user_id)
+        )
+        assert not cursor.fetchall(), 'training_weekly_stats расходится с training_log'
+        cursor.execute(
+            """
+            SELECT date, COUNT(*), SUM(calories), SUM(protein), SUM(fats), SUM(carbs) FROM food_log WHERE user_id = %s GROUP BY date
+            EXCEPT SELECT date, entries, calories, protein, fats, carbs FROM food_log_daily WHERE user_id = %s
+            """,
+            (user_id, user_id)
+        )
+        assert not cursor.fetchall(), 'food_log_daily расходится с food_log'
+        # score складывается в плавающей точке, поэтому сверяется с допуском
+        cursor.execute(
+            """
+            SELECT COALESCE(f.food_name, s.food_name) FROM (
+                SELECT food_name, COUNT(*) AS entries, SUM(grams) AS grams, SUM(calories) AS calories, SUM(protein) AS protein,
+                    SUM(fats) AS fats, SUM(carbs) AS carbs, food_score_sum(food_score(date)) AS score
+                FROM food_log WHERE user_id = %s GROUP BY food_name
+            ) f
+            FULL JOIN (SELECT * FROM user_food_stats WHERE user_id = %s AND entries > 0) s ON s.food_name = f.food_name
+            WHERE (f.entries, f.grams, f.calories, f.protein, f.fats, f.carbs) IS DISTINCT FROM (s.entries, s.grams, s.calories, s.protein, s.fats, s.carbs)
+                OR abs(f.score - s.score) > 1e-9
+            """,
+            (user_id, user_id)
+        )
+        assert not cursor.fetchall(), 'user_food_stats расходится с food_log'
+    conn.close()
+
+
+def timed(module, event: dict) -> tuple:
+    started = time.perf_counter()
+    result = module.handler(event, None)
+    elapsed = time.perf_counter() - started
+    assert result['statusCode'] == 200, result['body'][:300]
+    return result, elapsed
+
+
+def check_import_into_week(dsn: str, module, user_id: int) -> None:
+    """Импорт во вторник недели, где уже есть записи за понедельник и пятницу: пятница не теряется"""
+    reset(dsn, user_id)
+    monday = date.today() - timedelta(days=date.today().weekday(), weeks=1)
+    for day in (monday, monday + timedelta(days=4)):
+        module.handler(make_event('POST', body={'user_id': user_id, 'date': day.isoformat(), 'exercise_name': 'Присед', 'sets': 3, 'reps': 5, 'weight': 100}), None)
+    body = to_jsonl([{'date': (monday + timedelta(days=1)).isoformat(), 'exercise_name': 'Присед', 'sets': 2, 'reps': 5, 'weight': 90}])
+    result = module.handler(make_event('POST', f'/?action=import&format=jsonl&user_id={user_id}') | {'body': body}, None)
+    assert result['statusCode'] == 200, result['body'][:300]
+    check_rollups(dsn, user_id)
+    print('  импорт в неделю с более поздними записями не теряет их из итогов: ok')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--single', type=int, default=500)
+    parser.add_argument('--email', default='bench-import@example.com')
+    args = parser.parse_args()
+
+    dsn = database_url()
+    apply_migrations(dsn)
+    user_id = ensure_user(dsn, args.email)
+
+    food = load_handler('food-log')
+    datasets = [
+        ('training-log', training_records(args.rows),
+         lambda record: {'user_id': user_id, **{key: value for key, value in record.items() if value != ''}}),
+        ('food-log', food_records(food.get_catalogue(), args.rows),
+         lambda record: {'user_id': user_id, 'date': record['date'], 'food_name': food.get_catalogue().name(0), 'grams': record['grams']}),
+    ]
+
+    for function, records, single_body in datasets:
+        module = load_handler(function)
+        reset(dsn, user_id)
+        started = time.perf_counter()
+        for record in records[:args.single]:
+            module.handler(make_event('POST', body=single_body(record)), None)
+        per_row = (time.perf_counter() - started) / args.single
+        print(f'{function}: по одному POST {per_row * 1000:.2f} ms/строка, {args.rows} строк ≈ {per_row * args.rows:.0f} с')
+
+        for fmt, text in (('csv', to_csv(records)), ('jsonl', to_jsonl(records))):
+            reset(dsn, user_id)
+            result, elapsed = timed(module, make_event('POST', f'/?action=import&format={fmt}&user_id={user_id}', headers={'Content-Type': 'text/plain'}) | {'body': text})
+            assert json.loads(result['body'])['imported'] == args.rows
+            check_rollups(dsn, user_id)
+            print(f'  import {fmt:<5} {len(text) / 1e6:6.1f} МБ  {elapsed:6.2f} с  ({args.rows / elapsed:,.0f} строк/с)')
+
+        for fmt in ('csv', 'jsonl'):
+            result, elapsed = timed(module, make_event('GET', f'/?action=export&format={fmt}&user_id={user_id}'))
+            exported = result['body']
+            print(f'  export {fmt:<5} {len(exported) / 1e6:6.1f} МБ  {elapsed:6.2f} с')
+            reset(dsn, user_id)
+            result, _ = timed(module, make_event('POST', f'/?action=import&format={fmt}&user_id={user_id}') | {'body': exported})
+            assert json.loads(result['body'])['imported'] == args.rows
+            check_rollups(dsn, user_id)
+            assert module.handler(make_event('GET', f'/?action=export&format={fmt}&user_id={user_id}'), None)['body'] == exported
+        print('  итоги совпадают с пересчётом, экспорт после обратной загрузки не меняется: ok')
+        if function == 'training-log':
+            check_import_into_week(dsn, module, user_id)
+    reset(dsn, user_id)
+
+
+if __name__ == '__main__':
+    main()
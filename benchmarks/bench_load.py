@@ -0,0 +1,343 @@
+"""Нагрузочный прогон: сценарии из backend/*/tests.json в заданной пропорции и параллельно.
+
+Сначала база заполняется правдоподобными данными: --users пользователей, у каждого
+--training-rows подходов и --food-rows записей питания (загружаются действием import).
+Затем --processes процессов (как контейнеры функции), в каждом --threads потоков на
+общем пуле соединений, --duration секунд вызывают handler всех функций напрямую.
+Сценарии выбираются случайно с весами: чтение — 10, запись — 1, свои веса задаёт
+--weight "часть названия=вес" (0 — исключить сценарий). user_id в пути и теле заменяется
+на случайного из заполненных пользователей, email регистрации и idempotency_key —
+на уникальные, чтобы запросы не повторяли один и тот же ответ.
+
+По каждому сценарию выводятся запросов в секунду, p50/p95/p99, среднее число обращений
+к базе на запрос (команды, BEGIN, COMMIT и ROLLBACK) и ответы с неожиданным статусом;
+в итоге — общая пропускная способность и пиковая память процессов.
+
+--save-baseline FILE записывает результаты в JSON, --compare FILE сравнивает с ним и
+завершается с кодом 1, если задержка выросла больше чем на --tolerance и больше чем на
+--min-delta-ms (у сценариев хотя бы с --min-requests запросами), стало больше обращений
+к базе, упала пропускная способность, выросла память или появились ошибки. Обращения
+у функций с кэшем зависят от попаданий в него, поэтому регрессией считается рост хотя
+бы на 0.5 на запрос или больше чем на --tolerance.
+
+    DATABASE_URL=postgresql://postgres@localhost/bench python benchmarks/bench_load.py --duration 20 --threads 4 --save-baseline load.json
+    DATABASE_URL=postgresql://postgres@localhost/bench python benchmarks/bench_load.py --duration 20 --threads 4 --compare load.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import psycopg2
+from psycopg2 import extensions
+
+from _common import BACKEND, apply_migrations, database_url, ensure_user, load_handler, make_event, percentile
+from bench_import import food_records, reset, to_jsonl, training_records
+
+FUNCTIONS = ['auth', 'purchases', 'training-log', 'food-log']
+READ_WEIGHT, WRITE_WEIGHT = 10, 1
+
+_round_trips = threading.local()
+
+
+def count_round_trips(count: int = 1) -> None:
+    _round_trips.value = getattr(_round_trips, 'value', 0) + count
+
+
+def take_round_trips() -> int:
+    value = getattr(_round_trips, 'value', 0)
+    _round_trips.value = 0
+    return value
+
+
+_counting_cursors = {}
+
+
+def counting_cursor(factory):
+    """Подкласс курсора, считающий каждую команду, а также неявный BEGIN перед первой в транзакции"""
+    if factory not in _counting_cursors:
+        class CountingCursor(factory):
+            def _count(self, statements: int) -> None:
+                idle = self.connection.status == extensions.STATUS_READY and not self.connection.autocommit
+                count_round_trips(statements + idle)
+
+            def execute(self, query, vars=None):
+                self._count(1)
+                return super().execute(query, vars)
+
+            def executemany(self, query, vars_list):
+                vars_list = list(vars_list)
+                self._count(len(vars_list))
+                return super().executemany(query, vars_list)
+
+            def copy_expert(self, sql, file, size=8192):
+                self._count(1)
+                return super().copy_expert(sql, file, size)
+
+        _counting_cursors[factory] = CountingCursor
+    return _counting_cursors[factory]
+
+
+class CountingConnection(extensions.connection):
+    def cursor(self, *args, **kwargs):
+        kwargs['cursor_factory'] = counting_cursor(kwargs.get('cursor_factory') or self.cursor_factory or extensions.cursor)
+        return super().cursor(*args, **kwargs)
+
+    def commit(self):
+        if self.status != extensions.STATUS_READY:
+            count_round_trips()
+        return super().commit()
+
+    def rollback(self):
+        if self.status != extensions.STATUS_READY:
+            count_round_trips()
+        return super().rollback()
+
+
+def load_scenarios(functions: list, weights: list) -> list:
+    """(функция, сценарий из tests.json, вес) для всех сценариев с ненулевым весом"""
+    overrides = []
+    for item in weights:
+        name, _, weight = item.rpartition('=')
+        overrides.append((name.lower(), float(weight)))
+
+    scenarios = []
+    for function in functions:
+        with open(BACKEND / function / 'tests.json', encoding='utf-8') as f:
+            tests = json.load(f)['tests']
+        for test in tests:
+            weight = READ_WEIGHT if test['method'] == 'GET' else WRITE_WEIGHT
+            key = f'{function}: {test["name"]}'
+            for name, value in overrides:
+                if name in key.lower():
+                    weight = value
+            if weight > 0:
+                scenarios.append((function, test, weight))
+    return scenarios
+
+
+def scenario_key(scenario: tuple) -> str:
+    return f'{scenario[0]}: {scenario[1]["name"]}'
+
+
+def make_request(test: dict, user_id: int, unique: str) -> dict:
+    """Событие для сценария от имени user_id; email регистрации и idempotency_key делаются уникальными"""
+    parts = urlsplit(test['path'])
+    query = [(name, str(user_id) if name == 'user_id' else value) for name, value in parse_qsl(parts.query)]
+    path = f'{parts.path}?{urlencode(query)}' if query else parts.path
+
+    body = test.get('body')
+    if isinstance(body, dict):
+        body = dict(body)
+        if 'user_id' in body:
+            body['user_id'] = user_id
+        if 'idempotency_key' in body:
+            body['idempotency_key'] = f'{body["idempotency_key"]}-{unique}'
+        if body.get('action') == 'register':
+            body['email'] = f'load-{unique}@bench.local'
+    return make_event(test['method'], path, body)
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def worker(functions: list, weights: list, user_ids: list, threads: int, duration: float, start_at: float, seed: int) -> dict:
+    psycopg2.connect = partial(psycopg2.connect, connection_factory=CountingConnection)
+    handlers = {function: load_handler(function).handler for function in functions}
+    scenarios = load_scenarios(functions, weights)
+    run_id = uuid.uuid4().hex[:8]
+
+    def call(scenario: tuple, rng: random.Random, number: int) -> tuple:
+        function, test, _ = scenario
+        event = make_request(test, rng.choice(user_ids), f'{run_id}-{seed}-{threading.get_ident()}-{number}')
+        take_round_trips()
+        started = time.perf_counter()
+        status = handlers[function](event, None)['statusCode']
+        elapsed = (time.perf_counter() - started) * 1000
+        return elapsed, take_round_trips(), status == test['expectedStatus']
+
+    for number, scenario in enumerate(scenarios):
+        call(scenario, random.Random(seed), -number - 1)
+    rss_after_warmup = peak_rss_mb()
+
+    def loop(thread: int) -> list:
+        rng = random.Random(seed * 1000 + thread)
+        samples = []
+        time.sleep(max(0.0, start_at - time.time()))
+        deadline = start_at + duration
+        while time.time() < deadline:
+            index = rng.choices(range(len(scenarios)), weights=[weight for _, _, weight in scenarios])[0]
+            samples.append((index, *call(scenarios[index], rng, len(samples))))
+        return samples
+
+    with ThreadPoolExecutor(threads) as executor:
+        samples = [sample for result in executor.map(loop, range(threads)) for sample in result]
+    return {
+        'samples': [(scenario_key(scenarios[index]), *rest) for index, *rest in samples],
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_growth_mb': peak_rss_mb() - rss_after_warmup
+    }
+
+
+def seed_users(dsn: str, count: int, training_rows: int, food_rows: int) -> list:
+    """Пользователи load-<i>@bench.local с training_rows подходами и food_rows записями питания"""
+    user_ids = [ensure_user(dsn, f'load-{i}@bench.local') for i in range(count)]
+    training = to_jsonl(training_records(training_rows))
+    food = load_handler('food-log')
+    meals = to_jsonl(food_records(food.get_catalogue(), food_rows))
+    modules = {'training-log': load_handler('training-log'), 'food-log': food}
+    for user_id in user_ids:
+        reset(dsn, user_id)
+        for function, body in (('training-log', training), ('food-log', meals)):
+            result = modules[function].handler(make_event('POST', f'/?action=import&format=jsonl&user_id={user_id}') | {'body': body}, None)
+            assert result['statusCode'] == 200, result['body'][:300]
+    return user_ids
+
+
+def ensure_login_user(functions: list) -> None:
+    """Пользователь из сценариев входа в auth/tests.json, иначе вход получит 401"""
+    if 'auth' not in functions:
+        return
+    auth = load_handler('auth')
+    with open(BACKEND / 'auth' / 'tests.json', encoding='utf-8') as f:
+        tests = json.load(f)['tests']
+    for test in tests:
+        body = test.get('body') or {}
+        if body.get('action') == 'login' and test['expectedStatus'] == 200:
+            auth.handler(make_event('POST', body={'action': 'register', 'email': body['email'], 'password': body['password'], 'name': 'Load'}), None)
+
+
+def summarize(results: list, duration: float) -> dict:
+    by_scenario = {}
+    for result in results:
+        for key, elapsed, round_trips, ok in result['samples']:
+            by_scenario.setdefault(key, []).append((elapsed, round_trips, ok))
+
+    def stats(samples: list) -> dict:
+        latencies = [elapsed for elapsed, _, _ in samples]
+        return {
+            'requests': len(samples),
+            'throughput': len(samples) / duration,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'round_trips': sum(round_trips for _, round_trips, _ in samples) / len(samples),
+            'errors': sum(not ok for _, _, ok in samples)
+        }
+
+    total = stats([sample for samples in by_scenario.values() for sample in samples])
+    total['peak_rss_mb'] = max(result['peak_rss_mb'] for result in results)
+    total['rss_growth_mb'] = max(result['rss_growth_mb'] for result in results)
+    return {'total': total, 'scenarios': {key: stats(samples) for key, samples in sorted(by_scenario.items())}}
+
+
+def print_summary(summary: dict) -> None:
+    print(f'{"сценарий":<55} {"запр/с":>8} {"p50":>8} {"p95":>8} {"p99":>8} {"к базе":>7} {"ошибки":>6}')
+    for key, stats in [*summary['scenarios'].items(), ('всего', summary['total'])]:
+        print(f'{key[:55]:<55} {stats["throughput"]:8.1f} {stats["p50"]:8.2f} {stats["p95"]:8.2f} {stats["p99"]:8.2f} '
+              f'{stats["round_trips"]:7.2f} {stats["errors"]:6}')
+    total = summary['total']
+    print(f'память: пик {total["peak_rss_mb"]:.0f} МБ на процесс, рост после прогрева {total["rss_growth_mb"]:.1f} МБ')
+
+
+def compare(summary: dict, baseline: dict, tolerance: float, min_delta_ms: float, min_requests: int) -> list:
+    """Регрессии относительно baseline: строки для вывода, пусто — регрессий нет"""
+    regressions = []
+    pairs = [('всего', summary['total'], baseline['total'])]
+    pairs += [(key, stats, baseline['scenarios'][key]) for key, stats in summary['scenarios'].items() if key in baseline['scenarios']]
+    for key, new, old in pairs:
+        for metric in ('p50', 'p95', 'p99'):
+            if min(new['requests'], old['requests']) < min_requests:
+                break
+            if new[metric] > old[metric] * (1 + tolerance) and new[metric] - old[metric] > min_delta_ms:
+                regressions.append(f'{key}: {metric} {old[metric]:.2f} → {new[metric]:.2f} ms')
+        extra = new['round_trips'] - old['round_trips']
+        if extra >= 0.5 or (extra > 0.05 and new['round_trips'] > old['round_trips'] * (1 + tolerance)):
+            regressions.append(f'{key}: обращений к базе {old["round_trips"]:.2f} → {new["round_trips"]:.2f}')
+        if new['errors'] > old['errors']:
+            regressions.append(f'{key}: ответов с неожиданным статусом {old["errors"]} → {new["errors"]}')
+
+    new, old = summary['total'], baseline['total']
+    if new['throughput'] < old['throughput'] * (1 - tolerance):
+        regressions.append(f'пропускная способность {old["throughput"]:.1f} → {new["throughput"]:.1f} запр/с')
+    if new['peak_rss_mb'] > old['peak_rss_mb'] * (1 + tolerance):
+        regressions.append(f'пиковая память {old["peak_rss_mb"]:.0f} → {new["peak_rss_mb"]:.0f} МБ')
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--functions', nargs='+', default=FUNCTIONS, choices=FUNCTIONS)
+    parser.add_argument('--weight', action='append', default=[], help='"часть названия сценария=вес", можно несколько раз')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--training-rows', type=int, default=5000)
+    parser.add_argument('--food-rows', type=int, default=20_000)
+    parser.add_argument('--skip-seed', action='store_true', help='использовать данные предыдущего прогона')
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--save-baseline', help='записать результаты в JSON')
+    parser.add_argument('--compare', help='сравнить с JSON, записанным --save-baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='допустимый рост задержки и памяти и падение пропускной способности')
+    parser.add_argument('--min-delta-ms', type=float, default=0.5, help='меньший рост задержки не считается регрессией')
+    parser.add_argument('--min-requests', type=int, default=50, help='задержку сценария с меньшим числом запросов не сравнивать')
+    args = parser.parse_args()
+
+    dsn = database_url()
+    apply_migrations(dsn)
+    os.environ['DB_POOL_MAX_SIZE'] = str(args.threads)
+    if args.skip_seed:
+        user_ids = [ensure_user(dsn, f'load-{i}@bench.local') for i in range(args.users)]
+    else:
+        started = time.perf_counter()
+        user_ids = seed_users(dsn, args.users, args.training_rows, args.food_rows)
+        print(f'{args.users} пользователей по {args.training_rows} подходов и {args.food_rows} записей питания: {time.perf_counter() - started:.1f} с')
+    ensure_login_user(args.functions)
+
+    start_at = time.time() + 3.0
+    # spawn, а не fork: соединения пула родителя не должны достаться процессам
+    with ProcessPoolExecutor(args.processes, mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = [
+            executor.submit(worker, args.functions, args.weight, user_ids, args.threads, args.duration, start_at, seed)
+            for seed in range(args.processes)
+        ]
+        results = [future.result() for future in futures]
+
+    summary = summarize(results, args.duration)
+    print(f'{args.processes} процесс(ов) × {args.threads} потоков, {args.duration:g} с')
+    print_summary(summary)
+
+    if args.save_baseline:
+        meta = {'processes': args.processes, 'threads': args.threads, 'duration': args.duration, 'users': args.users,
+                'weights': args.weight, 'created': datetime.now().isoformat(timespec='seconds')}
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, **summary}, f, ensure_ascii=False, indent=2)
+        print(f'baseline записан в {args.save_baseline}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        meta = baseline['meta']
+        if (meta['processes'], meta['threads'], meta['weights']) != (args.processes, args.threads, args.weight):
+            print(f'внимание: baseline снят с другими параметрами ({meta["processes"]} × {meta["threads"]}, веса {meta["weights"]})')
+        regressions = compare(summary, baseline, args.tolerance, args.min_delta_ms, args.min_requests)
+        for line in regressions:
+            print(f'РЕГРЕССИЯ {line}')
+        if regressions:
+            sys.exit(1)
+        print(f'по сравнению с {args.compare} ({meta["created"]}) регрессий нет')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""КБЖУ записей: поштучный round() в Python против одного вызова macros.calculate.
+
+Сначала проверяет, что результаты совпадают бит в бит на всех продуктах каталога
+с граммовками от 0.5 до 1000 с шагом 0.5 и на случайных дробных граммовках, затем
+замеряет оба способа на пачках разного размера. Базы данных не нужно.
+
+    python benchmarks/bench_macros.py --sizes 1 100 10000 100000
+"""
+import argparse
+import random
+import sys
+import time
+
+from _common import load_handler, percentile
+
+
+def python_macros(food_data: dict, grams) -> tuple:
+    """Прежний расчёт из food-log/index.py"""
+    multiplier = grams / 100
+    return (
+        round(food_data['calories'] * multiplier, 1),
+        round(food_data['protein'] * multiplier, 1),
+        round(food_data['fats'] * multiplier, 1),
+        round(food_data['carbs'] * multiplier, 1)
+    )
+
+
+def check(catalogue, macros, indices: list, grams: list) -> None:
+    expected = [python_macros(catalogue.nutrition(index), value) for index, value in zip(indices, grams)]
+    actual = [tuple(row) for row in macros.calculate(indices, grams).tolist()]
+    mismatches = [(index, value, want, got) for index, value, want, got in zip(indices, grams, expected, actual) if want != got]
+    assert not mismatches, mismatches[:5]
+
+
+def timed(func, iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return percentile(samples, 50)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000, 10000, 100000])
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    module = load_handler('food-log')
+    catalogue = module.get_catalogue()
+    macros = sys.modules['macros']
+    count = len(catalogue)
+
+    grid = [step / 2 for step in range(1, 2001)]
+    check(catalogue, macros, [i for i in range(count) for _ in grid], grid * count)
+    rng = random.Random(1)
+    check(catalogue, macros, [rng.randrange(count) for _ in range(200_000)], [rng.uniform(0.1, 3000) for _ in range(200_000)])
+    print(f'совпадает с round() на {count * len(grid) + 200_000} записях: ok')
+
+    for size in args.sizes:
+        indices = [rng.randrange(count) for _ in range(size)]
+        grams = [rng.choice((50, 100, 150, 200, 250)) + rng.randrange(100) / 4 for _ in range(size)]
+        iterations = max(3, args.iterations * 1000 // max(size, 1000))
+
+        def per_row():
+            return [python_macros(catalogue.nutrition(index), value) for index, value in zip(indices, grams)]
+
+        def vectorised():
+            return macros.calculate(indices, grams).tolist()
+
+        python_ms, numpy_ms = timed(per_row, iterations), timed(vectorised, iterations)
+        print(f'{size:>7} записей: Python {python_ms:9.3f} ms  numpy {numpy_ms:9.3f} ms  ×{python_ms / numpy_ms:5.1f}')
+
+    single = timed(lambda: macros.calculate_one(0, 150), 2000)
+    print(f'одна запись calculate_one p50={single * 1000:.1f} µs, Python p50={timed(lambda: python_macros(catalogue.nutrition(0), 150), 2000) * 1000:.1f} µs')
+
+
+if __name__ == '__main__':
+    main()
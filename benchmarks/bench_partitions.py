@@ -0,0 +1,218 @@
+"""training_log одной таблицей (до V0009) против месячных секций: запросы, вставка и VACUUM.
+
+В схемах bench_heap и bench_part создаются две копии training_log: прежняя, с индексами
+V0002/V0003, и секционированная, как в V0009, с секциями от ensure_monthly_partitions.
+Обе заполняются --rows строками --users пользователей за последние --months месяцев.
+Заполнение долгое, поэтому схемы переиспользуются, пока --rows, --users и --months не
+изменятся (или пока не указан --refill).
+
+Запросы повторяют обработчики training-log: первая страница списка, страница по курсору,
+месяц, выгрузка за год, пересчёт недели, удаление по id с датой и без неё (в откатываемой
+транзакции). Для каждого печатается число секций, которые реально читались (по EXPLAIN).
+Затем вставляются --inserts строк в текущий месяц и замеряется VACUUM всей прежней
+таблицы против секции текущего месяца.
+
+    DATABASE_URL=postgresql://postgres@localhost/bench python benchmarks/bench_partitions.py --rows 50000000
+"""
+import argparse
+import random
+import re
+import time
+from datetime import date, timedelta
+
+import psycopg2
+
+from _common import apply_migrations, database_url, report
+
+COLUMNS = """
+    id INTEGER NOT NULL DEFAULT nextval('training_log_id_seq'),
+    user_id INTEGER,
+    date DATE NOT NULL,
+    program_id VARCHAR(50),
+    exercise_name VARCHAR(255) NOT NULL,
+    sets INTEGER,
+    reps INTEGER,
+    weight DECIMAL(5,2),
+    notes TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+"""
+
+LAYOUTS = {
+    'bench_heap': f"""
+        CREATE SEQUENCE bench_heap.training_log_id_seq;
+        CREATE TABLE bench_heap.training_log ({COLUMNS.replace("'training_log_id_seq'", "'bench_heap.training_log_id_seq'")}, PRIMARY KEY (id));
+    """,
+    'bench_part': f"""
+        CREATE SEQUENCE bench_part.training_log_id_seq;
+        CREATE TABLE bench_part.training_log ({COLUMNS.replace("'training_log_id_seq'", "'bench_part.training_log_id_seq'")}, PRIMARY KEY (id, date))
+            PARTITION BY RANGE (date);
+        CREATE TABLE bench_part.training_log_default PARTITION OF bench_part.training_log DEFAULT;
+        SELECT ensure_monthly_partitions('bench_part.training_log', %(first_day)s, %(next_month)s);
+    """,
+}
+
+INDEXES = {
+    'bench_heap': """
+        CREATE INDEX ON bench_heap.training_log(user_id, date DESC, created_at DESC, id DESC);
+        CREATE INDEX ON bench_heap.training_log(date);
+    """,
+    'bench_part': """
+        CREATE INDEX ON bench_part.training_log(user_id, date DESC, created_at DESC, id DESC);
+    """,
+}
+
+# Строки пользователя равномерно разложены по дням периода, по нескольку за день
+FILL = """
+    INSERT INTO training_log (id, user_id, date, exercise_name, sets, reps, weight, notes, created_at)
+    SELECT n, n %% %(users)s + 1, day, 'Упражнение ' || (n %% 25), 4, 5 + n %% 7, 40 + n %% 90, '',
+        day + (n %% 86400) * interval '1 second'
+    FROM generate_series(%(start)s::bigint, %(stop)s::bigint) AS n,
+        LATERAL (SELECT %(first_day)s::date + ((n / %(users)s) %% %(days)s)::integer AS day) d
+"""
+
+FILL_CHUNK = 1_000_000
+
+PAGE = "SELECT id, date, exercise_name, sets, reps, weight, notes, created_at FROM training_log WHERE {} ORDER BY date DESC, created_at DESC, id DESC LIMIT 101"
+
+QUERIES = (
+    ('первая страница', PAGE.format('user_id = %(user_id)s')),
+    ('страница по курсору', PAGE.format('user_id = %(user_id)s AND date <= %(day)s AND (date, created_at, id) < (%(day)s, %(day)s::timestamp, 0)')),
+    ('месяц', PAGE.format('user_id = %(user_id)s AND date >= %(month)s AND date < %(month)s::date + 31')),
+    ('выгрузка за год', "SELECT date, exercise_name, sets, reps, weight, notes, program_id FROM training_log "
+                        "WHERE user_id = %(user_id)s AND date >= %(day)s::date - 365 AND date <= %(day)s ORDER BY date, created_at, id"),
+    ('пересчёт недели', "SELECT exercise_name, COUNT(*), MAX(weight) FROM training_log "
+                        "WHERE user_id = %(user_id)s AND date >= %(week)s AND date < %(week)s::date + 7 GROUP BY exercise_name"),
+    ('удаление по id', "DELETE FROM training_log WHERE id = %(id)s AND user_id = %(user_id)s"),
+    ('удаление по id и дате', "DELETE FROM training_log WHERE id = %(id)s AND user_id = %(user_id)s AND date = %(day)s"),
+)
+
+PARTITION = re.compile(r' on (training_log_(?:\d{4}_\d{2}|default))\b')
+
+INSERT = """
+    INSERT INTO training_log (user_id, date, exercise_name, sets, reps, weight, notes)
+    VALUES (%s, CURRENT_DATE, 'Жим лёжа', 4, 8, 80, '')
+"""
+
+
+def prepare(dsn: str, rows: int, users: int, months: int, refill: bool) -> date:
+    """Заполняет обе схемы, если их параметры изменились; возвращает первый день периода"""
+    today = date.today()
+    first_day = today.replace(day=1)
+    for _ in range(months - 1):
+        first_day = (first_day - timedelta(days=1)).replace(day=1)
+    days = (today - first_day).days + 1
+    settings = f'{rows} {users} {months} {first_day}'
+
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        for schema, create in LAYOUTS.items():
+            cursor.execute("SELECT obj_description(oid, 'pg_namespace') FROM pg_namespace WHERE nspname = %s", (schema,))
+            found = cursor.fetchone()
+            if found and found[0] == settings and not refill:
+                continue
+            print(f'{schema}: заполнение {rows} строк…', flush=True)
+            started = time.perf_counter()
+            cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE; CREATE SCHEMA {schema}")
+            cursor.execute(create, {'first_day': first_day, 'next_month': today + timedelta(days=31)})
+            cursor.execute(f"SET search_path = {schema}, public")
+            for start in range(1, rows + 1, FILL_CHUNK):
+                cursor.execute(FILL, {
+                    'users': users, 'days': days, 'first_day': first_day,
+                    'start': start, 'stop': min(rows, start + FILL_CHUNK - 1)
+                })
+            cursor.execute(INDEXES[schema])
+            cursor.execute(f"SELECT setval('{schema}.training_log_id_seq', %s)", (rows,))
+            cursor.execute(f"VACUUM ANALYZE {schema}.training_log")
+            cursor.execute(f"COMMENT ON SCHEMA {schema} IS %s", (settings,))
+            cursor.execute("RESET search_path")
+            print(f'{schema}: {time.perf_counter() - started:.1f} s', flush=True)
+    conn.close()
+    return first_day
+
+
+def scanned_partitions(cursor, query: str, params: dict) -> int:
+    """Сколько секций запрос действительно читал; у несекционированной таблицы 0"""
+    cursor.execute(f"EXPLAIN (ANALYZE, COSTS OFF, TIMING OFF) {query}", params)
+    plan = [row[0] for row in cursor.fetchall() if 'never executed' not in row[0]]
+    cursor.connection.rollback()
+    return len({match for line in plan for match in PARTITION.findall(line)})
+
+
+def random_params(rng: random.Random, users: int, rows: int, first_day: date) -> dict:
+    """Случайная строка из заполненных: её id, пользователь и дата, как их раскладывает FILL"""
+    log_id = rng.randrange(1, rows + 1)
+    day = first_day + timedelta(days=(log_id // users) % ((date.today() - first_day).days + 1))
+    return {
+        'user_id': log_id % users + 1,
+        'id': log_id,
+        'day': day,
+        'month': day.replace(day=1),
+        'week': day - timedelta(days=day.weekday()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=50_000_000)
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--months', type=int, default=60)
+    parser.add_argument('--iterations', type=int, default=300)
+    parser.add_argument('--inserts', type=int, default=2000)
+    parser.add_argument('--refill', action='store_true', help='заполнить схемы заново')
+    args = parser.parse_args()
+
+    dsn = database_url()
+    apply_migrations(dsn)
+    first_day = prepare(dsn, args.rows, args.users, args.months, args.refill)
+
+    connections = {}
+    for schema in LAYOUTS:
+        conn = psycopg2.connect(dsn)
+        with conn.cursor() as cursor:
+            cursor.execute(f"SET search_path = {schema}, public")
+        conn.commit()
+        connections[schema] = conn
+
+    for title, query in QUERIES:
+        rng = random.Random(title)
+        samples = {schema: [] for schema in LAYOUTS}
+        scanned = {}
+        for _ in range(args.iterations):
+            params = random_params(rng, args.users, args.rows, first_day)
+            for schema, conn in connections.items():
+                with conn.cursor() as cursor:
+                    started = time.perf_counter()
+                    cursor.execute(query, params)
+                    if cursor.description:
+                        cursor.fetchall()
+                    samples[schema].append((time.perf_counter() - started) * 1000)
+                    conn.rollback()
+                    scanned.setdefault(schema, scanned_partitions(cursor, query, params))
+        for schema in LAYOUTS:
+            report(f'{title}: {schema}, секций {scanned[schema]}', samples[schema])
+
+    for schema, conn in connections.items():
+        samples = []
+        with conn.cursor() as cursor:
+            for i in range(args.inserts):
+                started = time.perf_counter()
+                cursor.execute(INSERT, (i % args.users + 1,))
+                conn.commit()
+                samples.append((time.perf_counter() - started) * 1000)
+        report(f'вставка в текущий месяц: {schema}', samples)
+
+    current = f"training_log_{date.today():%Y_%m}"
+    for schema, table in (('bench_heap', 'training_log'), ('bench_part', current)):
+        conn = connections[schema]
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {schema}.{table} WHERE date = CURRENT_DATE AND exercise_name = 'Жим лёжа'")
+            started = time.perf_counter()
+            cursor.execute(f"VACUUM {schema}.{table}")
+            print(f'VACUUM {schema}.{table}: {(time.perf_counter() - started) * 1000:.1f} ms')
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Пропускная способность входа на одно ядро при разной стоимости хэширования паролей.
+
+Для каждой настройки считается время проверки пароля (то, что делает login) и число входов
+в секунду на ядро; с --processes N те же проверки идут параллельно в N процессах,
+чтобы увидеть, как пропускная способность масштабируется по ядрам контейнера.
+
+    python benchmarks/bench_passwords.py --processes 2
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from _common import load_handler, percentile
+
+SETTINGS = [
+    ('pbkdf2_sha256', {'iterations': 100_000}),
+    ('pbkdf2_sha256', {'iterations': 310_000}),
+    ('pbkdf2_sha256', {'iterations': 600_000}),
+    ('pbkdf2_sha256', {'iterations': 1_000_000}),
+    ('scrypt', {'n': 2 ** 14, 'r': 8, 'p': 1}),
+    ('scrypt', {'n': 2 ** 15, 'r': 8, 'p': 1}),
+    ('scrypt', {'n': 2 ** 16, 'r': 8, 'p': 1}),
+]
+
+
+def _passwords_module():
+    load_handler('auth')
+    return sys.modules['passwords']
+
+
+def verify_batch(algorithm: str, params: dict, stored: str, count: int) -> int:
+    passwords = _passwords_module()
+    passwords.use_hasher(passwords.HASHERS[algorithm](**params))
+    for _ in range(count):
+        assert passwords.verify_password('correct horse battery staple', stored)
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=10, help='проверок пароля на каждую настройку')
+    parser.add_argument('--processes', type=int, default=1)
+    args = parser.parse_args()
+
+    passwords = _passwords_module()
+    for algorithm, params in SETTINGS:
+        hasher = passwords.HASHERS[algorithm](**params)
+        passwords.use_hasher(hasher)
+        stored = passwords.hash_password('correct horse battery staple')
+
+        samples = []
+        for _ in range(args.iterations):
+            started = time.process_time()
+            passwords.verify_password('correct horse battery staple', stored)
+            samples.append((time.process_time() - started) * 1000)
+        per_core = 1000 / percentile(samples, 50)
+
+        title = f'{algorithm} ' + ' '.join(f'{key}={value}' for key, value in params.items())
+        line = f'{title:<36} p50={percentile(samples, 50):8.1f} ms  {per_core:7.1f} входов/с на ядро'
+
+        if args.processes > 1:
+            started = time.perf_counter()
+            with ProcessPoolExecutor(args.processes) as executor:
+                done = sum(executor.map(verify_batch, *zip(*[(algorithm, params, stored, args.iterations)] * args.processes)))
+            line += f'  {done / (time.perf_counter() - started):7.1f} входов/с на {args.processes} процессах'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Задержка холодных и тёплых вызовов функций с пулом соединений.
+
+Холодный вызов — пул пуст и соединение открывается заново (как раньше на каждый запрос),
+тёплый — соединение берётся из пула, оставшегося от предыдущего вызова. Затем соединения
+в пуле обрываются на сервере (pg_terminate_backend, как при рестарте Postgres), и следующий
+вызов должен пройти без 500 — повтором на новом соединении.
+
+    DATABASE_URL=postgresql://postgres@localhost/bench python benchmarks/bench_pool.py --iterations 200
+"""
+import argparse
+import sys
+import time
+
+import psycopg2
+
+from _common import apply_migrations, database_url, ensure_user, load_handler, make_event, report
+
+FUNCTIONS = ['auth', 'purchases', 'training-log', 'food-log']
+
+
+def event_for(function: str, user_id: int) -> dict:
+    if function == 'auth':
+        return make_event('POST', body={'action': 'login', 'email': 'bench@example.com', 'password': 'bench'})
+    if function == 'food-log':
+        return make_event('GET', f'/?action=get_goals&user_id={user_id}')
+    return make_event('GET', f'/?user_id={user_id}')
+
+
+def terminate_idle(dsn: str, pool) -> None:
+    """Обрывает на сервере все простаивающие соединения пула"""
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_terminate_backend(pid) FROM unnest(%s::integer[]) AS pid",
+            ([idle.info.backend_pid for idle, _ in pool._idle],)
+        )
+    conn.close()
+
+
+def run(dsn: str, function: str, user_id: int, iterations: int) -> None:
+    module = load_handler(function)
+    pool_module = sys.modules['db']
+    event = event_for(function, user_id)
+
+    cold, warm = [], []
+    for _ in range(iterations):
+        pool_module.get_pool().close_all()
+        started = time.perf_counter()
+        module.handler(event, None)
+        cold.append((time.perf_counter() - started) * 1000)
+
+    module.handler(event, None)
+    for _ in range(iterations):
+        started = time.perf_counter()
+        module.handler(event, None)
+        warm.append((time.perf_counter() - started) * 1000)
+
+    report(f'{function} cold', cold)
+    report(f'{function} warm', warm)
+
+    terminate_idle(dsn, pool_module.get_pool())
+    result = module.handler(event, None)
+    assert result['statusCode'] != 500, result['body']
+    print(f'{function}: вызов после обрыва соединений пула на сервере: {result["statusCode"]}, ok')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--function', choices=FUNCTIONS, action='append')
+    args = parser.parse_args()
+
+    dsn = database_url()
+    apply_migrations(dsn)
+    user_id = ensure_user(dsn)
+    for function in args.function or FUNCTIONS:
+        run(dsn, function, user_id, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
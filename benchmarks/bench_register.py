@@ -0,0 +1,88 @@
+"""Параллельная регистрация: сотни одновременных register на небольшом наборе email.
+
+Запросы распределяются по --processes процессам (как по контейнерам функции), в каждом —
+--threads потоков на общем пуле соединений. Все стартуют одновременно; каждый email
+повторяется несколько раз. Проверяется, что на каждый email ровно один ответ 200 и одна
+строка в users, а повторы получают 400, а не 500.
+
+С --baseline <git-ревизия> то же самое прогоняется на прежней версии функции.
+
+    DATABASE_URL=postgresql://postgres@localhost/bench python benchmarks/bench_register.py --registrations 400 --emails 100
+"""
+import argparse
+import os
+import tempfile
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import psycopg2
+
+from _common import BACKEND, apply_migrations, database_url, load_handler, make_event, report
+from bench_runtime import export_backend
+
+
+def worker(backend: str, emails: list, threads: int, start_at: float) -> list:
+    module = load_handler('auth', Path(backend))
+
+    def register(email: str) -> tuple:
+        event = make_event('POST', body={'action': 'register', 'email': email, 'password': 'bench', 'name': 'Bench'})
+        started = time.perf_counter()
+        status = module.handler(event, None)['statusCode']
+        return email, status, (time.perf_counter() - started) * 1000
+
+    time.sleep(max(0.0, start_at - time.time()))
+    with ThreadPoolExecutor(threads) as executor:
+        return list(executor.map(register, emails))
+
+
+def run(title: str, backend: Path, dsn: str, args) -> None:
+    run_id = uuid.uuid4().hex[:8]
+    emails = [f'reg-{run_id}-{i % args.emails}@bench.local' for i in range(args.registrations)]
+    chunks = [emails[i::args.processes] for i in range(args.processes)]
+    start_at = time.time() + 2.0
+
+    with ProcessPoolExecutor(args.processes) as executor:
+        futures = [executor.submit(worker, str(backend), chunk, args.threads, start_at) for chunk in chunks]
+        results = [result for future in futures for result in future.result()]
+
+    statuses = Counter(status for _, status, _ in results)
+    created = Counter(email for email, status, _ in results if status == 200)
+    conn = psycopg2.connect(dsn)
+    with conn, conn.cursor() as cursor:
+        cursor.execute("SELECT email, COUNT(*) FROM users WHERE email LIKE %s GROUP BY email", (f'reg-{run_id}-%',))
+        rows = dict(cursor.fetchall())
+    conn.close()
+
+    correct = (set(created) == set(emails) and all(count == 1 for count in created.values())
+               and all(rows.get(email) == 1 for email in set(emails)) and set(statuses) <= {200, 400})
+    report(f'{title}: register', [ms for _, _, ms in results])
+    print(f'  ответы {dict(sorted(statuses.items()))}, email с одним 200: {sum(count == 1 for count in created.values())}/{args.emails}, '
+          f'корректно: {"да" if correct else "НЕТ"}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--registrations', type=int, default=400)
+    parser.add_argument('--emails', type=int, default=100)
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--baseline', help='git-ревизия с прежней версией auth для сравнения')
+    args = parser.parse_args()
+
+    dsn = database_url()
+    apply_migrations(dsn)
+    # Меряем работу с базой, а не хэширование пароля
+    os.environ.setdefault('PASSWORD_PBKDF2_ITERATIONS', '1000')
+    os.environ['DB_POOL_MAX_SIZE'] = str(args.threads)
+
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as directory:
+            run(args.baseline, export_backend(args.baseline, directory), dsn, args)
+    run('рабочее дерево', BACKEND, dsn, args)
+
+
+if __name__ == '__main__':
+    main()
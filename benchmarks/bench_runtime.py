@@ -0,0 +1,94 @@
+"""Накладные расходы обработчиков на запрос: общий роутер runtime.py против прежних if/elif.
+
+Прежняя версия функций выгружается из git-ревизии (--baseline) во временный каталог,
+обе версии вызываются на одних и тех же событиях. Меряется процессорное время
+вызова (time.process_time_ns), чтобы ожидание ответа Postgres не маскировало разницу.
+
+    DATABASE_URL=postgresql://postgres@localhost/bench python benchmarks/bench_runtime.py --baseline HEAD~1
+"""
+import argparse
+import io
+import subprocess
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+import psycopg2
+
+from _common import BACKEND, ROOT, apply_migrations, database_url, ensure_user, load_handler, make_event, report
+
+
+def scenarios(user_id: int) -> list:
+    return [
+        ('OPTIONS', 'food-log', make_event('OPTIONS')),
+        ('400 без user_id', 'food-log', make_event('GET', '/?action=get_goals')),
+        ('поиск продукта', 'food-log', make_event('GET', '/?action=search_food&query=кур')),
+        ('записи питания', 'food-log', make_event('GET', f'/?user_id={user_id}')),
+        ('страница тренировок', 'training-log', make_event('GET', f'/?user_id={user_id}&limit=100')),
+        ('покупки', 'purchases', make_event('GET', f'/?user_id={user_id}')),
+    ]
+
+
+def export_backend(ref: str, directory: str) -> Path:
+    archive = subprocess.run(['git', 'archive', ref, 'backend'], cwd=ROOT, check=True, capture_output=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+    return Path(directory) / 'backend'
+
+
+def seed(dsn: str, user_id: int, rows: int) -> None:
+    conn = psycopg2.connect(dsn)
+    with conn, conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM training_log WHERE user_id = %s", (user_id,))
+        missing = rows - cursor.fetchone()[0]
+        if missing > 0:
+            cursor.execute(
+                "INSERT INTO training_log (user_id, date, exercise_name, sets, reps, weight) "
+                "SELECT %s, CURRENT_DATE - (n %% 365), 'Жим лёжа', 3, 8, 60 + n %% 40 FROM generate_series(1, %s) n",
+                (user_id, missing)
+            )
+        cursor.execute("SELECT COUNT(*) FROM food_log WHERE user_id = %s", (user_id,))
+        missing = rows - cursor.fetchone()[0]
+        if missing > 0:
+            cursor.execute(
+                "INSERT INTO food_log (user_id, date, food_name, grams, calories, protein, fats, carbs) "
+                "SELECT %s, CURRENT_DATE - (n %% 365), 'Гречка', 150, 471, 18.9, 5, 93 FROM generate_series(1, %s) n",
+                (user_id, missing)
+            )
+    conn.close()
+
+
+def measure(backend: Path, function: str, event: dict, iterations: int) -> list:
+    module = load_handler(function, backend)
+    expected = module.handler(event, None)['statusCode']
+    samples = []
+    for _ in range(iterations):
+        started = time.process_time_ns()
+        result = module.handler(event, None)
+        samples.append((time.process_time_ns() - started) / 1e6)
+        assert result['statusCode'] == expected
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--baseline', default='HEAD~1', help='git-ревизия с прежними обработчиками')
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--rows', type=int, default=100)
+    args = parser.parse_args()
+
+    dsn = database_url()
+    apply_migrations(dsn)
+    user_id = ensure_user(dsn)
+    seed(dsn, user_id, args.rows)
+
+    with tempfile.TemporaryDirectory() as directory:
+        baseline = export_backend(args.baseline, directory)
+        for title, function, event in scenarios(user_id):
+            report(f'{title} ({args.baseline})', measure(baseline, function, event, args.iterations))
+            report(f'{title} (рабочее дерево)', measure(BACKEND, function, event, args.iterations))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Сериализация длинной истории: RealDictCursor + dict + json.dumps(default=str) против RowSet.
+
+Обе версии читают одни и те же строки training_log и purchases; ответы сравниваются побайтно.
+Меряется процессорное время выборки и кодирования (time.process_time_ns).
+
+    DATABASE_URL=postgresql://postgres@localhost/bench python benchmarks/bench_serialize.py --rows 10000
+"""
+import argparse
+import json
+import sys
+import time
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from _common import apply_migrations, database_url, ensure_user, load_handler, report
+
+QUERIES = {
+    'training_log': "SELECT id, date, program_id, exercise_name, sets, reps, weight, notes, created_at FROM training_log WHERE user_id = %s ORDER BY date DESC, created_at DESC, id DESC",
+    'purchases': "SELECT id, program_id, program_title, program_category, price, calculated_data, purchased_at FROM purchases WHERE user_id = %s ORDER BY purchased_at DESC",
+}
+
+# Значения, на которых текстовое представление Postgres расходится с str()/isoformat()
+EDGE_CASES = """
+    SELECT 0.0000001::numeric AS tiny, -0.00000012::numeric AS negative_tiny, 'NaN'::numeric AS nan, 1e20::numeric AS large,
+        'infinity'::date AS infinite_date, '2024-02-29 10:00:00.12'::timestamp AS fraction, '2024-02-29 10:00:00'::timestamp AS whole,
+        NULL::numeric AS missing, true AS flag, 'Гречка "ядрица" \\ 100%%'::varchar AS name, '{"b": [1, 2.5], "a": null}'::jsonb AS data,
+        1.5::float8 AS ratio, 2147483648::bigint AS big
+"""
+
+
+def seed(dsn: str, user_id: int, rows: int) -> None:
+    conn = psycopg2.connect(dsn)
+    with conn, conn.cursor() as cursor:
+        cursor.execute("DELETE FROM training_log WHERE user_id = %s", (user_id,))
+        cursor.execute("DELETE FROM purchases WHERE user_id = %s", (user_id,))
+        cursor.execute(
+            "INSERT INTO training_log (user_id, date, program_id, exercise_name, sets, reps, weight, notes, created_at) "
+            "SELECT %s, CURRENT_DATE - (n %% 1000), 'p' || (n %% 7), (ARRAY['Жим лёжа', 'Присед', 'Становая тяга'])[1 + n %% 3], "
+            "3, 5 + n %% 6, 40 + (n %% 120) / 2.0, CASE WHEN n %% 5 = 0 THEN 'лёгкий день' END, "
+            "CURRENT_TIMESTAMP - n * interval '1 hour 17 minutes 3.123 seconds' "
+            "FROM generate_series(1, %s) n",
+            (user_id, rows)
+        )
+        cursor.execute(
+            "INSERT INTO purchases (user_id, program_id, program_title, program_category, price, calculated_data) "
+            "SELECT %s, 'p' || n, 'Программа ' || n, 'strength', 1990 + n %% 10, "
+            "jsonb_build_object('weeks', 8 + n %% 4, 'days', jsonb_build_array('пн', 'ср', 'пт'), 'weight', 72.5) "
+            "FROM generate_series(1, %s) n",
+            (user_id, rows)
+        )
+    conn.close()
+
+
+def legacy(conn, query: str, params) -> str:
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    cursor.execute(query, params)
+    return json.dumps({'rows': [dict(row) for row in cursor.fetchall()]}, default=str)
+
+
+def streamed(runtime, request, query: str, params) -> str:
+    return runtime.response(200, {'rows': request.rows(query, params)})['body']
+
+
+def measure(func, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        started = time.process_time_ns()
+        func()
+        samples.append((time.process_time_ns() - started) / 1e6)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--iterations', type=int, default=30)
+    args = parser.parse_args()
+
+    dsn = database_url()
+    apply_migrations(dsn)
+    user_id = ensure_user(dsn, 'bench-serialize@example.com')
+    seed(dsn, user_id, args.rows)
+
+    load_handler('training-log')
+    runtime = sys.modules['runtime']
+    request = runtime.Request({'httpMethod': 'GET'})
+    conn = request.conn
+
+    try:
+        assert legacy(conn, EDGE_CASES, None) == streamed(runtime, request, EDGE_CASES, None), 'граничные значения'
+        for table, query in QUERIES.items():
+            params = (user_id,)
+            assert legacy(conn, query, params) == streamed(runtime, request, query, params), table
+            report(f'{table} {args.rows} строк, dict + default=str', measure(lambda: legacy(conn, query, params), args.iterations))
+            report(f'{table} {args.rows} строк, RowSet', measure(lambda: streamed(runtime, request, query, params), args.iterations))
+    finally:
+        request.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Стоимость проверки токена сессии на запрос: подпись, срок действия и кэш отозванных сессий.
+
+Проверка идёт целиком в памяти; кэш отзывов обновляется из revoked_sessions раз в
+SESSION_REVOCATION_REFRESH секунд, поэтому в замер попадает только поиск в словаре.
+
+    python benchmarks/bench_session.py --iterations 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+from _common import load_handler, make_event, percentile
+
+BUDGET_US = 20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=100_000)
+    parser.add_argument('--revoked', type=int, default=10_000, help='сколько отозванных сессий держать в кэше')
+    args = parser.parse_args()
+
+    os.environ.setdefault('SESSION_SECRET', 'bench-secret')
+    load_handler('food-log')
+    session, runtime = sys.modules['session'], sys.modules['runtime']
+
+    now = int(time.time())
+    revoked = [(f'revoked{i}', now + 3600, i) for i in range(args.revoked)]
+    session.revocations.is_revoked('warmup', lambda after: revoked if after is None else [])
+    session.revocations.refresh = 10 ** 9
+
+    token, _ = session.issue_token(42)
+    event = make_event('GET', '/?user_id=42', headers={'X-Auth-Token': token})
+
+    samples = {'parse_token': [], 'Request.authorize': []}
+    for _ in range(args.iterations):
+        started = time.perf_counter_ns()
+        session.parse_token(token)
+        samples['parse_token'].append((time.perf_counter_ns() - started) / 1000)
+
+        started = time.perf_counter_ns()
+        runtime.Request(event).authorize('42')
+        samples['Request.authorize'].append((time.perf_counter_ns() - started) / 1000)
+
+    for title, values in samples.items():
+        p50, p99 = percentile(values, 50), percentile(values, 99)
+        verdict = 'ok' if p50 < BUDGET_US else f'больше бюджета {BUDGET_US} µs'
+        print(f'{title:<20} p50={p50:6.2f} µs  p99={p99:6.2f} µs  {verdict}')
+
+
+if __name__ == '__main__':
+    main()
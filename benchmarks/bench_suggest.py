@@ -0,0 +1,138 @@
+"""Подсказки suggest_foods из user_food_stats против подсчёта по food_log на лету.
+
+Пользователю загружается --days дней истории по --per-day записей из --foods продуктов
+каталога: чем дальше в прошлое, тем чаще попадаются «старые» продукты. Затем выполняется
+--ops случайных добавлений (add_food, add_foods) и удалений, после чего user_food_stats
+сверяется с полным пересчётом по food_log, а порядок подсказок — с суммой весов
+2^((date - сегодня) / 14), посчитанной заново.
+
+Замеряются suggest_foods без query и с префиксом, search_food с тем же префиксом и
+тот же топ, посчитанный запросом к food_log за последние 8 недель и за всю историю.
+
+    DATABASE_URL=postgresql://postgres@localhost/bench python benchmarks/bench_suggest.py --days 730
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+import psycopg2
+
+from _common import apply_migrations, database_url, ensure_user, load_handler, make_event, report
+from bench_import import check_rollups, reset, to_jsonl
+
+ON_THE_FLY = """
+    SELECT food_name, COUNT(*), ROUND(AVG(grams)), ROUND(AVG(calories), 1), ROUND(AVG(protein), 1), ROUND(AVG(fats), 1), ROUND(AVG(carbs), 1)
+    FROM food_log
+    WHERE user_id = %s AND date >= %s
+    GROUP BY food_name
+    ORDER BY SUM(power(2, (date - CURRENT_DATE) / 14.0)) DESC
+    LIMIT 10
+"""
+
+
+def history(names: list, days: int, per_day: int) -> list:
+    """Каждый день per_day записей: свежие дни — из первой половины names, давние — из второй"""
+    rng = random.Random(7)
+    today = date.today()
+    records = []
+    for ago in range(days):
+        pool = names[:len(names) // 2] if rng.random() > ago / days else names[len(names) // 2:]
+        for _ in range(per_day):
+            records.append({'date': (today - timedelta(days=ago)).isoformat(), 'food_name': rng.choice(pool), 'grams': rng.choice((100, 150, 200, 250))})
+    return records
+
+
+def call(module, event: dict) -> dict:
+    result = module.handler(event, None)
+    assert result['statusCode'] == 200, result['body'][:300]
+    return json.loads(result['body'])
+
+
+def churn(module, user_id: int, names: list, ops: int) -> None:
+    """Случайные добавления и удаления через обработчики, как из дневника"""
+    rng = random.Random(11)
+    added = []
+    for _ in range(ops):
+        day = (date.today() - timedelta(days=rng.randrange(60))).isoformat()
+        kind = rng.random()
+        if kind < 0.4:
+            body = call(module, make_event('POST', body={'user_id': user_id, 'date': day, 'food_name': rng.choice(names), 'grams': rng.randrange(30, 400)}))
+            added.append((body['id'], day))
+        elif kind < 0.6:
+            items = [{'food_name': rng.choice(names), 'grams': rng.randrange(30, 400), 'date': day} for _ in range(rng.randrange(1, 5))]
+            body = call(module, make_event('POST', body={'action': 'add_foods', 'user_id': user_id, 'items': items}))
+            added.extend((log_id, day) for log_id in body['ids'])
+        elif added:
+            log_id, day = added.pop(rng.randrange(len(added)))
+            call(module, make_event('DELETE', body={'user_id': user_id, 'id': log_id, **({'date': day} if rng.random() < 0.5 else {})}))
+
+
+def expected_order(dsn: str, user_id: int, names: set) -> list:
+    conn = psycopg2.connect(dsn)
+    with conn, conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT food_name FROM food_log WHERE user_id = %s GROUP BY food_name ORDER BY SUM(power(2, (date - CURRENT_DATE) / 14.0)) DESC",
+            (user_id,)
+        )
+        order = [row[0] for row in cursor.fetchall() if row[0] in names]
+    conn.close()
+    return order
+
+
+def measure(run, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--per-day', type=int, default=8)
+    parser.add_argument('--foods', type=int, default=60)
+    parser.add_argument('--ops', type=int, default=500)
+    parser.add_argument('--iterations', type=int, default=300)
+    args = parser.parse_args()
+
+    dsn = database_url()
+    apply_migrations(dsn)
+    user_id = ensure_user(dsn, 'bench-suggest@example.com')
+    reset(dsn, user_id)
+    module = load_handler('food-log')
+    catalogue = module.get_catalogue()
+    names = [catalogue.name(i) for i in range(0, len(catalogue), max(1, len(catalogue) // args.foods))][:args.foods]
+    records = history(names, args.days, args.per_day)
+    call(module, make_event('POST', f'/?action=import&format=jsonl&user_id={user_id}') | {'body': to_jsonl(records)})
+    churn(module, user_id, names, args.ops)
+
+    check_rollups(dsn, user_id)
+    suggested = [food['name'] for food in call(module, make_event('GET', f'/?action=suggest_foods&user_id={user_id}&limit=20'))['foods']]
+    assert suggested == expected_order(dsn, user_id, set(names))[:20], suggested
+    prefix = names[0][:3]
+    blended = call(module, make_event('GET', f'/?action=suggest_foods&user_id={user_id}&query={prefix}&limit=20'))['foods']
+    assert blended and all(food['entries'] for food in blended[:1]), blended[:3]
+    print(f'{len(records)} записей, {args.ops} правок: user_food_stats совпадает с пересчётом, порядок подсказок верный: ok')
+
+    conn = psycopg2.connect(dsn)
+    cursor = conn.cursor()
+    recent = date.today() - timedelta(weeks=8)
+    scenarios = (
+        ('suggest_foods', lambda: call(module, make_event('GET', f'/?action=suggest_foods&user_id={user_id}'))),
+        (f'suggest_foods query={prefix}', lambda: call(module, make_event('GET', f'/?action=suggest_foods&user_id={user_id}&query={prefix}'))),
+        (f'search_food query={prefix}', lambda: call(module, make_event('GET', f'/?action=search_food&query={prefix}'))),
+        ('food_log за 8 недель', lambda: (cursor.execute(ON_THE_FLY, (user_id, recent)), cursor.fetchall())),
+        ('food_log за всю историю', lambda: (cursor.execute(ON_THE_FLY, (user_id, date.min)), cursor.fetchall())),
+    )
+    for title, run in scenarios:
+        run()
+        report(title, measure(run, args.iterations))
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
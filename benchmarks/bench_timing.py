@@ -0,0 +1,44 @@
+"""Цена замеров timing.py: обработчики до них, с выключенным и с включённым REQUEST_TIMING.
+
+Те же события, что в bench_runtime.py, вызываются на функциях из git-ревизии --baseline
+(без замеров), на рабочем дереве без REQUEST_TIMING и с REQUEST_TIMING=header.
+Меряется процессорное время вызова. Выключенные замеры не должны заметно отличаться
+от прежних обработчиков.
+
+    DATABASE_URL=postgresql://postgres@localhost/bench python benchmarks/bench_timing.py --baseline HEAD~1
+"""
+import argparse
+import os
+import tempfile
+
+from _common import BACKEND, apply_migrations, database_url, ensure_user, percentile
+from bench_runtime import export_backend, measure, scenarios, seed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--baseline', default='HEAD~1', help='git-ревизия без замеров')
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--rows', type=int, default=100)
+    args = parser.parse_args()
+
+    dsn = database_url()
+    apply_migrations(dsn)
+    user_id = ensure_user(dsn)
+    seed(dsn, user_id, args.rows)
+
+    with tempfile.TemporaryDirectory() as directory:
+        baseline = export_backend(args.baseline, directory)
+        print(f'{"сценарий":<22} {args.baseline:>12} {"выключено":>12} {"header":>12}   p50, ms процессорного времени')
+        for title, function, event in scenarios(user_id):
+            os.environ.pop('REQUEST_TIMING', None)
+            before = percentile(measure(baseline, function, event, args.iterations), 50)
+            disabled = percentile(measure(BACKEND, function, event, args.iterations), 50)
+            os.environ['REQUEST_TIMING'] = 'header'
+            enabled = percentile(measure(BACKEND, function, event, args.iterations), 50)
+            os.environ.pop('REQUEST_TIMING')
+            print(f'{title:<22} {before:12.4f} {disabled:12.4f} {enabled:12.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Правка и удаление записей тренировок: N отдельных PUT против одного PUT с updates и DELETE по ids.
+
+Загружает --rows записей двум пользователям. Правит --batch записей сначала по одной,
+затем одним запросом — с прежними датами записей (old_date) и без них, — и удаляет --batch
+записей одним DELETE. После каждого шага
+training_weekly_stats сверяется с полным пересчётом, записи второго пользователя,
+чьи id подмешаны в запросы первого, должны остаться нетронутыми, а ETag списка — смениться.
+
+    DATABASE_URL=postgresql://postgres@localhost/bench python benchmarks/bench_training_bulk.py --batch 200
+"""
+import argparse
+import json
+import time
+from datetime import date, timedelta
+
+import psycopg2
+
+from _common import apply_migrations, database_url, ensure_user, load_handler, make_event
+
+from bench_import import check_rollups, reset, to_jsonl, training_records
+
+
+def log_ids(dsn: str, user_id: int) -> list:
+    return list(log_dates(dsn, user_id))
+
+
+def log_dates(dsn: str, user_id: int) -> dict:
+    """Даты записей пользователя по id, в порядке id"""
+    conn = psycopg2.connect(dsn)
+    with conn, conn.cursor() as cursor:
+        cursor.execute("SELECT id, date FROM training_log WHERE user_id = %s ORDER BY id", (user_id,))
+        dates = {log_id: day.isoformat() for log_id, day in cursor.fetchall()}
+    conn.close()
+    return dates
+
+
+def snapshot(dsn: str, user_id: int) -> list:
+    conn = psycopg2.connect(dsn)
+    with conn, conn.cursor() as cursor:
+        cursor.execute("SELECT * FROM training_log WHERE user_id = %s ORDER BY id", (user_id,))
+        rows = cursor.fetchall()
+        cursor.execute("SELECT * FROM training_weekly_stats WHERE user_id = %s ORDER BY exercise_name, week_start", (user_id,))
+        rows += cursor.fetchall()
+    conn.close()
+    return rows
+
+
+def etag(module, user_id: int) -> str:
+    return module.handler(make_event('GET', f'/?user_id={user_id}'), None)['headers']['ETag']
+
+
+def call(module, method: str, body: dict) -> dict:
+    result = module.handler(make_event(method, body=body), None)
+    assert result['statusCode'] == 200, result['body'][:300]
+    return json.loads(result['body'])
+
+
+def patch(log_id: int, i: int) -> dict:
+    """Меняет вес и повторы, а каждой третьей записи — упражнение и неделю"""
+    item = {'id': log_id, 'weight': 40 + i % 90 + 0.25, 'reps': 5 + i % 7}
+    if i % 3 == 0:
+        item.update(exercise_name=f'Упражнение {(i + 7) % 25}', date=(date.today() - timedelta(days=i % 700)).isoformat())
+    return item
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--batch', type=int, default=200)
+    args = parser.parse_args()
+
+    dsn = database_url()
+    apply_migrations(dsn)
+    owner, other = ensure_user(dsn, 'bench-bulk@example.com'), ensure_user(dsn, 'bench-bulk-other@example.com')
+    module = load_handler('training-log')
+    for user_id in (owner, other):
+        reset(dsn, user_id)
+        result = module.handler(make_event('POST', f'/?action=import&format=jsonl&user_id={user_id}') | {'body': to_jsonl(training_records(args.rows))}, None)
+        assert result['statusCode'] == 200, result['body'][:300]
+    dates, foreign = log_dates(dsn, owner), log_ids(dsn, other)[:10]
+    ids = list(dates)
+    untouched = snapshot(dsn, other)
+
+    single = ids[:args.batch]
+    before = etag(module, owner)
+    started = time.perf_counter()
+    for i, log_id in enumerate(single):
+        call(module, 'PUT', {'user_id': owner, 'old_date': dates[log_id], **patch(log_id, i)})
+    single_elapsed = time.perf_counter() - started
+    check_rollups(dsn, owner)
+    assert etag(module, owner) != before
+
+    bulk_elapsed = {}
+    for offset, with_dates in ((1, True), (2, False)):
+        bulk = ids[offset * args.batch:(offset + 1) * args.batch]
+        items = [patch(log_id, i + offset) | ({'old_date': dates[log_id]} if with_dates else {}) for i, log_id in enumerate(bulk)]
+        before = etag(module, owner)
+        started = time.perf_counter()
+        updated = call(module, 'PUT', {'user_id': owner, 'updates': items + [{'id': log_id, 'reps': 1} for log_id in foreign]})['updated']
+        bulk_elapsed[with_dates] = time.perf_counter() - started
+        assert sorted(row['id'] for row in updated) == bulk
+        check_rollups(dsn, owner)
+        assert etag(module, owner) != before
+    print(f'PUT {args.batch} записей: по одной {single_elapsed * 1000:8.1f} ms, одним запросом {bulk_elapsed[True] * 1000:7.1f} ms  '
+          f'×{single_elapsed / bulk_elapsed[True]:.1f}, без old_date {bulk_elapsed[False] * 1000:7.1f} ms')
+
+    doomed = ids[3 * args.batch:4 * args.batch]
+    before = etag(module, owner)
+    started = time.perf_counter()
+    deleted = call(module, 'DELETE', {'user_id': owner, 'ids': doomed + foreign})['deleted']
+    delete_elapsed = time.perf_counter() - started
+    assert sorted(row['id'] for row in deleted) == doomed
+    assert not set(doomed) & set(log_ids(dsn, owner))
+    check_rollups(dsn, owner)
+    assert etag(module, owner) != before
+    print(f'DELETE {args.batch} записей одним запросом {delete_elapsed * 1000:7.1f} ms')
+
+    assert snapshot(dsn, other) == untouched, 'записи другого пользователя изменились'
+    print('недельные итоги совпадают с пересчётом, чужие записи не тронуты, ETag меняется: ok')
+    for user_id in (owner, other):
+        reset(dsn, user_id)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+-- Ключи идемпотентности оформления покупок: повтор запроса с тем же ключом не создаёт дублей
+CREATE TABLE IF NOT EXISTS purchase_checkouts (
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    idempotency_key VARCHAR(100) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, idempotency_key)
+);
+
+ALTER TABLE purchases ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(100);
+
+CREATE INDEX IF NOT EXISTS idx_purchases_user_idempotency_key ON purchases(user_id, idempotency_key) WHERE idempotency_key IS NOT NULL;
@@ -0,0 +1,5 @@
+-- Составной индекс для постраничной выдачи дневника тренировок по ключу (date, created_at, id)
+CREATE INDEX IF NOT EXISTS idx_training_log_user_date_created_id ON training_log(user_id, date DESC, created_at DESC, id DESC);
+
+-- Индекс по user_id покрывается префиксом составного индекса
+DROP INDEX IF EXISTS idx_training_log_user_id;
@@ -0,0 +1,17 @@
+-- Дневные итоги дневника питания, обновляются в той же транзакции, что и food_log
+CREATE TABLE IF NOT EXISTS food_log_daily (
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    date DATE NOT NULL,
+    entries INTEGER NOT NULL DEFAULT 0,
+    calories NUMERIC(12,2) NOT NULL DEFAULT 0,
+    protein NUMERIC(12,2) NOT NULL DEFAULT 0,
+    fats NUMERIC(12,2) NOT NULL DEFAULT 0,
+    carbs NUMERIC(12,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, date)
+);
+
+INSERT INTO food_log_daily (user_id, date, entries, calories, protein, fats, carbs)
+SELECT user_id, date, COUNT(*), SUM(calories), SUM(protein), SUM(fats), SUM(carbs)
+FROM food_log
+GROUP BY user_id, date
+ON CONFLICT (user_id, date) DO NOTHING;
@@ -0,0 +1,29 @@
+-- Недельные итоги по упражнениям: объём (подходы × повторы × вес), лучший вес и оценка 1ПМ по Эпли.
+-- Обновляются в тех же транзакциях, что и training_log
+CREATE TABLE IF NOT EXISTS training_weekly_stats (
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    exercise_name VARCHAR(255) NOT NULL,
+    week_start DATE NOT NULL,
+    entries INTEGER NOT NULL DEFAULT 0,
+    sets INTEGER NOT NULL DEFAULT 0,
+    reps INTEGER NOT NULL DEFAULT 0,
+    volume NUMERIC(14,2) NOT NULL DEFAULT 0,
+    best_weight NUMERIC(5,2),
+    best_e1rm NUMERIC(10,2),
+    PRIMARY KEY (user_id, exercise_name, week_start)
+);
+
+INSERT INTO training_weekly_stats (user_id, exercise_name, week_start, entries, sets, reps, volume, best_weight, best_e1rm)
+SELECT
+    user_id,
+    exercise_name,
+    date_trunc('week', date)::date,
+    COUNT(*),
+    SUM(COALESCE(sets, 1)),
+    SUM(COALESCE(sets, 1) * COALESCE(reps, 0)),
+    SUM(COALESCE(sets, 1) * COALESCE(reps, 0) * COALESCE(weight, 0)),
+    MAX(weight),
+    MAX(CASE WHEN reps = 1 THEN weight WHEN reps > 1 THEN ROUND(weight * (1 + reps / 30.0), 2) END)
+FROM training_log
+GROUP BY user_id, exercise_name, date_trunc('week', date)::date
+ON CONFLICT (user_id, exercise_name, week_start) DO NOTHING;
@@ -0,0 +1,9 @@
+-- Отозванные токены сессий (выход из аккаунта); функции подтягивают новые отзывы в память раз в несколько секунд
+CREATE TABLE IF NOT EXISTS revoked_sessions (
+    session_id VARCHAR(32) PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    expires_at BIGINT NOT NULL,
+    revoked_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_revoked_sessions_revoked_at ON revoked_sessions(revoked_at);
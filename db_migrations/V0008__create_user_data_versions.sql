@@ -0,0 +1,8 @@
+-- Версии данных пользователя для ETag: счётчик увеличивается той же командой, что меняет данные.
+-- Нет строки — версия 0
+CREATE TABLE IF NOT EXISTS user_data_versions (
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    scope VARCHAR(30) NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, scope)
+);
@@ -0,0 +1,117 @@
+-- food_log и training_log секционируются по месяцам поля date: запросы за период читают только
+-- нужные месяцы, а очистка и рост индексов зависят от размера активных секций, а не всей истории.
+-- Первичный ключ секционированной таблицы обязан включать date, поэтому он становится (id, date);
+-- id по-прежнему выдаёт прежняя последовательность. Секции создаются для месяцев, где есть
+-- записи, и для текущего и следующего месяца; дальше их создают функции перед записью.
+-- Пустые секции впрок не заводятся: каждая лишняя удорожает план запросов без периода.
+
+-- Создаёт недостающие месячные секции таблицы с from_date по to_date. Строки этих месяцев,
+-- успевшие попасть в секцию по умолчанию <таблица>_default, переносятся в новую секцию.
+-- Функции вызывают её перед записью в месяц, которого ещё не видели (backend/*/partitions.py)
+CREATE OR REPLACE FUNCTION ensure_monthly_partitions(parent regclass, from_date date, to_date date)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    schema_name text;
+    table_name text;
+    default_partition text;
+    partition text;
+    month date := date_trunc('month', from_date)::date;
+    created integer := 0;
+BEGIN
+    SELECT n.nspname, c.relname INTO schema_name, table_name
+    FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.oid = parent;
+    default_partition := format('%I.%I', schema_name, table_name || '_default');
+
+    -- Параллельные вызовы для той же таблицы ждут друг друга до конца транзакции
+    PERFORM pg_advisory_xact_lock(hashtext('ensure_monthly_partitions:' || parent::text));
+
+    WHILE month <= to_date LOOP
+        partition := format('%I.%I', schema_name, table_name || to_char(month, '_YYYY_MM'));
+        IF to_regclass(partition) IS NULL THEN
+            EXECUTE format('CREATE TABLE %s (LIKE %s INCLUDING DEFAULTS)', partition, parent);
+            IF to_regclass(default_partition) IS NOT NULL THEN
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %s WHERE date >= %L AND date < %L RETURNING *) INSERT INTO %s SELECT * FROM moved',
+                    default_partition, month, (month + interval '1 month')::date, partition
+                );
+            END IF;
+            EXECUTE format(
+                'ALTER TABLE %s ATTACH PARTITION %s FOR VALUES FROM (%L) TO (%L)',
+                parent, partition, month, (month + interval '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        month := (month + interval '1 month')::date;
+    END LOOP;
+
+    RETURN created;
+END;
+$$;
+
+-- Дневник питания
+ALTER TABLE food_log RENAME TO food_log_unpartitioned;
+ALTER TABLE food_log_unpartitioned RENAME CONSTRAINT food_log_pkey TO food_log_unpartitioned_pkey;
+ALTER INDEX idx_food_log_user_date RENAME TO idx_food_log_unpartitioned_user_date;
+
+CREATE TABLE food_log (
+    id INTEGER NOT NULL DEFAULT nextval('food_log_id_seq'),
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    date DATE NOT NULL,
+    food_name VARCHAR(255) NOT NULL,
+    grams NUMERIC(10,2) NOT NULL,
+    calories NUMERIC(10,2) NOT NULL,
+    protein NUMERIC(10,2) NOT NULL,
+    fats NUMERIC(10,2) NOT NULL,
+    carbs NUMERIC(10,2) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, date)
+) PARTITION BY RANGE (date);
+
+ALTER SEQUENCE food_log_id_seq OWNED BY food_log.id;
+CREATE INDEX idx_food_log_user_date ON food_log(user_id, date);
+CREATE TABLE food_log_default PARTITION OF food_log DEFAULT;
+
+SELECT ensure_monthly_partitions('food_log', month, month)
+FROM (SELECT DISTINCT date_trunc('month', date)::date AS month FROM food_log_unpartitioned) months;
+SELECT ensure_monthly_partitions('food_log', CURRENT_DATE, CURRENT_DATE + 31);
+
+INSERT INTO food_log (id, user_id, date, food_name, grams, calories, protein, fats, carbs, created_at)
+SELECT id, user_id, date, food_name, grams, calories, protein, fats, carbs, created_at FROM food_log_unpartitioned;
+
+DROP TABLE food_log_unpartitioned;
+
+-- Дневник тренировок. Отдельный индекс по date не нужен: период отбирается секциями
+ALTER TABLE training_log RENAME TO training_log_unpartitioned;
+ALTER TABLE training_log_unpartitioned RENAME CONSTRAINT training_log_pkey TO training_log_unpartitioned_pkey;
+ALTER INDEX idx_training_log_user_date_created_id RENAME TO idx_training_log_unpartitioned_user_date_created_id;
+DROP INDEX IF EXISTS idx_training_log_date;
+
+CREATE TABLE training_log (
+    id INTEGER NOT NULL DEFAULT nextval('training_log_id_seq'),
+    user_id INTEGER REFERENCES users(id),
+    date DATE NOT NULL,
+    program_id VARCHAR(50),
+    exercise_name VARCHAR(255) NOT NULL,
+    sets INTEGER,
+    reps INTEGER,
+    weight DECIMAL(5,2),
+    notes TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, date)
+) PARTITION BY RANGE (date);
+
+ALTER SEQUENCE training_log_id_seq OWNED BY training_log.id;
+CREATE INDEX idx_training_log_user_date_created_id ON training_log(user_id, date DESC, created_at DESC, id DESC);
+CREATE TABLE training_log_default PARTITION OF training_log DEFAULT;
+
+SELECT ensure_monthly_partitions('training_log', month, month)
+FROM (SELECT DISTINCT date_trunc('month', date)::date AS month FROM training_log_unpartitioned) months;
+SELECT ensure_monthly_partitions('training_log', CURRENT_DATE, CURRENT_DATE + 31);
+
+INSERT INTO training_log (id, user_id, date, program_id, exercise_name, sets, reps, weight, notes, created_at)
+SELECT id, user_id, date, program_id, exercise_name, sets, reps, weight, notes, created_at FROM training_log_unpartitioned;
+
+DROP TABLE training_log_unpartitioned;
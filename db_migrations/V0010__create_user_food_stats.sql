@@ -0,0 +1,44 @@
+-- Недавние и частые продукты пользователя для подсказок suggest_foods: одна строка на продукт
+-- с числом записей, суммами граммов и КБЖУ (из них — обычная порция и её КБЖУ) и оценкой score.
+-- Функция food-log обновляет строки в тех же командах, что добавляют и удаляют записи food_log.
+
+-- score — логарифм суммы весов записей, вес записи за день d равен 2^((d - 2000-01-01) / 14):
+-- запись двухнедельной давности весит вдвое меньше сегодняшней. Порядок по score тот же, что
+-- по сумме весов, отсчитанных от сегодняшнего дня, поэтому со временем строки пересчитывать
+-- не нужно. Логарифм не даёт весам переполниться: складываются они через food_score_add
+CREATE OR REPLACE FUNCTION food_score(day date) RETURNS double precision
+LANGUAGE sql IMMUTABLE STRICT
+AS $$ SELECT (day - DATE '2000-01-01') * ln(2) / 14 $$;
+
+-- ln(e^a + e^b) без вычисления самих e^a и e^b
+CREATE OR REPLACE FUNCTION food_score_add(a double precision, b double precision) RETURNS double precision
+LANGUAGE sql IMMUTABLE STRICT
+AS $$ SELECT GREATEST(a, b) + ln(1 + exp(-abs(a - b))) $$;
+
+-- ln(e^a - e^b); если вычитается всё (или больше из-за округления) — '-Infinity'
+CREATE OR REPLACE FUNCTION food_score_sub(a double precision, b double precision) RETURNS double precision
+LANGUAGE sql IMMUTABLE STRICT
+AS $$ SELECT CASE WHEN b >= a OR exp(b - a) >= 1 THEN '-Infinity'::double precision ELSE a + ln(1 - exp(b - a)) END $$;
+
+CREATE AGGREGATE food_score_sum(double precision) (SFUNC = food_score_add, STYPE = double precision);
+
+CREATE TABLE user_food_stats (
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    food_name VARCHAR(255) NOT NULL,
+    entries INTEGER NOT NULL,
+    grams NUMERIC(14,2) NOT NULL,
+    calories NUMERIC(14,2) NOT NULL,
+    protein NUMERIC(14,2) NOT NULL,
+    fats NUMERIC(14,2) NOT NULL,
+    carbs NUMERIC(14,2) NOT NULL,
+    score DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (user_id, food_name)
+);
+
+-- Продукты, все записи которых удалены, остаются с entries = 0 и score = '-Infinity'
+CREATE INDEX idx_user_food_stats_user_score ON user_food_stats(user_id, score DESC);
+
+INSERT INTO user_food_stats (user_id, food_name, entries, grams, calories, protein, fats, carbs, score)
+SELECT user_id, food_name, COUNT(*), SUM(grams), SUM(calories), SUM(protein), SUM(fats), SUM(carbs), food_score_sum(food_score(date))
+FROM food_log
+GROUP BY user_id, food_name;
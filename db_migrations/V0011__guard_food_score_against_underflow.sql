@@ -0,0 +1,19 @@
+-- food_score растёт примерно на 0.0495 в день, поэтому у записей одного продукта, разнесённых
+-- больше чем на ~39 лет (например, дата-заглушка 1970-01-01 в импорте), разность оценок
+-- превышает ~708, и exp в food_score_add и food_score_sub падает с «value out of range: underflow».
+-- При разности больше 700 поправка ln(1 ± e^-700) не видна в double precision, поэтому
+-- функции сразу возвращают ответ, не вызывая exp. Агрегат food_score_sum ссылается на
+-- food_score_add по имени и подхватывает новое определение
+
+CREATE OR REPLACE FUNCTION food_score_add(a double precision, b double precision) RETURNS double precision
+LANGUAGE sql IMMUTABLE STRICT
+AS $$ SELECT CASE WHEN abs(a - b) > 700 THEN GREATEST(a, b) ELSE GREATEST(a, b) + ln(1 + exp(-abs(a - b))) END $$;
+
+CREATE OR REPLACE FUNCTION food_score_sub(a double precision, b double precision) RETURNS double precision
+LANGUAGE sql IMMUTABLE STRICT
+AS $$ SELECT CASE
+    WHEN b >= a THEN '-Infinity'::double precision
+    WHEN b - a < -700 THEN a
+    WHEN exp(b - a) >= 1 THEN '-Infinity'::double precision
+    ELSE a + ln(1 - exp(b - a))
+END $$;
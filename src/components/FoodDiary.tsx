@@ -5,7 +5,7 @@ import { Label } from '@/components/ui/label';
 import { Button } from '@/components/ui/button';
 import { Card } from '@/components/ui/card';
 import { Progress } from '@/components/ui/progress';
-import { User } from '@/lib/api';
+import { User, api, authHeaders } from '@/lib/api';
 import { useToast } from '@/hooks/use-toast';
 import Icon from '@/components/ui/icon';
 import { Badge } from '@/components/ui/badge';
@@ -18,10 +18,12 @@ interface FoodDiaryProps {
 
 interface FoodItem {
   name: string;
+  grams?: number;
   calories: number;
   protein: number;
   fats: number;
   carbs: number;
+  entries?: number;
 }
 
 interface FoodLog {
@@ -64,26 +66,44 @@ export const FoodDiary = ({ open, onOpenChange, user }: FoodDiaryProps) => {
 
   useEffect(() => {
     if (open && user) {
-      loadGoals();
-      loadLogs();
+      loadDiary();
     }
   // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [open, user, date]);
 
+  const applyGoals = (loaded: any) => {
+    if (loaded) {
+      setGoals(loaded);
+      setCaloriesGoal(loaded.calories_goal.toString());
+      setProteinGoal(loaded.protein_goal.toString());
+      setFatsGoal(loaded.fats_goal.toString());
+      setCarbsGoal(loaded.carbs_goal.toString());
+    }
+  };
+
+  // При открытии цели и записи за день приходят одним запросом dashboard
+  const loadDiary = async () => {
+    if (!user) return;
+    
+    setIsLoading(true);
+    try {
+      const dashboard = await api.getDashboard(user.id, date, ['goals', 'food_logs']);
+      applyGoals(dashboard.goals);
+      setLogs(dashboard.food_logs ?? []);
+    } catch (error: any) {
+      toast({ title: 'Ошибка', description: error.message, variant: 'destructive' });
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
   const loadGoals = async () => {
     if (!user) return;
     
     try {
-      const response = await fetch(`${API_URL}?action=get_goals&user_id=${user.id}`);
+      const response = await fetch(`${API_URL}?action=get_goals&user_id=${user.id}`, { headers: authHeaders() });
       const data = await response.json();
-      
-      if (data.goals) {
-        setGoals(data.goals);
-        setCaloriesGoal(data.goals.calories_goal.toString());
-        setProteinGoal(data.goals.protein_goal.toString());
-        setFatsGoal(data.goals.fats_goal.toString());
-        setCarbsGoal(data.goals.carbs_goal.toString());
-      }
+      applyGoals(data.goals);
     } catch (error: any) {
       console.error('Error loading goals:', error);
     }
@@ -94,7 +114,7 @@ export const FoodDiary = ({ open, onOpenChange, user }: FoodDiaryProps) => {
     
     setIsLoading(true);
     try {
-      const response = await fetch(`${API_URL}?user_id=${user.id}&date=${date}`);
+      const response = await fetch(`${API_URL}?user_id=${user.id}&date=${date}`, { headers: authHeaders() });
       const data = await response.json();
       setLogs(data.logs);
     } catch (error: any) {
@@ -104,11 +124,22 @@ export const FoodDiary = ({ open, onOpenChange, user }: FoodDiaryProps) => {
     }
   };
 
+  useEffect(() => {
+    if (open && user && view === 'search' && !searchQuery.trim()) {
+      handleSearch();
+    }
+  // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [open, user, view]);
+
+  // Недавние и частые продукты пользователя с обычной порцией, а при запросе — ещё и поиск по каталогу
   const handleSearch = async () => {
-    if (!searchQuery.trim()) return;
+    if (!user) return;
     
     try {
-      const response = await fetch(`${API_URL}?action=search_food&query=${encodeURIComponent(searchQuery)}`);
+      const response = await fetch(
+        `${API_URL}?action=suggest_foods&user_id=${user.id}&limit=20&query=${encodeURIComponent(searchQuery.trim())}`,
+        { headers: authHeaders() }
+      );
       const data = await response.json();
       setSearchResults(data.foods);
     } catch (error: any) {
@@ -122,7 +153,7 @@ export const FoodDiary = ({ open, onOpenChange, user }: FoodDiaryProps) => {
     try {
       const response = await fetch(API_URL, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: authHeaders({ 'Content-Type': 'application/json' }),
         body: JSON.stringify({
           user_id: user.id,
           date,
@@ -155,8 +186,8 @@ export const FoodDiary = ({ open, onOpenChange, user }: FoodDiaryProps) => {
     try {
       const response = await fetch(API_URL, {
         method: 'DELETE',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ id: logId })
+        headers: authHeaders({ 'Content-Type': 'application/json' }),
+        body: JSON.stringify({ id: logId, date })
       });
       
       if (!response.ok) {
@@ -178,7 +209,7 @@ export const FoodDiary = ({ open, onOpenChange, user }: FoodDiaryProps) => {
     try {
       const response = await fetch(API_URL, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: authHeaders({ 'Content-Type': 'application/json' }),
         body: JSON.stringify({
           action: 'set_goals',
           user_id: user.id,
@@ -210,7 +241,7 @@ export const FoodDiary = ({ open, onOpenChange, user }: FoodDiaryProps) => {
 
   const calculatePreview = () => {
     if (!selectedFood) return null;
-    const multiplier = parseFloat(grams) / 100;
+    const multiplier = parseFloat(grams) / (selectedFood.grams ?? 100);
     return {
       calories: Math.round(selectedFood.calories * multiplier),
       protein: Math.round(selectedFood.protein * multiplier * 10) / 10,
@@ -376,19 +407,22 @@ export const FoodDiary = ({ open, onOpenChange, user }: FoodDiaryProps) => {
 
                 {searchResults.length > 0 && (
                   <div>
-                    <h3 className="font-bold mb-2 text-sm sm:text-base">Результаты поиска</h3>
+                    <h3 className="font-bold mb-2 text-sm sm:text-base">{searchQuery.trim() ? 'Результаты поиска' : 'Недавние продукты'}</h3>
                     <div className="space-y-2 max-h-[400px] overflow-y-auto">
                       {searchResults.map((food, idx) => (
                         <Card
                           key={idx}
                           className="p-3 sm:p-4 cursor-pointer hover:border-primary transition-colors"
-                          onClick={() => setSelectedFood(food)}
+                          onClick={() => {
+                            setSelectedFood(food);
+                            setGrams(String(food.grams ?? 100));
+                          }}
                         >
                           <div className="flex justify-between items-center">
                             <div>
                               <p className="font-semibold text-sm sm:text-base">{food.name}</p>
                               <p className="text-xs sm:text-sm text-muted-foreground mt-1">
-                                {food.calories} ккал на 100г
+                                {food.calories} ккал на {food.grams ?? 100}г
                               </p>
                             </div>
                             <Icon name="ChevronRight" size={20} className="text-muted-foreground" />
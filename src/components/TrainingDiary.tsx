@@ -17,7 +17,9 @@ interface TrainingDiaryProps {
 
 export const TrainingDiary = ({ open, onOpenChange, user }: TrainingDiaryProps) => {
   const [logs, setLogs] = useState<TrainingLog[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [isLoading, setIsLoading] = useState(false);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [isAdding, setIsAdding] = useState(false);
   
   const [date, setDate] = useState(new Date().toISOString().split('T')[0]);
@@ -40,8 +42,9 @@ export const TrainingDiary = ({ open, onOpenChange, user }: TrainingDiaryProps)
     
     setIsLoading(true);
     try {
-      const data = await api.getTrainingLogs(user.id);
-      setLogs(data);
+      const page = await api.getTrainingLogs(user.id);
+      setLogs(page.logs);
+      setNextCursor(page.next_cursor);
     } catch (error: any) {
       toast({ title: 'Ошибка', description: error.message, variant: 'destructive' });
     } finally {
@@ -49,6 +52,21 @@ export const TrainingDiary = ({ open, onOpenChange, user }: TrainingDiaryProps)
     }
   };
 
+  const loadMoreLogs = async () => {
+    if (!user || !nextCursor) return;
+
+    setIsLoadingMore(true);
+    try {
+      const page = await api.getTrainingLogs(user.id, nextCursor);
+      setLogs((current) => [...current, ...page.logs]);
+      setNextCursor(page.next_cursor);
+    } catch (error: any) {
+      toast({ title: 'Ошибка', description: error.message, variant: 'destructive' });
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   const handleAddLog = async () => {
     if (!user || !exerciseName) {
       toast({ title: 'Ошибка', description: 'Введите название упражнения', variant: 'destructive' });
@@ -231,6 +249,17 @@ export const TrainingDiary = ({ open, onOpenChange, user }: TrainingDiaryProps)
                       </div>
                     </Card>
                   ))}
+
+                {nextCursor && (
+                  <Button
+                    variant="outline"
+                    className="w-full"
+                    onClick={loadMoreLogs}
+                    disabled={isLoadingMore}
+                  >
+                    {isLoadingMore ? 'Загрузка...' : 'Показать более ранние записи'}
+                  </Button>
+                )}
               </div>
             )}
           </div>
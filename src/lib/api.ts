@@ -1,9 +1,23 @@
 const API_URLS = {
   auth: 'https://functions.poehali.dev/8cfbd030-d178-4ffd-983d-f0bfbfe81900',
   purchases: 'https://functions.poehali.dev/f3dbdaa0-85d9-4b97-948f-7680f50789a6',
-  trainingLog: 'https://functions.poehali.dev/60d26fc8-76c5-4ea0-a64b-00a5192fe9a2'
+  trainingLog: 'https://functions.poehali.dev/60d26fc8-76c5-4ea0-a64b-00a5192fe9a2',
+  foodLog: 'https://functions.poehali.dev/9c96b056-7a2e-4565-a351-26deca2f2098'
 };
 
+const SESSION_TOKEN_KEY = 'session_token';
+
+export function authHeaders(headers: Record<string, string> = {}): Record<string, string> {
+  const token = localStorage.getItem(SESSION_TOKEN_KEY);
+  return token ? { ...headers, 'X-Auth-Token': token } : headers;
+}
+
+function saveSessionToken(token?: string) {
+  if (token) {
+    localStorage.setItem(SESSION_TOKEN_KEY, token);
+  }
+}
+
 export interface User {
   id: number;
   email: string;
@@ -23,8 +37,34 @@ export interface TrainingLog {
   notes?: string;
 }
 
+// Страница дневника тренировок: next_cursor передаётся в следующий запрос, null — записей больше нет
+export interface TrainingLogPage {
+  logs: TrainingLog[];
+  next_cursor: string | null;
+}
+
+export type DashboardField = 'goals' | 'food_logs' | 'training_logs' | 'purchases';
+
+export interface Dashboard {
+  goals?: { calories_goal: string; protein_goal: string; fats_goal: string; carbs_goal: string } | null;
+  food_logs?: any[];
+  training_logs?: TrainingLog[];
+  purchases?: any[];
+}
+
+// КБЖУ на grams: обычную порцию пользователя или 100 г для продуктов из каталога (entries = 0)
+export interface SuggestedFood {
+  name: string;
+  grams: number;
+  calories: number;
+  protein: number;
+  fats: number;
+  carbs: number;
+  entries: number;
+}
+
 export const api = {
-  async register(email: string, password: string, name: string, phone: string): Promise<{ user: User }> {
+  async register(email: string, password: string, name: string, phone: string): Promise<{ user: User; token?: string }> {
     const response = await fetch(API_URLS.auth, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
@@ -36,10 +76,12 @@ export const api = {
       throw new Error(error.error || 'Ошибка регистрации');
     }
     
-    return response.json();
+    const data = await response.json();
+    saveSessionToken(data.token);
+    return data;
   },
 
-  async login(email: string, password: string): Promise<{ user: User }> {
+  async login(email: string, password: string): Promise<{ user: User; token?: string }> {
     const response = await fetch(API_URLS.auth, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
@@ -51,24 +93,39 @@ export const api = {
       throw new Error(error.error || 'Ошибка входа');
     }
     
-    return response.json();
+    const data = await response.json();
+    saveSessionToken(data.token);
+    return data;
+  },
+
+  async logout(): Promise<void> {
+    const headers = authHeaders({ 'Content-Type': 'application/json' });
+    localStorage.removeItem(SESSION_TOKEN_KEY);
+    await fetch(API_URLS.auth, {
+      method: 'POST',
+      headers,
+      body: JSON.stringify({ action: 'logout' })
+    });
   },
 
-  async savePurchases(userId: number, programs: any[]): Promise<void> {
+  async savePurchases(userId: number, programs: any[], idempotencyKey?: string): Promise<any[]> {
     const response = await fetch(API_URLS.purchases, {
       method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ user_id: userId, programs })
+      headers: authHeaders({ 'Content-Type': 'application/json' }),
+      body: JSON.stringify({ user_id: userId, programs, idempotency_key: idempotencyKey })
     });
     
     if (!response.ok) {
       const error = await response.json();
       throw new Error(error.error || 'Ошибка сохранения покупок');
     }
+    
+    const data = await response.json();
+    return data.purchases;
   },
 
   async getPurchases(userId: number): Promise<any[]> {
-    const response = await fetch(`${API_URLS.purchases}?user_id=${userId}`);
+    const response = await fetch(`${API_URLS.purchases}?user_id=${userId}`, { headers: authHeaders() });
     
     if (!response.ok) {
       const error = await response.json();
@@ -79,8 +136,38 @@ export const api = {
     return data.purchases;
   },
 
-  async getTrainingLogs(userId: number): Promise<TrainingLog[]> {
-    const response = await fetch(`${API_URLS.trainingLog}?user_id=${userId}`);
+  async getDashboard(userId: number, date: string, fields?: DashboardField[]): Promise<Dashboard> {
+    const params = new URLSearchParams({ action: 'dashboard', user_id: String(userId), date });
+    if (fields) {
+      params.set('fields', fields.join(','));
+    }
+    const response = await fetch(`${API_URLS.foodLog}?${params}`, { headers: authHeaders() });
+    
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.error || 'Ошибка загрузки данных');
+    }
+    
+    return response.json();
+  },
+
+  async suggestFoods(userId: number, query = '', limit = 10): Promise<SuggestedFood[]> {
+    const params = new URLSearchParams({ action: 'suggest_foods', user_id: String(userId), query, limit: String(limit) });
+    const response = await fetch(`${API_URLS.foodLog}?${params}`, { headers: authHeaders() });
+    
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.error || 'Ошибка загрузки подсказок');
+    }
+    
+    const data = await response.json();
+    return data.foods;
+  },
+
+  async getTrainingLogs(userId: number, cursor?: string | null): Promise<TrainingLogPage> {
+    const params = new URLSearchParams({ user_id: String(userId) });
+    if (cursor) params.set('cursor', cursor);
+    const response = await fetch(`${API_URLS.trainingLog}?${params}`, { headers: authHeaders() });
     
     if (!response.ok) {
       const error = await response.json();
@@ -88,13 +175,13 @@ export const api = {
     }
     
     const data = await response.json();
-    return data.logs;
+    return { logs: data.logs, next_cursor: data.next_cursor ?? null };
   },
 
   async addTrainingLog(log: TrainingLog): Promise<void> {
     const response = await fetch(API_URLS.trainingLog, {
       method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
+      headers: authHeaders({ 'Content-Type': 'application/json' }),
       body: JSON.stringify(log)
     });
     
@@ -107,7 +194,7 @@ export const api = {
   async updateTrainingLog(log: TrainingLog): Promise<void> {
     const response = await fetch(API_URLS.trainingLog, {
       method: 'PUT',
-      headers: { 'Content-Type': 'application/json' },
+      headers: authHeaders({ 'Content-Type': 'application/json' }),
       body: JSON.stringify(log)
     });
     
@@ -115,5 +202,37 @@ export const api = {
       const error = await response.json();
       throw new Error(error.error || 'Ошибка обновления записи');
     }
+  },
+
+  async updateTrainingLogs(userId: number, updates: Array<Partial<TrainingLog> & { id: number; old_date?: string }>): Promise<TrainingLog[]> {
+    const response = await fetch(API_URLS.trainingLog, {
+      method: 'PUT',
+      headers: authHeaders({ 'Content-Type': 'application/json' }),
+      body: JSON.stringify({ user_id: userId, updates })
+    });
+    
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.error || 'Ошибка обновления записей');
+    }
+    
+    const data = await response.json();
+    return data.updated;
+  },
+
+  async deleteTrainingLogs(userId: number, ids: number[]): Promise<TrainingLog[]> {
+    const response = await fetch(API_URLS.trainingLog, {
+      method: 'DELETE',
+      headers: authHeaders({ 'Content-Type': 'application/json' }),
+      body: JSON.stringify({ user_id: userId, ids })
+    });
+    
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.error || 'Ошибка удаления записей');
+    }
+    
+    const data = await response.json();
+    return data.deleted;
   }
 };
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { Button } from '@/components/ui/button';
 import { Card } from '@/components/ui/card';
 import { Sheet, SheetContent, SheetHeader, SheetTitle, SheetTrigger } from '@/components/ui/sheet';
@@ -143,6 +143,7 @@ const Index = () => {
   const [certOpen, setCertOpen] = useState(false);
   
   const [cart, setCart] = useState<CartItem[]>([]);
+  const checkoutKeyRef = useRef<string | null>(null);
   const [isCartOpen, setIsCartOpen] = useState(false);
   const [calculatorOpen, setCalculatorOpen] = useState(false);
   const [selectedNutritionProgram, setSelectedNutritionProgram] = useState<Program | null>(null);
@@ -165,6 +166,10 @@ const Index = () => {
     }
   }, []);
 
+  useEffect(() => {
+    checkoutKeyRef.current = null;
+  }, [cart]);
+
   const loadPurchases = async (userId: number) => {
     try {
       const purchases = await api.getPurchases(userId);
@@ -182,6 +187,7 @@ const Index = () => {
   };
 
   const handleLogout = () => {
+    api.logout().catch(error => console.error('Error logging out:', error));
     localStorage.removeItem('user');
     setUser(null);
     setPurchasedPrograms([]);
@@ -269,7 +275,11 @@ const Index = () => {
     }
 
     try {
-      await api.savePurchases(user.id, cart);
+      // Повтор оплаты после ошибки отправляет тот же ключ, и покупки не задваиваются
+      if (!checkoutKeyRef.current) {
+        checkoutKeyRef.current = crypto.randomUUID();
+      }
+      await api.savePurchases(user.id, cart, checkoutKeyRef.current);
       setPurchasedPrograms([...purchasedPrograms, ...cart]);
       setCart([]);
       setCheckoutOpen(false);